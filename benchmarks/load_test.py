@@ -0,0 +1,121 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Runs the whole main.py pipeline against the synthetic AdWords data of
+fakes/synthetic.py and a new SQLite database, for growing data sizes, and
+reports the time, peak memory and loaded rows of each run.
+
+    python benchmarks/load_test.py [--scale accounts=2,campaigns=5,adgroups=10,criteria=20]
+                                   [--grow criteria] [--steps 1,2,4,8] [--days 30]
+                                   [--csv load.csv] [-- extra main.py arguments]
+
+Each step multiplies the --grow parameter of --scale by the step. The CSV
+has one line per step, to chart throughput and memory against data size.
+"""
+
+import argparse
+import csv
+import datetime
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import sqlalchemy as sqa
+
+from fakes.synthetic import Scale
+from objects import model
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'main.py')
+
+
+def parse_arguments(args):
+    parser = argparse.ArgumentParser(description = 'load test main.py on synthetic data')
+    parser.add_argument('--scale', default='accounts=2,campaigns=5,adgroups=10,criteria=20')
+    parser.add_argument('--grow', default='criteria',
+                        choices=[x for x, _ in Scale.DEFAULTS])
+    parser.add_argument('--steps', default='1,2,4,8')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--csv', default=None)
+    parser.add_argument('extra', nargs='*', help='arguments passed on to main.py')
+    return parser.parse_args(args)
+
+
+def count_rows(connection_string):
+    """
+    the rows of the entity tables and of the report tables.
+    """
+    engine = sqa.create_engine(connection_string)
+    entities = [model.Account, model.Campaign, model.AdGroup, model.AdGroupCriterion]
+    with engine.connect() as connection:
+        count = lambda x: connection.execute(
+            sqa.select([sqa.func.count()]).select_from(x.__table__)).scalar()
+        return (sum(count(x) for x in entities),
+                sum(count(x) for x in model.REPORT_MODELS.values()))
+
+
+def run(scale, days, extra):
+    """
+    runs main.py in a child process. Returns its seconds, peak resident
+    memory in MB and exit status.
+    """
+    path = os.path.join(tempfile.mkdtemp(), 'load.db')
+    connection_string = 'sqlite:///%s' % path
+    end_date = datetime.date.today() - datetime.timedelta(days=1)
+    start_date = end_date - datetime.timedelta(days=days - 1)
+    args = [sys.executable, MAIN, '--fake', repr(scale), '--fake-db', connection_string,
+            '--create-tables', '-s', start_date.strftime('%Y%m%d'),
+            '-e', end_date.strftime('%Y%m%d')] + extra
+    started = time.time()
+    process = subprocess.Popen(args)
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.time() - started
+    # ru_maxrss is in kilobytes on Linux
+    return connection_string, seconds, usage.ru_maxrss / 1024.0, status
+
+
+if __name__ == '__main__':
+    args = parse_arguments(sys.argv[1:])
+    base = Scale.parse(args.scale)
+    results = []
+    print('%-60s %10s %12s %10s %12s %10s' %
+          ('scale', 'seconds', 'entity rows', 'report rows', 'rows/s', 'peak MB'))
+    for step in [int(x) for x in args.steps.split(',')]:
+        scale = Scale.parse(args.scale)
+        setattr(scale, args.grow, getattr(base, args.grow) * step)
+        connection_string, seconds, memory, status = run(scale, args.days, args.extra)
+        if status != 0:
+            raise SystemExit('main.py failed for %r' % scale)
+        entity_rows, report_rows = count_rows(connection_string)
+        results.append([repr(scale), '%.1f' % seconds, entity_rows, report_rows,
+                        '%.0f' % (report_rows / seconds), '%.0f' % memory])
+        print('%-60s %10s %12d %10d %12s %10s' % tuple(results[-1]))
+
+    if args.csv is not None:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['scale', 'seconds', 'entity_rows', 'report_rows',
+                             'rows_per_second', 'peak_mb'])
+            writer.writerows(results)
@@ -0,0 +1,180 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Times the loader's probe queries of get_first_date_of_no_data (max(Date),
+count() and delete() of the last day of an account) on a performance table,
+before and after creating the secondary indexes of the model.
+
+    python benchmarks/probe_queries.py [--accounts 50] [--days 365] [--rows-per-day 200]
+
+By default a temporary SQLite database is used; --connection-string runs it
+against another database. The benchmark only touches a scratch copy of the
+keyword table, bench_gads_sqa_keyword_performance, which it drops at the
+end, and refuses to run if that table exists with rows.
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import sqlalchemy as sqa
+
+from objects import model
+from objects.migrate import create_missing_indexes
+
+REPEAT = 5
+SCRATCH_PREFIX = 'bench_'
+# the primary key of the keyword table in existing databases, which the
+# "before" table reproduces whatever the model declares
+LEGACY_PRIMARY_KEY = ['AdNetworkType1', 'AdNetworkType2', 'Date', 'Device',
+                      'ExternalCustomerId', 'CampaignId', 'AdGroupId', 'Id']
+
+
+def parse_arguments(args):
+    parser = argparse.ArgumentParser(description = 'benchmark the loader probe queries')
+    parser.add_argument('--connection-string', default=None)
+    parser.add_argument('--accounts', type=int, default=50)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--rows-per-day', type=int, default=200)
+    return parser.parse_args(args)
+
+
+def scratch_table(table):
+    """
+    a copy of the table under a scratch name, with the primary key of
+    existing databases, without its secondary indexes and foreign keys, in a
+    metadata of its own.
+    """
+    columns = [sqa.Column(x.name, x.type, autoincrement=False) for x in table.columns]
+    return sqa.Table(SCRATCH_PREFIX + table.name, sqa.MetaData(), *columns,
+                     sqa.PrimaryKeyConstraint(*LEGACY_PRIMARY_KEY))
+
+
+def declare_indexes(scratch, table):
+    """
+    declares the secondary indexes of the table on its scratch copy.
+    """
+    for index in table.indexes:
+        sqa.Index(SCRATCH_PREFIX + index.name, *[scratch.c[x.name] for x in index.columns])
+
+
+def fill(engine, table, accounts, days, rows_per_day):
+    first_day = datetime.date(2016, 1, 1)
+    with engine.begin() as connection:
+        for account in range(accounts):
+            for day in range(days):
+                date = first_day + datetime.timedelta(days=day)
+                connection.execute(table.insert(), [
+                    {'ExternalCustomerId': account,
+                     'AdNetworkType1': 'Search Network',
+                     'AdNetworkType2': 'Google search',
+                     'Date': date,
+                     'Device': 'Computers',
+                     'CampaignId': i % 10,
+                     'AdGroupId': i,
+                     'Id': i,
+                     'Impressions': i}
+                    for i in range(rows_per_day)])
+    return first_day + datetime.timedelta(days=days - 1)
+
+
+def probe(engine, table, account, last_day):
+    """
+    the three probe queries, the delete rolled back. Returns their seconds.
+    """
+    res = []
+    with engine.connect() as connection:
+        started = time.time()
+        connection.execute(
+            sqa.select([sqa.func.max(table.c.Date)]).\
+            where(table.c.ExternalCustomerId == account)).scalar()
+        res.append(time.time() - started)
+
+        started = time.time()
+        connection.execute(
+            sqa.select([sqa.func.count()]).select_from(table).\
+            where(table.c.ExternalCustomerId == account).\
+            where(table.c.Date == last_day)).scalar()
+        res.append(time.time() - started)
+
+        transaction = connection.begin()
+        started = time.time()
+        connection.execute(
+            table.delete().\
+            where(table.c.ExternalCustomerId == account).\
+            where(table.c.Date == last_day))
+        res.append(time.time() - started)
+        transaction.rollback()
+    return res
+
+
+def run(engine, table, accounts, last_day):
+    totals = [0.0, 0.0, 0.0]
+    for i in range(REPEAT):
+        for j, seconds in enumerate(probe(engine, table, (i * 7) % accounts, last_day)):
+            totals[j] += seconds
+    return [x / REPEAT for x in totals]
+
+
+if __name__ == '__main__':
+    args = parse_arguments(sys.argv[1:])
+    connection_string = args.connection_string
+    if connection_string is None:
+        path = os.path.join(tempfile.mkdtemp(), 'probe.db')
+        connection_string = 'sqlite:///%s' % path
+    engine = sqa.create_engine(connection_string)
+
+    # the table is created as in databases created before the secondary
+    # indexes were declared; create_missing_indexes adds those of the model.
+    source = model.KeywordPerformance.__table__
+    table = scratch_table(source)
+    if engine.has_table(table.name):
+        with engine.connect() as connection:
+            rows = connection.execute(
+                sqa.select([sqa.func.count()]).select_from(table)).scalar()
+        if rows:
+            raise SystemExit('%s exists with %d rows, not dropping it' %
+                             (table.name, rows))
+        table.drop(engine)
+    table.create(engine)
+
+    started = time.time()
+    last_day = fill(engine, table, args.accounts, args.days, args.rows_per_day)
+    print('filled %d rows in %.1fs' %
+          (args.accounts * args.days * args.rows_per_day, time.time() - started))
+
+    before = run(engine, table, args.accounts, last_day)
+    started = time.time()
+    declare_indexes(table, source)
+    create_missing_indexes(engine, [table])
+    print('created indexes in %.1fs' % (time.time() - started))
+    after = run(engine, table, args.accounts, last_day)
+
+    print('%-12s %12s %12s' % ('query', 'before [ms]', 'after [ms]'))
+    for name, x, y in zip(['max(Date)', 'count()', 'delete()'], before, after):
+        print('%-12s %12.2f %12.2f' % (name, x * 1000, y * 1000))
+    table.drop(engine)
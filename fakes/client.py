@@ -0,0 +1,38 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+
+class FakeAdWordsClient(object):
+    """
+    stand-in for adwords.AdWordsClient, serving the given fake services.
+    """
+    def __init__(self, services=None, report_downloader=None):
+        self.services = services if services is not None else {}
+        self.report_downloader = report_downloader
+        self.client_customer_id = None
+
+    def GetService(self, service_name, version=None, server=None):
+        return self.services[service_name]
+
+    def GetReportDownloader(self, version=None, server=None):
+        return self.report_downloader
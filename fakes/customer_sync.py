@@ -0,0 +1,104 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+
+from fakes.suds_objects import FakeSudsObject
+
+MAX_HISTORY_DAYS = 90
+
+
+class FakeCustomerSyncService(object):
+    """
+    local stand-in for CustomerSyncService. Changes are recorded with
+    record_campaign_change and record_adgroup_change, and get() reports the
+    ones within the selector's dateTimeRange in the same shape as the API.
+    """
+    def __init__(self):
+        self.changes = []
+
+    def _record(self, when, campaignId, adGroupId, status, criteria):
+        if when is None:
+            when = datetime.datetime.utcnow()
+        self.changes.append((when, campaignId, adGroupId, status, criteria))
+
+    def record_campaign_change(self, campaignId, when=None, new=False):
+        self._record(when, campaignId, None,
+                     'NEW' if new else 'FIELDS_CHANGED', False)
+
+    def record_adgroup_change(self, campaignId, adGroupId, when=None,
+                              new=False, fields=True, criteria=False):
+        if new:
+            status = 'NEW'
+        elif fields:
+            status = 'FIELDS_CHANGED'
+        else:
+            status = 'FIELDS_UNCHANGED'
+        self._record(when, campaignId, adGroupId, status, criteria)
+
+    @staticmethod
+    def _parse_time(value):
+        return datetime.datetime.strptime(' '.join(value.split(' ')[:2]),
+                                          '%Y%m%d %H%M%S')
+
+    def get(self, selector):
+        if not selector.get('campaignIds'):
+            raise ValueError('CustomerSyncError.TOO_FEW_IDS')
+        t_min = self._parse_time(selector['dateTimeRange']['min'])
+        t_max = self._parse_time(selector['dateTimeRange']['max'])
+        if t_max - t_min > datetime.timedelta(days=MAX_HISTORY_DAYS):
+            raise ValueError('CustomerSyncError.INVALID_DATE_RANGE')
+        campaign_ids = set(int(x) for x in selector['campaignIds'])
+
+        campaigns = {}
+        last_change = None
+        for when, campaignId, adGroupId, status, criteria in sorted(self.changes, key=lambda x: x[0]):
+            if campaignId not in campaign_ids or not t_min <= when <= t_max:
+                continue
+            last_change = when
+            campaign = campaigns.setdefault(campaignId, FakeSudsObject(
+                campaignId=campaignId,
+                campaignChangeStatus='FIELDS_UNCHANGED',
+                changedAdGroups=[]))
+            if adGroupId is None:
+                if campaign.campaignChangeStatus != 'NEW':
+                    campaign.campaignChangeStatus = status
+                continue
+            adgroups = {x.adGroupId: x for x in campaign.changedAdGroups}
+            if adGroupId not in adgroups:
+                adgroup = FakeSudsObject(adGroupId=adGroupId,
+                                         adGroupChangeStatus=status,
+                                         changedCriteria=[],
+                                         removedCriteria=[])
+                campaign.changedAdGroups.append(adgroup)
+            else:
+                adgroup = adgroups[adGroupId]
+                if adgroup.adGroupChangeStatus == 'FIELDS_UNCHANGED':
+                    adgroup.adGroupChangeStatus = status
+            if criteria:
+                adgroup.changedCriteria.append(criteria)
+
+        result = FakeSudsObject(changedCampaigns=list(campaigns.values()))
+        if last_change is not None:
+            result.lastChangeTimestamp = last_change.strftime('%Y%m%d %H%M%S')
+        return result
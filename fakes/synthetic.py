@@ -0,0 +1,436 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import re
+import zlib
+from os.path import dirname, join
+
+from fakes.client import FakeAdWordsClient
+from fakes.customer_sync import FakeCustomerSyncService
+from fakes.suds_objects import FakeSudsObject
+from objects import report_registry
+from objects.accounts import CACHE_PATH as ACCOUNTS_CACHE_PATH
+from reports.parsing import _kind
+
+# the services refuse pages starting after this index, as the API does
+MAX_START_INDEX = 100000
+
+MANAGER_ID = 9000000000
+
+# the days of reports loaded into an empty database without -s, up to
+# yesterday
+DAYS = 7
+
+# the account graph of the synthetic data is cached apart from the real one
+CACHE_PATH = join(dirname(ACCOUNTS_CACHE_PATH), 'fake-accounts.json')
+
+# (AdNetworkType1, AdNetworkType2, Device) of the report rows of an entity
+SEGMENTS = [
+    ('Search Network', 'Google search', 'Computers'),
+    ('Search Network', 'Google search', 'Mobile devices with full browsers'),
+    ('Search Network', 'Search partners', 'Computers'),
+    ('Display Network', 'Display Network', 'Tablets with full browsers'),
+]
+
+REPORT_QUERY = re.compile(r'SELECT (?P<fields>.+) FROM (?P<report>\w+)'
+                          r'(?: Where .*)? During (?P<start>\d{8}),(?P<end>\d{8})')
+
+
+class Scale(object):
+    """
+    the size of the synthetic data: accounts under a manager, campaigns per
+    account, adgroups per campaign, criteria per adgroup, criteria with
+    report rows per account and day, report rows per entity and day
+    (segments) and labels per account.
+    """
+    DEFAULTS = [('accounts', 3), ('campaigns', 5), ('adgroups', 10),
+                ('criteria', 20), ('active_criteria', 1000), ('segments', 2),
+                ('labels', 5)]
+
+    def __init__(self, **kwargs):
+        for name, default in self.DEFAULTS:
+            setattr(self, name, kwargs.pop(name, default))
+        if kwargs:
+            raise ValueError('unknown scale parameters: %s' % ', '.join(sorted(kwargs)))
+        if self.campaigns >= 1000 or self.adgroups >= 10000:
+            raise ValueError('at most 999 campaigns and 9999 adgroups per campaign')
+        self.segments = max(1, min(self.segments, len(SEGMENTS)))
+
+    @classmethod
+    def parse(cls, value):
+        """
+        parses e.g. "accounts=10,campaigns=20"; the rest keep their defaults.
+        """
+        kwargs = {}
+        for item in value.split(','):
+            if item.strip() == '':
+                continue
+            name, _, number = item.partition('=')
+            kwargs[name.strip()] = int(number)
+        return cls(**kwargs)
+
+    def __repr__(self):
+        return ','.join('%s=%d' % (x, getattr(self, x)) for x, _ in self.DEFAULTS)
+
+    def account_ids(self):
+        return [MANAGER_ID + x for x in range(1, self.accounts + 1)]
+
+    def campaign_ids(self, accountId):
+        a = accountId - MANAGER_ID
+        if not 0 < a <= self.accounts:
+            return []
+        return [a * 10 ** 6 + c for c in range(1, self.campaigns + 1)]
+
+    def adgroup_ids(self, campaignId):
+        return [campaignId * 10 ** 4 + g for g in range(1, self.adgroups + 1)]
+
+    def criterion_ids(self):
+        return [10 ** 6 + k for k in range(1, self.criteria + 1)]
+
+
+def status(i):
+    return 'REMOVED' if i % 10 == 9 else 'PAUSED' if i % 10 == 8 else 'ENABLED'
+
+
+def labels(scale, i):
+    if scale.labels == 0 or i % 3 != 0:
+        return []
+    label_id = 100 + i % scale.labels
+    return [FakeSudsObject(id=label_id, name='label %d' % label_id, status='ENABLED')]
+
+
+def _predicates(selector):
+    predicates = selector.get('predicates') or []
+    if isinstance(predicates, dict):
+        predicates = [predicates]
+    return predicates
+
+
+def _matches(value, operator, values):
+    if operator == 'IN' or operator == 'EQUALS':
+        return value in values
+    if operator == 'NOT_IN' or operator == 'NOT_EQUALS':
+        return value not in values
+    if operator == 'GREATER_THAN':
+        return value > min(values)
+    if operator == 'GREATER_THAN_EQUALS':
+        return value >= min(values)
+    if operator == 'LESS_THAN':
+        return value < min(values)
+    if operator == 'LESS_THAN_EQUALS':
+        return value <= min(values)
+    raise ValueError('PredicateError.INVALID_OPERATOR %s' % operator)
+
+
+def _filter(entries, predicates, getters):
+    for predicate in predicates:
+        if predicate['field'] not in getters:
+            raise ValueError('SelectorError.INVALID_PREDICATE_FIELD_NAME %s' %
+                             predicate['field'])
+        getter = getters[predicate['field']]
+        values = predicate['values']
+        if not isinstance(values, (list, tuple)):
+            values = [values]
+        if entries and isinstance(getter(entries[0]), int):
+            values = [int(x) for x in values]
+        if predicate['operator'] in ('IN', 'NOT_IN'):
+            values = set(values)
+        entries = [x for x in entries
+                   if _matches(getter(x), predicate['operator'], values)]
+    return entries
+
+
+def _paging(selector):
+    paging = selector.get('paging') or {}
+    start = int(paging.get('startIndex', 0))
+    if start > MAX_START_INDEX:
+        raise ValueError('SelectorError.START_INDEX_IS_TOO_HIGH')
+    return start, int(paging.get('numberResults', MAX_START_INDEX))
+
+
+def _page(entries, total, **kwargs):
+    page = FakeSudsObject(totalNumEntries=total, **kwargs)
+    if entries:
+        page.entries = entries
+    return page
+
+
+def select(entries, selector, getters):
+    """
+    the page of the entries the selector asks for: its predicates, ordering
+    and paging are applied in that order.
+    """
+    entries = _filter(entries, _predicates(selector), getters)
+    ordering = selector.get('ordering') or []
+    if isinstance(ordering, dict):
+        ordering = [ordering]
+    for order in reversed(ordering):
+        entries = sorted(entries, key=getters[order['field']],
+                         reverse=order.get('sortOrder') == 'DESCENDING')
+    start, count = _paging(selector)
+    return _page(entries[start:start + count], len(entries))
+
+
+class FakeManagedCustomerService(object):
+    def __init__(self, scale):
+        self.scale = scale
+
+    def get(self, selector):
+        manager = FakeSudsObject(customerId=MANAGER_ID, name='manager',
+                                 companyName='synthetic', canManageClients=True,
+                                 currencyCode='EUR', dateTimeZone='Europe/Berlin',
+                                 testAccount=False, accountLabels=[])
+        entries = [manager]
+        for i, accountId in enumerate(self.scale.account_ids()):
+            entries.append(FakeSudsObject(
+                customerId=accountId, name='account %d' % (i + 1),
+                companyName='synthetic', canManageClients=False,
+                currencyCode='EUR', dateTimeZone='Europe/Berlin',
+                testAccount=i % 10 == 9, accountLabels=labels(self.scale, i)))
+        page = select(entries, selector, {'CustomerId': lambda x: x.customerId})
+        # the links of the accounts of the page
+        page.links = [FakeSudsObject(managerCustomerId=MANAGER_ID, clientCustomerId=x.customerId)
+                      for x in getattr(page, 'entries', []) if x.customerId != MANAGER_ID]
+        return page
+
+
+class FakeCampaignService(object):
+    def __init__(self, scale, client):
+        self.scale = scale
+        self.client = client
+
+    def campaigns(self):
+        accountId = int(str(self.client.client_customer_id).replace('-', ''))
+        start = datetime.date(2016, 1, 1)
+        res = []
+        for i, campaignId in enumerate(self.scale.campaign_ids(accountId)):
+            res.append(FakeSudsObject(
+                id=campaignId, name='campaign %d' % campaignId,
+                status=status(i), servingStatus='SERVING',
+                # the API gives strings, dates are what the SQLite driver takes
+                startDate=start + datetime.timedelta(days=i), endDate=None,
+                adServingOptimizationStatus='OPTIMIZE',
+                advertisingChannelType='SEARCH' if i % 4 else 'DISPLAY',
+                campaignTrialType='BASE', baseCampaignId=campaignId,
+                trackingUrlTemplate=None, labels=labels(self.scale, i)))
+        return res
+
+    def get(self, selector):
+        return select(self.campaigns(), selector,
+                      {'Id': lambda x: x.id, 'Status': lambda x: x.status,
+                       'Name': lambda x: x.name})
+
+
+class FakeAdGroupService(object):
+    def __init__(self, scale, client):
+        self.scale = scale
+        self.client = client
+
+    def get(self, selector):
+        accountId = int(str(self.client.client_customer_id).replace('-', ''))
+        entries = []
+        for campaignId in self.scale.campaign_ids(accountId):
+            for i, adgroupId in enumerate(self.scale.adgroup_ids(campaignId)):
+                entries.append(FakeSudsObject(
+                    id=adgroupId, campaignId=campaignId,
+                    name='adgroup %d' % adgroupId, status=status(i),
+                    contentBidCriterionTypeGroup='KEYWORD',
+                    baseAdGroupId=adgroupId, trackingUrlTemplate=None,
+                    labels=labels(self.scale, i)))
+        return select(entries, selector,
+                      {'Id': lambda x: x.id, 'CampaignId': lambda x: x.campaignId,
+                       'Status': lambda x: x.status, 'Name': lambda x: x.name})
+
+
+class FakeAdGroupCriterionService(object):
+    """
+    the criteria are never all built: every adgroup has the same criteria
+    ids and statuses, so that a page is found from the number of matching
+    criteria per adgroup. Only orderings by AdGroupId are supported.
+    """
+    ADGROUP_FIELDS = ['AdGroupId', 'CampaignId']
+    CRITERION_FIELDS = ['Id', 'Status']
+
+    def __init__(self, scale, client):
+        self.scale = scale
+        self.client = client
+
+    def criterion(self, adgroupId, k, criterionId):
+        return FakeSudsObject(
+            adGroupId=adgroupId, criterionUse='BIDDABLE',
+            criterion=FakeSudsObject(id=criterionId, type='KEYWORD',
+                                     text='keyword %d %d' % (adgroupId, k),
+                                     matchType=['EXACT', 'PHRASE', 'BROAD'][k % 3]),
+            userStatus=status(k), systemServingStatus='ELIGIBLE',
+            approvalStatus='APPROVED',
+            firstPageCpc=FakeSudsObject(amount=FakeSudsObject(microAmount=10000 * (k % 100 + 1))),
+            bidModifier=None, labels=labels(self.scale, k))
+
+    def get(self, selector):
+        accountId = int(str(self.client.client_customer_id).replace('-', ''))
+        adgroups = [(x, y) for x in self.scale.campaign_ids(accountId)
+                    for y in self.scale.adgroup_ids(x)]
+        criteria = list(enumerate(self.scale.criterion_ids()))
+        predicates = _predicates(selector)
+        adgroups = _filter(adgroups,
+                           [x for x in predicates if x['field'] in self.ADGROUP_FIELDS],
+                           {'CampaignId': lambda x: x[0], 'AdGroupId': lambda x: x[1]})
+        criteria = _filter(criteria,
+                           [x for x in predicates if x['field'] not in self.ADGROUP_FIELDS],
+                           {'Id': lambda x: x[1], 'Status': lambda x: status(x[0])})
+
+        ordering = selector.get('ordering') or []
+        if isinstance(ordering, dict):
+            ordering = [ordering]
+        for order in ordering:
+            if order['field'] != 'AdGroupId':
+                raise ValueError('only ordering by AdGroupId is supported')
+            if order.get('sortOrder') == 'DESCENDING':
+                adgroups.reverse()
+
+        start, count = _paging(selector)
+        total = len(adgroups) * len(criteria)
+        entries = []
+        for position in range(start, min(start + count, total)):
+            _, adgroupId = adgroups[position // len(criteria)]
+            k, criterionId = criteria[position % len(criteria)]
+            entries.append(self.criterion(adgroupId, k, criterionId))
+        return _page(entries, total)
+
+
+class FakeReportDownloader(object):
+    """
+    builds the reports of the synthetic entities from the AWQL query. The
+    values of a row depend only on its keys and the field, so that queries
+    of a subset of the fields (like the completeness check's) sum up to the
+    same totals.
+    """
+    def __init__(self, scale, client):
+        self.scale = scale
+        self.client = client
+        self.definitions = dict((x.report_service, x)
+                                for x in report_registry.REPORTS.values())
+
+    def entities(self, report, accountId, day):
+        """
+        the (CampaignId, AdGroupId, Id) of the rows of the report for a day.
+        """
+        campaigns = self.scale.campaign_ids(accountId)
+        if report == 'account':
+            return [(None, None, None)] if campaigns else []
+        if report == 'campaign':
+            return [(x, None, None) for x in campaigns]
+        adgroups = [(x, y) for x in campaigns for y in self.scale.adgroup_ids(x)]
+        if report == 'adgroup':
+            return [(x, y, None) for x, y in adgroups]
+        # the criteria with impressions move on from one day to the next
+        criteria = self.scale.criterion_ids()
+        total = len(adgroups) * len(criteria)
+        offset = day.toordinal() * self.scale.active_criteria
+        res = []
+        for i in range(min(self.scale.active_criteria, total)):
+            position = (offset + i) % total
+            campaignId, adgroupId = adgroups[position // len(criteria)]
+            res.append((campaignId, adgroupId, criteria[position % len(criteria)]))
+        return res
+
+    def value(self, field, keys, kind):
+        if field.key:
+            # the key fields of an entity, like its channel type, don't
+            # change from one row to the next
+            keys = keys[2:5]
+        h = zlib.crc32(('%s %r' % (field.name, keys)).encode('utf-8'))
+        if kind == 'bigint':
+            if field.name == 'Cost' or field.name.endswith('Cpc') or field.name.endswith('Bid'):
+                value = str((h % 1000) * 10000)
+                if field.auto_prefix and h % 7 == 0:
+                    value = 'auto: ' + value
+                return value
+            return str(h % 1000)
+        if kind == 'int':
+            return str(h % 10 + 1)
+        if kind == 'float':
+            return '%.2f' % (h % 10000 / 100.0)
+        if kind == 'bool':
+            return 'true' if h % 2 else 'false'
+        if h % 11 == 0 and (not field.key or field.default is not None):
+            return '--'
+        return '%s %d' % (field.name, h % 3)
+
+    def DownloadReportAsStringWithAwql(self, query, file_format, **kwargs):
+        match = REPORT_QUERY.match(query)
+        if match is None:
+            raise ValueError('unsupported query %s' % query)
+        definition = self.definitions[match.group('report')]
+        fields = dict((x.name, x) for x in definition.fields)
+        kinds = dict((x.name, _kind(x.type_() if isinstance(x.type_, type) else x.type_))
+                     for x in definition.fields)
+        names = match.group('fields').split(', ')
+        accountId = int(str(self.client.client_customer_id).replace('-', ''))
+        day = datetime.datetime.strptime(match.group('start'), '%Y%m%d').date()
+        last_day = datetime.datetime.strptime(match.group('end'), '%Y%m%d').date()
+
+        lines = []
+        while day <= last_day:
+            for campaignId, adgroupId, criterionId in self.entities(definition.name,
+                                                                    accountId, day):
+                for network1, network2, device in SEGMENTS[:self.scale.segments]:
+                    keys = (accountId, day.toordinal(), campaignId, adgroupId,
+                            criterionId, device, network2)
+                    known = {
+                        'ExternalCustomerId': accountId,
+                        'Date': day.isoformat(),
+                        'CampaignId': campaignId,
+                        'AdGroupId': adgroupId,
+                        'Id': criterionId,
+                        'AdNetworkType1': network1,
+                        'AdNetworkType2': network2,
+                        'Device': device,
+                        'Criteria': 'keyword %s %s' % (adgroupId, criterionId),
+                    }
+                    row = []
+                    for name in names:
+                        if name in known:
+                            row.append(str(known[name]))
+                        else:
+                            row.append(self.value(fields[name], keys, kinds[name]))
+                    lines.append('\t'.join(row))
+            day += datetime.timedelta(days=1)
+        return '\n'.join(lines)
+
+
+def make_client(scale):
+    """
+    a FakeAdWordsClient serving synthetic data of the given Scale.
+    """
+    client = FakeAdWordsClient()
+    client.services = {
+        'ManagedCustomerService': FakeManagedCustomerService(scale),
+        'CampaignService': FakeCampaignService(scale, client),
+        'AdGroupService': FakeAdGroupService(scale, client),
+        'AdGroupCriterionService': FakeAdGroupCriterionService(scale, client),
+        'CustomerSyncService': FakeCustomerSyncService(),
+    }
+    client.report_downloader = FakeReportDownloader(scale, client)
+    return client
@@ -25,23 +25,24 @@ import argparse
 import getpass
 import datetime
 import sys
-from googleads import adwords
 import sqlalchemy as sqa
 import sqlalchemy.orm
 import logging
-import gc
 import urllib
 
-from objects.campaigns import Campaigns
-from objects.accounts import Accounts
-from objects.adgroups import AdGroups
-from objects.adgroup_criteria import AdGroupCriteria
 from objects import model
-from reports.performance_reports import AccountPerformanceReport
-from reports.performance_reports import CampaignPerformanceReport
-from reports.performance_reports import AdGroupPerformanceReport
-from reports.performance_reports import CriterionPerformanceReport
-from reports.performance_reports import KeywordPerformanceReport
+from objects import paging
+from objects import deadlines
+from objects.upsert import engine_options
+from runner.pipeline import process_account, FULL_SYNC_DAYS
+from runner.pipeline import ENTITY_TYPES, REPORT_TYPES
+from runner.scheduler import AccountScheduler
+from runner.backfill import PARTITION_DAYS
+from runner.clients import make_adwords_client, WSDL_CACHE_DIR
+from runner.token_cache import TOKEN_CACHE_PATH
+from runner.profiler import profiler, stage
+from reports.parsing import ENGINES
+from objects.accounts import Accounts, find_dormant_accounts, CACHE_PATH
 
 
 def parse_arguments(args):
@@ -50,12 +51,131 @@ def parse_arguments(args):
     parser.add_argument('-e', '--end-date', nargs = '?', default='', help='Format: yyyymmdd')
     parser.add_argument('-C', '--create-tables', action='store_true',
                         help='Create output tables in the database')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help='only fetch adgroups and criteria which changed since the last sync')
+    parser.add_argument('--full-sync-days', type=int, default=FULL_SYNC_DAYS,
+                        help='days after which an incremental sync falls back to a full one')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='number of accounts to process in parallel')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='processes converting large report chunks, 0 to convert '
+                        'them in the loading thread')
+    parser.add_argument('--engine', choices=ENGINES, default='rows',
+                        help='report conversion engine, columnar needs numpy and pandas')
+    parser.add_argument('-d', '--daemon', action='store_true',
+                        help='keep running: a full cycle every night, and a refresh '
+                        'of today and yesterday in between')
+    parser.add_argument('--refresh-minutes', type=int, default=30,
+                        help='daemon: minutes between two refreshes')
+    parser.add_argument('--nightly-hour', type=int, default=3,
+                        help='daemon: hour of the day after which the nightly cycle runs')
+    parser.add_argument('-M', '--migrate', action='store_true',
+                        help='create missing tables and indexes in an existing database and exit')
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help='recompute all rollup tables from the report tables and exit')
+    parser.add_argument('-b', '--backfill', nargs=2, metavar=('START', 'END'),
+                        help='load the reports of a single account over the given days '
+                        '(yyyymmdd), in date partitions loaded by --workers threads; '
+                        'running it again resumes it')
+    parser.add_argument('--backfill-days', type=int, default=PARTITION_DAYS,
+                        help='days per backfill partition')
+    parser.add_argument('--fresh-first', action='store_true',
+                        help='load yesterday of every account first, then the older days '
+                             'and the rest')
+    parser.add_argument('-a', '--accounts', default='',
+                        help='comma separated ids of the accounts to process, default all')
+    parser.add_argument('-x', '--exclude-accounts', default='',
+                        help='comma separated ids of accounts not to process')
+    parser.add_argument('--subtree', default='',
+                        help='only process the accounts under the given manager id')
+    parser.add_argument('--exclude-test', action='store_true',
+                        help='do not process test accounts')
+    parser.add_argument('--exclude-managers', action='store_true',
+                        help='do not process manager accounts')
+    parser.add_argument('--account-cache-hours', type=float, default=24,
+                        help='hours the cached account graph is used before being '
+                        'fetched again, 0 to always fetch it')
+    parser.add_argument('--inactive-days', type=int, default=30,
+                        help='accounts with no impressions in that many days skip the '
+                        'entity sync, 0 to disable')
+    parser.add_argument('--inactive-sync-days', type=int, default=7,
+                        help='days after which the entities of inactive accounts are '
+                        'synced anyway')
+    parser.add_argument('--entities', default=','.join(ENTITY_TYPES.keys()),
+                        help='comma separated entity types to sync, out of %(default)s')
+    parser.add_argument('--skip-entities', action='store_true',
+                        help='do not sync any entities, same as an empty --entities')
+    parser.add_argument('--reports', default=','.join(REPORT_TYPES.keys()),
+                        help='comma separated reports to dump, out of %(default)s')
+    parser.add_argument('--page-sizes', default='',
+                        help='entries per page, e.g. campaigns=9000,adgroups=10000, '
+                        'out of accounts, campaigns, adgroups, criteria, and ids '
+                        'per request when fetching given adgroups or criteria')
+    parser.add_argument('--page-concurrency', type=int, default=paging.MAX_IN_FLIGHT,
+                        help='pages of campaigns, adgroups and accounts requested '
+                        'at the same time')
+    parser.add_argument('--call-timeout', type=float, default=deadlines.CALL_TIMEOUT,
+                        help='seconds after which an API call is given up and tried again, 0 for no limit')
+    parser.add_argument('--chunk-timeout', type=float, default=deadlines.CHUNK_TIMEOUT,
+                        help='seconds after which the download of a report chunk is given up and '
+                             'split, 0 for no limit')
+    parser.add_argument('--account-timeout', type=float, default=deadlines.ACCOUNT_TIMEOUT,
+                        help='seconds after which an account is skipped, 0 for no limit')
+    parser.add_argument('--retries', type=int, default=deadlines.RETRIES,
+                        help='times an API call over its deadline is tried again')
+    parser.add_argument('--wsdl-cache', default=WSDL_CACHE_DIR,
+                        help='folder of the cached WSDLs, default %(default)s, '
+                        'empty to disable it')
+    parser.add_argument('--token-cache', default=TOKEN_CACHE_PATH,
+                        help='file of the access token shared by processes, default '
+                        '%(default)s, empty to disable it')
+    parser.add_argument('--profile-sql', action='store_true',
+                        help='record the count, time and rows of the SQL statements by stage, '
+                             'and log them at the end of the run')
+    parser.add_argument('--fake', default=None, metavar='SCALE',
+                        help='load synthetic data instead of calling the AdWords API, '
+                        'e.g. accounts=10,campaigns=20,adgroups=50,criteria=100 '
+                        '(see fakes/synthetic.py)')
+    parser.add_argument('--fake-db', default='sqlite:///gads-fake.db',
+                        help='database of the --fake runs, default %(default)s')
     parser.add_argument('--verbose', '-v', action='count',
                         default=0,
                         help='verbosity level, can be more than one')
     res = parser.parse_known_args(args)
     return res
 
+def parse_ids(value):
+    return [int(x.strip().replace('-', ''))
+            for x in value.split(',') if x.strip() != '']
+
+def parse_list(value, choices, option):
+    res = [x.strip() for x in value.split(',') if x.strip() != '']
+    unknown = [x for x in res if x not in choices]
+    if unknown:
+        raise SystemExit('unknown %s: %s, choose out of %s' %
+                         (option, ', '.join(unknown), ', '.join(choices)))
+    return res
+
+def parse_page_sizes(value):
+    """
+    parses --page-sizes to ({service name: size}, ids per request).
+    """
+    sizes = {}
+    ids = None
+    for item in value.split(','):
+        if item.strip() == '':
+            continue
+        name, _, size = item.partition('=')
+        name = name.strip()
+        if name == 'ids':
+            ids = int(size)
+        elif name in paging.SERVICE_NAMES:
+            sizes[paging.SERVICE_NAMES[name]] = int(size)
+        else:
+            raise SystemExit('unknown page size %s, choose out of %s, ids' %
+                             (name, ', '.join(paging.SERVICE_NAMES)))
+    return sizes, ids
+
 def load_setup_connection_string(section):
     """
     Attempts to read the default connection string from the connectionstrings.cfg file.
@@ -93,6 +213,31 @@ if __name__ == '__main__':
         end_date = None
     verbose = args.verbose
     create_tables = args.create_tables
+    workers = args.workers
+    incremental = args.incremental
+    full_sync_days = args.full_sync_days
+    daemon = args.daemon
+    account_ids = parse_ids(args.accounts)
+    excluded_ids = parse_ids(args.exclude_accounts)
+    subtree = parse_ids(args.subtree)
+    subtree = subtree[0] if subtree else None
+    entities = parse_list(args.entities, ENTITY_TYPES, '--entities')
+    if args.skip_entities:
+        entities = []
+    reports = parse_list(args.reports, REPORT_TYPES, '--reports')
+    if args.fresh_first and (start_date or end_date or args.backfill):
+        raise SystemExit('--fresh-first loads the missing days up to yesterday, '
+                         'it takes no dates')
+    page_sizes, ids_per_request = parse_page_sizes(args.page_sizes)
+    paging.configure(page_sizes=page_sizes, ids_per_request=ids_per_request,
+                     in_flight=args.page_concurrency)
+    deadlines.configure(call=args.call_timeout, chunk=args.chunk_timeout,
+                        account=args.account_timeout, retries=args.retries)
+    if args.engine == 'columnar':
+        from reports import columnar
+
+        if not columnar.available():
+            raise SystemExit('the columnar engine needs numpy and pandas')
     
     logging.basicConfig()
     logging.getLogger('sqlalchemy.engine').setLevel(logging.WARN)
@@ -102,83 +247,172 @@ if __name__ == '__main__':
 
     start = datetime.datetime.now()
     
-    adwords_client = adwords.AdWordsClient.LoadFromStorage()
-    
-    connection_string = load_setup_connection_string('adwords')
+    if args.fake is not None:
+        from fakes import synthetic
+        from reports import performance_reports
+
+        scale = synthetic.Scale.parse(args.fake)
+        logger.info('serving synthetic data of %r' % scale)
+        new_client = lambda: synthetic.make_client(scale)
+        connection_string = args.fake_db
+        # the fake database may be a new one, which the accounts of a
+        # cached graph wouldn't be written to
+        account_cache = synthetic.CACHE_PATH
+        account_cache_hours = 0
+        # an empty database would be loaded from 2016 on, which would take
+        # days of synthetic downloads
+        performance_reports.FIRST_DAY = datetime.date.today() - \
+                                        datetime.timedelta(days=synthetic.DAYS)
+    else:
+        new_client = lambda: make_adwords_client(cache_dir=args.wsdl_cache,
+                                                 token_cache=args.token_cache)
+        connection_string = load_setup_connection_string('adwords')
+        account_cache = CACHE_PATH
+        account_cache_hours = args.account_cache_hours
+    adwords_client = new_client()
+
     if not connection_string:
         logger.error("couldn't load connection string!")
         raise SystemExit()
-    engine = sqa.create_engine(connection_string, echo=False)
+    engine = sqa.create_engine(connection_string, echo=False,
+                               **engine_options(connection_string))
+    if args.profile_sql:
+        import atexit
+
+        profiler.attach(engine)
+        # the report is logged however the run ends
+        atexit.register(profiler.log_report)
     Base = model.Base
 
     if create_tables:
-        Base.metadata.create_all(engine)
-
-    Session = sqa.orm.sessionmaker(bind = engine)
-    session = Session()
-
-    accounts = Accounts()
-    accounts.load(adwords_client)
-    accounts.dump(session)
-
-    for accountId, account in accounts.accounts.items():
-        logger.info('processing (%d) %s' % (accountId, account.name))
-        adwords_client.client_customer_id = accountId
-
-        campaigns = Campaigns(accountId)
-        campaigns.load(adwords_client)
-        if len(campaigns.campaigns) == 0:
-            continue
-        campaigns.dump(session)
-
-        adgroups = AdGroups(accountId)
-        adgroups.load(adwords_client)
-        adgroups.dump(session)
+        from objects.migrate import create_views
 
-        adgroupcriteria = AdGroupCriteria(accountId)
-        adgroupcriteria.load(adwords_client)
-        adgroupcriteria.dump(session)
+        Base.metadata.create_all(engine)
+        create_views(engine)
 
-        session.close()
-        gc.collect()
+    if args.migrate:
+        from objects.migrate import migrate
 
-        arep = AccountPerformanceReport(adwords_client, session)
-        arep.dump(start_date=start_date, end_date=end_date)
-        arep = None
+        migrate(engine)
+        raise SystemExit()
 
-        session.close()
-        gc.collect()
+    Session = sqa.orm.sessionmaker(bind = engine)
 
-        crep = CampaignPerformanceReport(adwords_client, session)
-        crep.dump(start_date=start_date, end_date=end_date)
-        crep = None
+    if args.rebuild_rollups:
+        from objects import report_registry
+        from reports.rollups import RollupUpdater
 
-        session.close()
-        gc.collect()
+        for name in report_registry.ROLLUP_REPORTS:
+            RollupUpdater(Session(), name).rebuild()
+        raise SystemExit()
 
-        adgrep = AdGroupPerformanceReport(adwords_client, session)
-        adgrep.dump(start_date=start_date, end_date=end_date)
-        adgrep = None
+    # the account graph is cached between runs, and only written to the
+    # database when it was fetched again. Returns the selected accounts, and
+    # those of them which skip the entity sync.
+    def select_accounts(client, session):
+        accounts = Accounts()
+        accounts.load_cached(client, account_cache_hours, path=account_cache)
+        if not accounts.from_cache:
+            with stage('Accounts.dump'):
+                accounts.dump(session)
+        selected = accounts.filter(subtree_of=subtree,
+                                   exclude_test=args.exclude_test,
+                                   exclude_managers=args.exclude_managers,
+                                   include=account_ids,
+                                   exclude=excluded_ids)
+        dormant = set()
+        if args.inactive_days > 0 and entities:
+            with stage('find_dormant_accounts'):
+                dormant = find_dormant_accounts(session, selected.keys(),
+                                                args.inactive_days,
+                                                args.inactive_sync_days)
+            logger.info('%d inactive accounts skip the entity sync' % len(dormant))
+        return selected, dormant
+
+    if daemon:
+        from runner.daemon import Daemon
+
+        clients = [adwords_client]
+        def make_client():
+            if clients:
+                return clients.pop()
+            return new_client()
+
+        Daemon(make_client, Session, workers=workers,
+               refresh_minutes=args.refresh_minutes,
+               nightly_hour=args.nightly_hour,
+               incremental=incremental,
+               full_sync_days=full_sync_days,
+               select_accounts=select_accounts,
+               entities=entities, reports=reports,
+               parse_workers=args.parse_workers,
+               engine=args.engine,
+               fresh_first=args.fresh_first).run_forever()
 
-        session.close()
-        gc.collect()
+    session = Session()
+    selected, dormant = select_accounts(adwords_client, session)
+    session.close()
+
+    def make_client():
+        if workers == 1:
+            return adwords_client
+        return new_client()
+
+    def process(client, session, accountId, account):
+        return process_account(client, session, accountId, account,
+                               start_date=start_date, end_date=end_date,
+                               incremental=incremental,
+                               full_sync_days=full_sync_days,
+                               entities=[] if accountId in dormant else entities,
+                               reports=reports,
+                               parse_workers=args.parse_workers,
+                               engine=args.engine)
+
+    if args.backfill:
+        from runner.backfill import Backfill
+
+        if len(selected) != 1:
+            raise SystemExit('--backfill needs a single account, %d selected' %
+                             len(selected))
+        backfill_start, backfill_end = [datetime.datetime.strptime(x, '%Y%m%d').date()
+                                        for x in args.backfill]
+        failed = Backfill(make_client, Session, list(selected.keys())[0],
+                          backfill_start, backfill_end, reports=reports, workers=workers,
+                          partition_days=args.backfill_days,
+                          parse_workers=args.parse_workers,
+                          engine=args.engine).run(entities=entities, incremental=incremental,
+                                                  full_sync_days=full_sync_days)
+        raise SystemExit(1 if failed else 0)
+
+    scheduler = AccountScheduler(session, workers)
+    if args.fresh_first:
+        from runner.freshness import load_latest_day
+
+        def latest(client, session, accountId, account):
+            return load_latest_day(client, session, accountId, account,
+                                   reports=reports,
+                                   incremental=True,
+                                   full_sync_days=full_sync_days,
+                                   entities=[] if accountId in dormant else entities,
+                                   partition_days=args.backfill_days,
+                                   parse_workers=args.parse_workers,
+                                   engine=args.engine)
+
+        failed = scheduler.run(selected, latest, make_client, Session,
+                               record_stats=False)
+        logger.info('yesterday loaded for all accounts after %.0fs' %
+                    (datetime.datetime.now() - start).total_seconds())
+        failed = sorted(set(failed) |
+                        set(scheduler.run(selected, process, make_client, Session)))
+    else:
+        failed = scheduler.run(selected, process, make_client, Session)
+    if failed:
+        logger.error('failed accounts: %s' % ', '.join([str(x) for x in failed]))
 
-        crrep = CriterionPerformanceReport(adwords_client, session)
-        crrep.dump(start_date=start_date, end_date=end_date)
-        crrep = None
-    
-        session.close()
-        gc.collect()
-
-        krep = KeywordPerformanceReport(adwords_client, session)
-        krep.dump(start_date=start_date, end_date=end_date)
-        krep = None
-        
-        session.close()
-        session = Session()
-        gc.collect()
-        
     end = datetime.datetime.now()
 
     logger.info('started:%s' % str(start))
     logger.info('ended:%s' % str(end))
+    # so that cron and run.sh see the failures
+    if failed:
+        raise SystemExit(1)
@@ -21,25 +21,31 @@
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from googleads import adwords
 from objects import model
+from objects.labels import sync_labels, sync_label_associations
+from objects.upsert import bulk_upsert
+from objects.paging import PageFetcher
+from types import SimpleNamespace
+from os.path import exists, join, expanduser, dirname
+import sqlalchemy as sqa
+import datetime
+import json
 import logging
+import os
 
-PAGE_SIZE = 500
+CACHE_PATH = join(expanduser('~'), '.cache', 'google-adwords-dumper', 'accounts.json')
+CACHED_FIELDS = ['customerId', 'name', 'companyName', 'canManageClients',
+                 'currencyCode', 'dateTimeZone', 'testAccount']
 
 class Accounts:
     def __init__(self, loglevel=0):
         self.accounts = {}
         self.links = []
+        self.from_cache = False
         self.logger = logging.getLogger('googleads')
 
     def load(self, client):
-        # Initialize appropriate service.
-        managed_customer_service = client.GetService(
-            'ManagedCustomerService', version='v201607')
-
         # Construct selector to get all accounts.
-        offset = 0
         selector = {
             'fields': [
                 'CustomerId',
@@ -50,17 +56,11 @@ class Accounts:
                 'DateTimeZone',
                 'TestAccount',
                 'AccountLabels'
-            ],
-            'paging': {
-                'startIndex': str(offset),
-                'numberResults': str(PAGE_SIZE)
-            }
+            ]
         }
-        more_pages = True
 
-        while more_pages:
-            # Get serviced account graph.
-            page = managed_customer_service.get(selector)
+        # Get serviced account graph.
+        for page in PageFetcher(client, 'ManagedCustomerService').fetch_pages(selector):
             if 'entries' in page and page['entries']:
                 # Create map from customerId to parent and child links.
                 if 'links' in page:
@@ -69,19 +69,116 @@ class Accounts:
                 # Map from customerID to account.
                 for account in page['entries']:
                     self.accounts[account['customerId']] = account
-            offset += PAGE_SIZE
-            selector['paging']['startIndex'] = str(offset)
-            more_pages = offset < int(page['totalNumEntries'])
+
+    def load_cached(self, client, max_age_hours, path=CACHE_PATH):
+        """
+        loads the account graph from the cache file if it is younger than
+        max_age_hours, otherwise from the API, refreshing the cache.
+        """
+        if max_age_hours > 0 and exists(path):
+            with open(path) as f:
+                cache = json.load(f)
+            fetched = datetime.datetime.strptime(cache['fetched'], '%Y-%m-%dT%H:%M:%S')
+            if datetime.datetime.now() - fetched < datetime.timedelta(hours=max_age_hours):
+                for account in cache['accounts']:
+                    account['accountLabels'] = [SimpleNamespace(**x)
+                                                for x in account['accountLabels']]
+                    self.accounts[account['customerId']] = SimpleNamespace(**account)
+                self.links = [SimpleNamespace(clientCustomerId=x, managerCustomerId=y)
+                              for x, y in cache['links']]
+                self.from_cache = True
+                self.logger.info('loaded %d accounts from cache of %s' %
+                                 (len(self.accounts), fetched))
+                return
+
+        self.load(client)
+        cache = {
+            'fetched': datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+            'accounts': [],
+            'links': [[x.clientCustomerId, x.managerCustomerId] for x in self.links]
+        }
+        for account in self.accounts.values():
+            cached = {x: getattr(account, x, None) for x in CACHED_FIELDS}
+            cached['accountLabels'] = [{'id': x.id, 'name': getattr(x, 'name', None)}
+                                       for x in getattr(account, 'accountLabels', None) or []]
+            cache['accounts'].append(cached)
+        os.makedirs(dirname(path), exist_ok=True)
+        # written aside and renamed, so that a concurrent run or a crash
+        # never leaves half a file
+        tmp = '%s.%d' % (path, os.getpid())
+        with open(tmp, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp, path)
+
+    def filter(self, subtree_of=None, exclude_test=False, exclude_managers=False,
+               include=None, exclude=None):
+        """
+        returns the accounts ({customerId: account}) which pass all the given
+        filters: being in the subtree of the manager subtree_of (itself
+        included), not being test or manager accounts, being in the include
+        list and not in the exclude list of ids.
+        """
+        selected = dict(self.accounts)
+        if subtree_of is not None:
+            children = {}
+            for link in self.links:
+                children.setdefault(link.managerCustomerId, []).append(link.clientCustomerId)
+            subtree = set()
+            todo = [subtree_of]
+            while todo:
+                accountId = todo.pop()
+                if accountId not in subtree:
+                    subtree.add(accountId)
+                    todo.extend(children.get(accountId, []))
+            selected = {x: y for x, y in selected.items() if x in subtree}
+        if exclude_test:
+            selected = {x: y for x, y in selected.items()
+                        if not getattr(y, 'testAccount', False)}
+        if exclude_managers:
+            selected = {x: y for x, y in selected.items()
+                        if not getattr(y, 'canManageClients', False)}
+        if include:
+            selected = {x: y for x, y in selected.items() if x in include}
+        if exclude:
+            selected = {x: y for x, y in selected.items() if x not in exclude}
+        self.logger.info('%d of %d accounts selected' % (len(selected), len(self.accounts)))
+        return selected
 
     def dump(self, session):
-        ormaccounts = {}
+        sync_labels(session, self.accounts.values(), attr='accountLabels')
+
+        parents = {x.clientCustomerId: x.managerCustomerId for x in self.links}
+        rows = []
         for accountId, account in self.accounts.items():
-            ormaccounts[accountId] = model.Account(account)
+            row = model.Account(account).to_row()
+            row['parentId'] = parents.get(accountId)
+            rows.append(row)
+        bulk_upsert(session, model.Account.__table__, rows)
+
+        existing = sqa.select([model.account_labels.c.accountId,
+                               model.account_labels.c.labelId])
+        sync_label_associations(session, model.account_labels, 'accountId',
+                                self.accounts, existing, attr='accountLabels')
 
-        for link in self.links:
-            ormaccounts[link.clientCustomerId].parentId = link.managerCustomerId
 
-        for ormaccount in ormaccounts.values():
-            session.merge(ormaccount)
-        session.commit()
+def find_dormant_accounts(session, account_ids, inactive_days, sync_days):
+    """
+    the accounts which had no impressions in the last inactive_days days
+    according to the account performance table, and whose entities were
+    synced within the last sync_days days. Their entity sync can be skipped.
+    """
+    since = datetime.datetime.now().date() - datetime.timedelta(days=inactive_days)
+    perf = model.AccountPerformance
+    if hasattr(perf, 'Impressions'):
+        activity = sqa.func.sum(perf.Impressions)
+    else:
+        activity = sqa.func.count()
+    active = set(x for x, y in session.query(perf.ExternalCustomerId, activity).\
+                 filter(perf.Date >= since).\
+                 group_by(perf.ExternalCustomerId)
+                 if y)
 
+    synced_since = datetime.datetime.utcnow() - datetime.timedelta(days=sync_days)
+    synced = set(x for x, in session.query(model.EntitySync.accountId).\
+                 filter(model.EntitySync.lastSync >= synced_since))
+    return set(x for x in account_ids if x not in active and x in synced)
@@ -21,11 +21,14 @@
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from googleads import adwords
 from objects import model
+from objects.labels import sync_labels, sync_label_associations
+from objects.upsert import bulk_upsert
+from objects import paging
+from objects.services import get
+import sqlalchemy as sqa
 import logging
 
-PAGE_SIZE = 10000
 MAX_START_INDEX = 100000
 
 class AdGroupCriteria:
@@ -34,7 +37,31 @@ class AdGroupCriteria:
         self.accountId = accountId
         self.logger = logging.getLogger('googleads')
         
-    def load(self, client):
+    def load(self, client, adgroup_ids=None):
+        """
+        fetches all criteria of the account, or only the criteria of the
+        adgroups with the given ids if adgroup_ids is not None.
+        """
+        self.criteria = []
+
+        if adgroup_ids is None:
+            self._load(client, [])
+        else:
+            adgroup_ids = sorted(adgroup_ids)
+            step = paging.IDS_PER_REQUEST
+            for i in range(0, len(adgroup_ids), step):
+                self._load(client, [{
+                    'field': 'AdGroupId',
+                    'operator': 'IN',
+                    'values': [str(x) for x in adgroup_ids[i:i + step]]
+                }])
+
+        self.logger.info('fetched %d adgroup critaria' % (len(self.criteria)))
+
+    def _load(self, client, predicates):
+        # the pages are fetched in sequence: beyond MAX_START_INDEX the next
+        # one depends on the last entry of the previous one.
+        page_size = paging.PAGE_SIZES['AdGroupCriterionService']
         # Construct selector to get all accounts.
         offset = 0
         selector = {
@@ -91,34 +118,31 @@ class AdGroupCriteria:
             ],
             'paging': {
                 'startIndex': str(offset),
-                'numberResults': str(PAGE_SIZE)
+                'numberResults': str(page_size)
             },
-            'predicates': {
+            'predicates': [{
                 'field': 'Status',
                 'operator': 'IN',
                 'values': ['ENABLED', 'PAUSED', 'REMOVED']
-            },
+            }] + predicates,
             'ordering': {
                 'field': 'AdGroupId',
                 'sortOrder': 'ASCENDING'
                 }
         }
 
-        gads_service = client.GetService(
-            'AdGroupCriterionService', version='v201607')
-        self.criteria = []
-            
+        criteria = []
         more_pages = True
         last_entry = None
         while more_pages:
-            page = gads_service.get(selector)
+            page = get(client, 'AdGroupCriterionService', selector)
             self.logger.debug(('%d / %d') % (offset, int(page['totalNumEntries'])))
             if 'entries' in page:
                 for entry in page['entries']:
                     last_entry = entry
-                    self.criteria.append(entry)
+                    criteria.append(entry)
                     
-            offset += PAGE_SIZE
+            offset += page_size
 
             if offset > MAX_START_INDEX:
                 self.logger.debug('predicate change to get more')
@@ -129,39 +153,37 @@ class AdGroupCriteria:
                     'operator': 'IN',
                     'values': ['ENABLED', 'PAUSED', 'REMOVED']
                 })
+                selector['predicates'].extend(predicates)
                 selector['predicates'].append({
                     'field': 'AdGroupId',
                     'operator': 'GREATER_THAN',
                     'values': str(last_entry.adGroupId-1)
                 })
-                self.criteria = [x for x in self.criteria if x.adGroupId != last_entry.adGroupId]
+                criteria = [x for x in criteria if x.adGroupId != last_entry.adGroupId]
 
             
             selector['paging']['startIndex'] = str(offset)
             more_pages = offset < int(page['totalNumEntries'])
 
-        self.logger.info('fetched %d adgroup critaria' % (len(self.criteria)))
+        self.criteria.extend(criteria)
 
     def dump(self, session):
-        labels = session.query(model.Label).all()
-        labels = {x.id:x for x in labels}
-        ormobjects = session.query(model.AdGroupCriterion).\
-                     join(model.AdGroup).\
-                     join(model.Campaign).\
-                     filter(model.Campaign.accountId == self.accountId).all()
-        ormobjects = {(x.adGroupId, x.criterion_id):x for x in ormobjects}
-        new_objects = []
+        criteria = {}
         while self.criteria:
             criterion = self.criteria.pop()
-            if (criterion.adGroupId, criterion.criterion.id) in ormobjects:
-                ormobjects[(criterion.adGroupId, criterion.criterion.id)].update(criterion)
-            else:
-                new_objects.append(model.AdGroupCriterion(criterion, session_labels=labels))
-
-        self.logger.info('adding %d new adgroup criteria' %
-                         (len(new_objects)))
-
-        session.commit()
-        session.close()
-        session.bulk_save_objects(new_objects)
-        session.commit()
+            criteria[(criterion.adGroupId, criterion.criterion.id)] = criterion
+        sync_labels(session, criteria.values())
+
+        rows = [model.AdGroupCriterion(x, session_labels=None).to_row()
+                for x in criteria.values()]
+        bulk_upsert(session, model.AdGroupCriterion.__table__, rows)
+
+        table = model.adgroupcriterion_labels
+        existing = sqa.select([table.c.adgroupId, table.c.criterionId, table.c.labelId]).\
+                   select_from(table.\
+                               join(model.AdGroup.__table__,
+                                    table.c.adgroupId == model.AdGroup.id).\
+                               join(model.Campaign.__table__)).\
+                   where(model.Campaign.accountId == self.accountId)
+        sync_label_associations(session, table, ('adgroupId', 'criterionId'),
+                                criteria, existing)
@@ -21,22 +21,44 @@
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from googleads import adwords
 from objects import model
+from objects.labels import sync_labels, sync_label_associations
+from objects.upsert import bulk_upsert
+from objects import paging
+import sqlalchemy as sqa
 import logging
 
-PAGE_SIZE = 10000
-
 class AdGroups:
     def __init__(self, accountId):
         self.adgroups = {}
         self.accountId = accountId
         self.logger = logging.getLogger('googleads')
         
-    def load(self, client):
-        # Construct selector to get all accounts.
-        offset = 0
-        selector = {
+    def load(self, client, ids=None):
+        """
+        fetches all adgroups of the account, or only the ones with the given
+        ids if ids is not None.
+        """
+        self.adgroups= {}
+
+        if ids is None:
+            selectors = [self._selector([])]
+        else:
+            ids = sorted(ids)
+            step = paging.IDS_PER_REQUEST
+            selectors = [self._selector([{
+                'field': 'Id',
+                'operator': 'IN',
+                'values': [str(x) for x in ids[i:i + step]]
+            }]) for i in range(0, len(ids), step)]
+        if selectors:
+            for adgroup in paging.PageFetcher(client, 'AdGroupService').fetch(selectors):
+                self.adgroups[adgroup.id] = adgroup
+
+        self.logger.info('fetched %d adgroups' % (len(self.adgroups)))
+
+    def _selector(self, predicates):
+        return {
             'fields': [
                 'Id',
                 'CampaignId',
@@ -47,48 +69,25 @@ class AdGroups:
                 'BaseAdGroupId',
                 'TrackingUrlTemplate'
             ],
-            'predicates': {
+            'predicates': [{
                 'field': 'Status',
                 'operator': 'IN',
                 'values': ['ENABLED', 'PAUSED', 'REMOVED']
-            },
-            'paging': {
-                'startIndex': str(offset),
-                'numberResults': str(PAGE_SIZE)
-            }
+            }] + predicates,
         }
 
-        gads_service = client.GetService(
-            'AdGroupService', version='v201607')
-        self.adgroups= {}
-            
-        more_pages = True
-        while more_pages:
-            page = gads_service.get(selector)
-            if 'entries' in page:
-                for adgroup in page['entries']:
-                    self.adgroups[adgroup.id] = adgroup
-                    
-            offset += PAGE_SIZE
-            selector['paging']['startIndex'] = str(offset)
-            more_pages = offset < int(page['totalNumEntries'])
-
-        self.logger.info('fetched %d adgroups' % (len(self.adgroups)))
-
     def dump(self, session):
-        labels = session.query(model.Label).all()
-        labels = {x.id:x for x in labels}
-        ormadgroups = session.query(model.AdGroup).\
-                      join(model.Campaign).\
-                      filter(model.Campaign.accountId == self.accountId).all()
-        ormadgroups = {x.id:x for x in ormadgroups}
-        new_adgroups = []
-        for adgroupid, adgroup in self.adgroups.items():
-            if adgroupid in ormadgroups:
-                ormadgroups[adgroupid].update(adgroup)
-            else:
-                new_adgroups.append(model.AdGroup(adgroup, session_labels=labels))
+        sync_labels(session, self.adgroups.values())
+
+        rows = [model.AdGroup(adgroup, session_labels=None).to_row()
+                for adgroup in self.adgroups.values()]
+        bulk_upsert(session, model.AdGroup.__table__, rows)
 
-        self.logger.info('adding %d new adgroups' % len(new_adgroups))
-        session.add_all(new_adgroups)
-        session.commit()
+        existing = sqa.select([model.adgroup_labels.c.adgroupId,
+                               model.adgroup_labels.c.labelId]).\
+                   select_from(model.adgroup_labels.\
+                               join(model.AdGroup.__table__).\
+                               join(model.Campaign.__table__)).\
+                   where(model.Campaign.accountId == self.accountId)
+        sync_label_associations(session, model.adgroup_labels, 'adgroupId',
+                                self.adgroups, existing)
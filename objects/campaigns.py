@@ -21,12 +21,13 @@
     along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from googleads import adwords
 from objects import model
+from objects.labels import sync_labels, sync_label_associations
+from objects.upsert import bulk_upsert
+from objects.paging import PageFetcher
+import sqlalchemy as sqa
 import logging
 
-PAGE_SIZE = 9000
-
 class Campaigns:
     def __init__(self, accountId):
         self.campaigns = {}
@@ -35,7 +36,6 @@ class Campaigns:
         
     def load(self, client):
         # Construct selector to get all accounts.
-        offset = 0
         selector = {
             'fields': [
                 'Id',
@@ -60,10 +60,6 @@ class Campaigns:
                 'UrlCustomParameters',
                 #'VanityPharma'
             ],
-            'paging': {
-                'startIndex': str(offset),
-                'numberResults': str(PAGE_SIZE)
-            },
             'predicates': {
                 'field': 'Status',
                 'operator': 'IN',
@@ -71,44 +67,21 @@ class Campaigns:
             }
         }
 
-        gads_service = client.GetService(
-            'CampaignService', version='v201607')
-            
-        more_pages = True
-        while more_pages:
-            page = gads_service.get(selector)
-            if 'entries' in page:
-                for campaign in page['entries']:
-                    self.campaigns[campaign.id] = campaign
-                        
-            offset += PAGE_SIZE
-            selector['paging']['startIndex'] = str(offset)
-            more_pages = offset < int(page['totalNumEntries'])
+        for campaign in PageFetcher(client, 'CampaignService').fetch(selector):
+            self.campaigns[campaign.id] = campaign
 
         self.logger.info('fetched %d campaigns' % (len(self.campaigns)))
             
     def dump(self, session):
-        ormcms = session.query(model.Campaign).filter(model.Campaign.accountId == self.accountId).all()
-        ormcms = {x.id:x for x in ormcms}
-        labels = session.query(model.Label).all()
-        labels = {x.id:x for x in labels}
-        new_ormcms = []
-        new_cms_count = 0
-        for cm in self.campaigns.values():
-            if cm.id in ormcms:
-                ormcms[cm.id].update(cm,
-                                     const_attrs = {'accountId': self.accountId},
-                                     session_labels = labels)
-            else:
-                new_ormcms.append(model.Campaign(cm, self.accountId, session_labels = labels))
-                self.logger.debug('new campaign: %s' % cm)
-                new_cms_count += 1
+        sync_labels(session, self.campaigns.values())
 
-        self.logger.info('found %d new campaigns' % (new_cms_count))
-        for label in labels.values():
-            session.merge(label)
-        session.commit()
-            
-        session.add_all(new_ormcms)
-        session.commit()
+        rows = [model.Campaign(cm, self.accountId, session_labels=None).to_row()
+                for cm in self.campaigns.values()]
+        bulk_upsert(session, model.Campaign.__table__, rows)
 
+        existing = sqa.select([model.campaign_labels.c.campaignId,
+                               model.campaign_labels.c.labelId]).\
+                   select_from(model.campaign_labels.join(model.Campaign.__table__)).\
+                   where(model.Campaign.accountId == self.accountId)
+        sync_label_associations(session, model.campaign_labels, 'campaignId',
+                                self.campaigns, existing)
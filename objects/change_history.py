@@ -0,0 +1,88 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from objects.services import get
+import datetime
+import logging
+
+# CustomerSyncService only reports changes of the last 90 days.
+MAX_HISTORY_DAYS = 90
+CAMPAIGNS_PER_REQUEST = 1000
+
+UNCHANGED = 'FIELDS_UNCHANGED'
+NEW = 'NEW'
+
+
+class ChangeHistory:
+    """
+    asks CustomerSyncService which campaigns and adgroups of an account
+    changed in a given time range.
+    """
+    def __init__(self, accountId):
+        self.accountId = accountId
+        self.changed_campaigns = set()
+        self.new_campaigns = set()
+        self.changed_adgroups = set()
+        self.changed_criteria_adgroups = set()
+        self.logger = logging.getLogger('googleads')
+
+    @staticmethod
+    def format_time(t):
+        return t.strftime('%Y%m%d %H%M%S') + ' UTC'
+
+    def load(self, client, campaign_ids, since, until=None):
+        """
+        since and until are naive UTC datetimes.
+        """
+        if until is None:
+            until = datetime.datetime.utcnow()
+        campaign_ids = sorted(campaign_ids)
+        for i in range(0, len(campaign_ids), CAMPAIGNS_PER_REQUEST):
+            selector = {
+                'dateTimeRange': {
+                    'min': self.format_time(since),
+                    'max': self.format_time(until)
+                },
+                'campaignIds': campaign_ids[i:i + CAMPAIGNS_PER_REQUEST]
+            }
+            changes = get(client, 'CustomerSyncService', selector)
+            if changes is None or not hasattr(changes, 'changedCampaigns'):
+                continue
+            for campaign in changes.changedCampaigns:
+                if campaign.campaignChangeStatus == NEW:
+                    self.new_campaigns.add(campaign.campaignId)
+                if campaign.campaignChangeStatus != UNCHANGED:
+                    self.changed_campaigns.add(campaign.campaignId)
+                for adgroup in getattr(campaign, 'changedAdGroups', []):
+                    if adgroup.adGroupChangeStatus != UNCHANGED:
+                        self.changed_adgroups.add(adgroup.adGroupId)
+                    if (adgroup.adGroupChangeStatus == NEW or
+                        getattr(adgroup, 'changedCriteria', None) or
+                        getattr(adgroup, 'removedCriteria', None)):
+                        self.changed_criteria_adgroups.add(adgroup.adGroupId)
+
+        self.logger.info('changes since %s: %d campaigns, %d adgroups, '
+                         'criteria of %d adgroups' %
+                         (since, len(self.changed_campaigns),
+                          len(self.changed_adgroups),
+                          len(self.changed_criteria_adgroups)))
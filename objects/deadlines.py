@@ -0,0 +1,202 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger('googleads')
+
+# seconds an API call, the download of a report chunk and the processing of
+# an account may take, 0 for no limit, and the retries of a call over its
+# deadline; main.py's --call-timeout, --chunk-timeout, --account-timeout
+# and --retries override them.
+CALL_TIMEOUT = 300
+CHUNK_TIMEOUT = 1800
+ACCOUNT_TIMEOUT = 14400
+RETRIES = 2
+
+_local = threading.local()
+
+
+class CallTimeout(TimeoutError):
+    """
+    a call which went over its own deadline. It's an OSError, so that a
+    report download over its deadline is split and recorded as a gap like
+    the other network timeouts.
+    """
+
+
+class DeadlineExceeded(Exception):
+    """
+    the deadline of a unit enclosing the call, e.g. the account, is over:
+    the unit is given up, not retried.
+    """
+    def __init__(self, deadline):
+        super().__init__('%s went over its deadline of %gs' %
+                         (deadline.name, deadline.seconds))
+        self.deadline = deadline
+
+
+# the errors after which a call may still be running on its service
+TIMEOUTS = (CallTimeout, DeadlineExceeded)
+
+
+def configure(call=None, chunk=None, account=None, retries=None):
+    """
+    sets the deadlines and retries of the whole process. The clients of
+    runner.clients made afterwards give their transports the call
+    deadline as their timeout, which ends the calls given up on.
+    """
+    global CALL_TIMEOUT, CHUNK_TIMEOUT, ACCOUNT_TIMEOUT, RETRIES
+    if call is not None:
+        CALL_TIMEOUT = call
+    if chunk is not None:
+        CHUNK_TIMEOUT = chunk
+    if account is not None:
+        ACCOUNT_TIMEOUT = account
+    if retries is not None:
+        RETRIES = retries
+
+
+class Deadline(object):
+    def __init__(self, seconds, name):
+        self.seconds = seconds
+        self.name = name
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+
+def _enclosing():
+    return getattr(_local, 'deadlines', [])
+
+
+@contextlib.contextmanager
+def deadline(seconds, name):
+    """
+    the calls made by this thread within the block don't wait past the
+    given number of seconds from now, and fail with DeadlineExceeded once
+    they're over; 0 or None for no deadline.
+    """
+    if not seconds:
+        yield None
+        return
+    d = Deadline(seconds, name)
+    deadlines = _local.__dict__.setdefault('deadlines', [])
+    deadlines.append(d)
+    try:
+        yield d
+    finally:
+        deadlines.remove(d)
+
+
+def propagate(fn):
+    """
+    fn, to be run by another thread under the deadlines of this one.
+    """
+    enclosing = list(_enclosing())
+    def run(*args, **kwargs):
+        previous = _enclosing()
+        _local.deadlines = list(enclosing)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.deadlines = previous
+    return run
+
+
+def check():
+    """
+    raises DeadlineExceeded if a deadline of the thread is over.
+    """
+    for d in _enclosing():
+        if d.remaining() <= 0:
+            raise DeadlineExceeded(d)
+
+
+def given_up():
+    """
+    True in the thread of a call which was given up on: its service may be
+    in the middle of a request, and mustn't be used again.
+    """
+    abandoned = getattr(_local, 'abandoned', None)
+    return abandoned is not None and abandoned.is_set()
+
+
+def _call(fn, args, kwargs, seconds, name):
+    check()
+    wait = seconds or None
+    limiting = None
+    for d in _enclosing():
+        if wait is None or d.remaining() < wait:
+            wait = d.remaining()
+            limiting = d
+    if wait is None:
+        return fn(*args, **kwargs)
+
+    # python can't interrupt a thread: the call runs in one of its own,
+    # which is left behind if it's over, until its transport times out
+    result = {}
+    done = threading.Event()
+    abandoned = threading.Event()
+    def run():
+        _local.abandoned = abandoned
+        try:
+            result['value'] = fn(*args, **kwargs)
+        except BaseException as e:
+            result['error'] = e
+        finally:
+            done.set()
+    threading.Thread(target=run, name=name, daemon=True).start()
+    if not done.wait(wait):
+        abandoned.set()
+        if limiting is not None:
+            raise DeadlineExceeded(limiting)
+        raise CallTimeout('%s took more than %gs' % (name, seconds))
+    if 'error' in result:
+        raise result['error']
+    return result['value']
+
+
+def call_with_deadline(fn, *args, seconds=None, retries=None, name=None, **kwargs):
+    """
+    fn(*args, **kwargs), given up with CallTimeout after seconds (default
+    CALL_TIMEOUT) and tried again up to retries times (default RETRIES),
+    or with DeadlineExceeded when a deadline of the thread is over first.
+    """
+    if seconds is None:
+        seconds = CALL_TIMEOUT
+    if retries is None:
+        retries = RETRIES
+    if name is None:
+        name = getattr(fn, '__name__', 'call')
+    for attempt in range(retries + 1):
+        try:
+            return _call(fn, args, kwargs, seconds, name)
+        except CallTimeout as e:
+            if attempt == retries:
+                raise
+            logger.warning('%s, trying again (%d/%d)' % (e, attempt + 1, retries))
@@ -0,0 +1,98 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import logging
+import sqlalchemy as sqa
+
+from objects import model
+
+logger = logging.getLogger('googleads')
+
+
+def get_labels(gobj, attr='labels'):
+    return getattr(gobj, attr, None) or []
+
+
+def sync_labels(session, gobjs, attr='labels'):
+    """
+    makes sure the labels attached to the given objects exist in the label
+    table, with their current attributes.
+    """
+    glabels = {}
+    for gobj in gobjs:
+        for label in get_labels(gobj, attr):
+            glabels[label.id] = label
+    if not glabels:
+        return
+
+    ormlabels = {x.id:x for x in session.query(model.Label).\
+                 filter(model.Label.id.in_(list(glabels.keys())))}
+    for labelId, glabel in glabels.items():
+        if labelId in ormlabels:
+            ormlabels[labelId].fill_from_gobj(glabel)
+        else:
+            session.add(model.Label(glabel))
+    session.commit()
+
+
+def sync_label_associations(session, table, entity_column, gobjs, existing_query,
+                            attr='labels'):
+    """
+    makes the (entity, label) rows of the association table match the
+    labels of the given objects, which are the fetched entities, keyed by
+    their id. existing_query selects the (entity id, label id) pairs in the
+    table, usually those of an account; pairs of entities which were not
+    fetched are left alone. Only the differences are inserted and deleted,
+    each in a single statement. Entities with a composite id give a tuple
+    of columns as entity_column, and are keyed by tuples.
+    """
+    columns = entity_column if isinstance(entity_column, tuple) else (entity_column,)
+    def entity_key(entityId):
+        return entityId if isinstance(entity_column, tuple) else (entityId,)
+
+    desired = set()
+    for entityId, gobj in gobjs.items():
+        for label in get_labels(gobj, attr):
+            desired.add(entity_key(entityId) + (label.id,))
+    fetched = set(entity_key(x) for x in gobjs)
+    existing = set(tuple(x) for x in session.execute(existing_query)
+                   if tuple(x[:-1]) in fetched)
+
+    to_add = desired - existing
+    to_remove = existing - desired
+    if to_add:
+        session.execute(table.insert(),
+                        [dict(zip(columns + ('labelId',), x)) for x in to_add])
+    if to_remove:
+        delete = table.delete().\
+                 where(table.c.labelId == sqa.bindparam('oldLabelId'))
+        for i, column in enumerate(columns):
+            delete = delete.where(table.c[column] == sqa.bindparam('entity%d' % i))
+        session.execute(
+            delete,
+            [dict([('entity%d' % i, y) for i, y in enumerate(x[:-1])] +
+                  [('oldLabelId', x[-1])])
+             for x in to_remove])
+    session.commit()
+    logger.info('%s: %d label associations added, %d removed' %
+                (table.name, len(to_add), len(to_remove)))
@@ -0,0 +1,121 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import logging
+import threading
+import sqlalchemy as sqa
+
+from objects import model
+
+logger = logging.getLogger('googleads')
+
+# the ids are small integers
+MAX_ID = 32767
+
+
+class LookupCache(object):
+    """
+    the (field, value) -> id mapping of the lookup table, kept in memory and
+    shared by the threads of the process. New values are inserted in their
+    own transaction, so their ids stay valid whatever happens to the
+    transaction of the report being loaded.
+    """
+    def __init__(self):
+        self.ids = None
+        self.lock = threading.Lock()
+
+    def load(self, connection):
+        table = model.Lookup.__table__
+        self.ids = dict(((field, value), id_) for id_, field, value in
+                        connection.execute(sqa.select([table.c.id, table.c.field,
+                                                       table.c.value])))
+
+    def add(self, engine, field, values):
+        """
+        inserts the values of the field not in the table yet. Another
+        process may insert the same values or ids meanwhile, in which case
+        the mapping is reloaded and the insert retried.
+        """
+        table = model.Lookup.__table__
+        for attempt in range(3):
+            missing = sorted(x for x in values if (field, x) not in self.ids)
+            if not missing:
+                return
+            next_id = max(self.ids.values()) + 1 if self.ids else 1
+            if next_id + len(missing) > MAX_ID:
+                raise ValueError('the lookup table is full, %d values' % len(self.ids))
+            rows = [{'id': next_id + i, 'field': field, 'value': x}
+                    for i, x in enumerate(missing)]
+            try:
+                with engine.begin() as connection:
+                    connection.execute(table.insert(), rows)
+            except sqa.exc.IntegrityError:
+                logger.info('lookup values of %s inserted concurrently, reloading' % field)
+                with engine.connect() as connection:
+                    self.load(connection)
+                continue
+            for row in rows:
+                self.ids[(field, row['value'])] = row['id']
+            logger.info('added %d lookup values of %s' % (len(rows), field))
+            return
+        raise RuntimeError('could not add the lookup values of %s' % field)
+
+    def get_ids(self, engine, field, values):
+        """
+        returns the value -> id dict of the given values of the field,
+        adding the new ones to the lookup table.
+        """
+        with self.lock:
+            if self.ids is None:
+                with engine.connect() as connection:
+                    self.load(connection)
+            if any((field, x) not in self.ids for x in values):
+                self.add(engine, field, values)
+            return dict((x, self.ids[(field, x)]) for x in values)
+
+
+lookup_cache = LookupCache()
+
+
+class LookupEncoder(object):
+    """
+    replaces the values of the encoded fields of report rows, in the order
+    of the given columns, with their lookup ids.
+    """
+    def __init__(self, ormType, columns):
+        self.positions = [(columns.index(x), x) for x in ormType.encoded_fields
+                          if x in columns]
+
+    def encode(self, session, rows):
+        if not self.positions or not rows:
+            return rows
+        engine = session.get_bind()
+        encoded = [list(x) for x in rows]
+        for position, field in self.positions:
+            values = set(x[position] for x in rows)
+            values.discard(None)
+            ids = lookup_cache.get_ids(engine, field, values)
+            ids[None] = None
+            for row in encoded:
+                row[position] = ids[row[position]]
+        return encoded
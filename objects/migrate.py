@@ -0,0 +1,183 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import logging
+import sqlalchemy as sqa
+
+from objects import model
+from objects import serialize
+
+logger = logging.getLogger('googleads')
+
+
+def create_missing_indexes(engine, tables=None):
+    """
+    creates the indexes declared in the model, or on the given tables, which
+    don't exist in the database yet. create_all only creates the indexes of
+    new tables. Returns the names of the created indexes.
+    """
+    if tables is None:
+        tables = model.Base.metadata.sorted_tables
+    inspector = sqa.inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    for table in tables:
+        if table.name not in existing_tables:
+            continue
+        existing = set(x['name'] for x in inspector.get_indexes(table.name))
+        for index in sorted(table.indexes, key=lambda x: x.name):
+            if index.name in existing:
+                continue
+            logger.info('creating index %s on %s' % (index.name, table.name))
+            index.create(engine)
+            created.append(index.name)
+    return created
+
+
+def decoded_columns(ormType, columns=None):
+    """
+    the given columns (default all, but the version) of a report table,
+    with the ids of its encoded fields replaced by their lookup values
+    under the name of the field, and the join of the table with the lookups
+    to select them from.
+    """
+    table = ormType.__table__
+    if columns is None:
+        columns = [x for x in table.columns if x.name != '_lastUpdated']
+    source = table
+    selected = []
+    for column in columns:
+        if column.name not in ormType.encoded_fields:
+            selected.append(column)
+            continue
+        lookup = model.Lookup.__table__.alias('lookup_%s' % column.name)
+        source = source.outerjoin(lookup, lookup.c.id == column)
+        selected.append(lookup.c.value.label(column.name))
+    return selected, source
+
+
+def decoded_select(ormType, columns=None):
+    selected, source = decoded_columns(ormType, columns)
+    return sqa.select(selected).select_from(source)
+
+
+def create_views(engine):
+    """
+    (re)creates, for each report table with encoded fields, a view named
+    like the table was before encoding, with the string values of the
+    fields, so that the queries written for the plain tables keep working.
+    A view isn't created over an existing plain table of that name.
+    Returns the names of the views.
+    """
+    tables = set(sqa.inspect(engine).get_table_names())
+    created = []
+    for ormType in model.REPORT_MODELS.values():
+        if not ormType.encoded_fields:
+            continue
+        name = ormType.report_definition.table_name
+        if name in tables:
+            logger.warning('%s is a table, not creating the view of %s over it' %
+                           (name, ormType.__tablename__))
+            continue
+        select = decoded_select(ormType).compile(
+            engine, compile_kwargs={'literal_binds': True})
+        with engine.begin() as connection:
+            connection.execute('DROP VIEW IF EXISTS %s' % name)
+            connection.execute('CREATE VIEW %s AS %s' % (name, select))
+        logger.info('created view %s of %s' % (name, ormType.__tablename__))
+        created.append(name)
+    return created
+
+
+LIST_COLUMNS = ('criterion_pathlist', 'criterion_criteriaSamplelist',
+                'disapprovalReasonlist')
+
+
+def convert_criterion_lists(engine, batch_size=5000):
+    """
+    rewrites the list columns of the criteria still holding the str() of
+    the lists, as they were stored before, in their JSON form. The values
+    which can't be parsed back are left alone. The rows are read in
+    batches, in the order of their key, so that memory doesn't grow with
+    the table. Returns the number of converted values.
+    """
+    table = model.AdGroupCriterion.__table__
+    adGroupId, criterionId = table.c.adGroupId, table.c.criterion_id
+    converted = 0
+    for name in LIST_COLUMNS:
+        column = table.c[name]
+        # the JSON values: [], arrays of strings and arrays of objects. The
+        # brackets are escaped, since MSSQL reads [ as a character class.
+        legacy = sqa.and_(column.isnot(None), column != '[]',
+                          sqa.not_(column.like('/["%', escape='/')),
+                          sqa.not_(column.like('/[{%', escape='/')))
+        update = table.update().where(sqa.and_(
+            adGroupId == sqa.bindparam('_adGroupId'),
+            criterionId == sqa.bindparam('_criterion_id')))
+        found = 0
+        failed = 0
+        last = None
+        while True:
+            select = sqa.select([adGroupId, criterionId, column]).where(legacy)
+            if last is not None:
+                select = select.where(sqa.or_(
+                    adGroupId > last[0],
+                    sqa.and_(adGroupId == last[0], criterionId > last[1])))
+            select = select.order_by(adGroupId, criterionId).limit(batch_size)
+            with engine.connect() as connection:
+                rows = connection.execute(select).fetchall()
+            if not rows:
+                break
+            last = rows[-1][:2]
+            found += len(rows)
+            values = []
+            for rowAdGroupId, rowCriterionId, value in rows:
+                v = serialize.legacy_to_json(value)
+                if v is None:
+                    failed += 1
+                    continue
+                values.append({'_adGroupId': rowAdGroupId,
+                               '_criterion_id': rowCriterionId, name: v})
+            if values:
+                with engine.begin() as connection:
+                    connection.execute(update, values)
+            converted += len(values)
+        if found:
+            logger.info('converted %d values of %s to JSON, %d left as they were' %
+                        (found - failed, name, failed))
+    return converted
+
+
+def migrate(engine):
+    """
+    brings an existing database up to date with the model: creates the
+    missing tables, the missing indexes of the existing ones, and the views
+    of the encoded report tables, and converts the list columns of the
+    criteria to JSON.
+    """
+    model.Base.metadata.create_all(engine)
+    created = create_missing_indexes(engine)
+    views = create_views(engine)
+    converted = convert_criterion_lists(engine)
+    logger.info('migration done, %d indexes and %d views created, %d lists converted' %
+                (len(created), len(views), converted))
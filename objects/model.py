@@ -28,6 +28,10 @@ import sqlalchemy.orm
 import datetime
 import logging
 
+from objects import report_registry
+from objects import serialize
+from reports.parsing import converter_for
+
 Base = sqa.ext.declarative.declarative_base()
 
 class Versioned(object):
@@ -46,6 +50,14 @@ class MyBase(object):
         rep = '\n'.join(['%s\t%s' % (x, y) for x, y in rep.items()])
         return('%s\n%s\n' % (self.__class__, rep))
 
+    def to_row(self):
+        """
+        the column values of the object, as written by bulk_upsert; the
+        version column is left to the database.
+        """
+        return {x: getattr(self, x) for x in self.__mapper__.column_attrs.keys()
+                if x != '_lastUpdated'}
+
     def fill_from_gobj(self, gobj, const_attrs={}, prefix=''):
         processed_prefixes = set()
         attrs = [x for x in self.__class__.__mapper__.column_attrs.keys() if x.strip('_') == x]
@@ -84,7 +96,11 @@ class MyBase(object):
 
     def update_labels(self, gobj, session_labels):
         if hasattr(gobj, 'labels'):
+            attached = set(x.id for x in self.labels)
             for label in gobj.labels:
+                if label.id in attached:
+                    continue
+                attached.add(label.id)
                 if label.id in session_labels:
                     self.labels.append(session_labels[label.id])
                 else:
@@ -291,7 +307,7 @@ class AdGroupCriterion(Base, MyBase, Versioned):
     firstPositionCpc_amount_microAmount = sqa.Column(sqa.BigInteger)
     bidModifier = sqa.Column(sqa.Float)
     trackingTemplate = sqa.Column(sqa.NVARCHAR(500))
-    # these are lists actually, but here we keep them as a string for convenience.
+    # these are lists actually, but here we keep them as their JSON for convenience.
     # therefore they have to be set exclusively in the __init__ and update functions
     criterion_pathlist = sqa.Column(sqa.NVARCHAR(None)) #criterion.path
     criterion_criteriaSamplelist = sqa.Column(sqa.NVARCHAR(None)) #criterion.critariaSamples
@@ -307,300 +323,229 @@ class AdGroupCriterion(Base, MyBase, Versioned):
         if hasattr(gobj, 'criterion'):
             criterion = gobj.criterion
             if hasattr(criterion, 'path'):
-                self.criterion_pathlist = str(criterion.path)
+                self.set_list('criterion_pathlist', criterion.path)
             if hasattr(criterion, 'criteriaSamples'):
-                self.criterion_criteriaSamplelist = str(criterion.criteriaSamples)
+                self.set_list('criterion_criteriaSamplelist', criterion.criteriaSamples)
         if hasattr(gobj, 'disapprovalReasons'):
-            self.disapprovalReasonlist = str(gobj.disapprovalReasons)
+            self.set_list('disapprovalReasonlist', gobj.disapprovalReasons)
 
         return self
 
+    def set_list(self, attr, values):
+        # canonical JSON, so that an unchanged list compares equal
+        v = serialize.dumps(values)
+        if v is not None:
+            # see fill_from_gobj about the characters pyodbc can't handle
+            v = ''.join([x for x in v if ord(x) < 65536])
+        if getattr(self, attr) != v:
+            setattr(self, attr, v)
+
     def __init__(self, gobj, session_labels):
         self.update(gobj, session_labels=session_labels)
 
 
-class ReportBase(object):
-    AdNetworkType1 = sqa.Column(sqa.NVARCHAR(50), primary_key = True)
-    AdNetworkType2 = sqa.Column(sqa.NVARCHAR(50), primary_key = True)
-    Date = sqa.Column(sqa.Date, primary_key = True)
-    Device = sqa.Column(sqa.NVARCHAR(50), primary_key = True)
-    ActiveViewCpm = sqa.Column(sqa.BigInteger)
-    ActiveViewCtr = sqa.Column(sqa.Float)
-    ActiveViewImpressions = sqa.Column(sqa.BigInteger)
-    ActiveViewMeasurability = sqa.Column(sqa.Float)
-    ActiveViewMeasurableCost = sqa.Column(sqa.BigInteger)
-    ActiveViewMeasurableImpressions = sqa.Column(sqa.BigInteger)
-    ActiveViewViewability = sqa.Column(sqa.Float)
-    AverageCost = sqa.Column(sqa.BigInteger)
-    AverageCpc = sqa.Column(sqa.BigInteger)
-    AverageCpe = sqa.Column(sqa.Float)
-    AverageCpm = sqa.Column(sqa.BigInteger)
-    AverageCpv = sqa.Column(sqa.Float)
-    AveragePosition = sqa.Column(sqa.Float)
-    Clicks = sqa.Column(sqa.BigInteger)
-    Cost = sqa.Column(sqa.BigInteger)
-    Ctr = sqa.Column(sqa.Float)
-    EngagementRate = sqa.Column(sqa.Float)
-    Engagements = sqa.Column(sqa.BigInteger)
-    Impressions = sqa.Column(sqa.BigInteger)
-    InteractionRate = sqa.Column(sqa.Float)
-    Interactions = sqa.Column(sqa.BigInteger)
-    InteractionTypes = sqa.Column(sqa.NVARCHAR(500))
-    VideoViewRate = sqa.Column(sqa.Float)
-    VideoViews = sqa.Column(sqa.BigInteger)
-
-    logger = logging.getLogger('googleads')
-
-    def update(self, fields, values):
-        for field, value in zip(fields, values):
-            #self.logger.debug('processing field %s\t%s' % (field, value))
-            value = value.strip('"')
-            if value.strip() == '--':
-                continue
-            if hasattr(self.__class__, field):
-                ftype = getattr(self.__class__, field).property.columns[0].type
-                if isinstance(ftype, sqa.BigInteger):
-                    value = value.lower().strip()
-                    if value.startswith('auto'):
-                        setattr(self, field+'AutoPrefix', True)
-                        value.strip('auto:')
-                    if value != '':
-                        setattr(self, field, int(value))
-                if isinstance(ftype, sqa.Integer):
-                    setattr(self, field, int(value))
-                elif isinstance(ftype, sqa.Float):
-                    setattr(self, field, float(value.strip('%>< ')))
-                elif isinstance(ftype, sqa.Boolean):
-                    setattr(self, field, value.lower().startswith('tr'))
-                else:
-                    if isinstance(value, str):
-                        value = ''.join([x for x in value if ord(x) < 65536])
-                    setattr(self, field, value)
-
-class AccountPerformance(Base, ReportBase, Versioned):
-    __tablename__ = 'gads_sqa_account_performance'
-
-    ExternalCustomerId = sqa.Column(sqa.BigInteger,
-                                    sqa.ForeignKey('gads_sqa_account.customerId'),
-                                    autoincrement = False,
-                                    primary_key = True)
-
-    ContentBudgetLostImpressionShare = sqa.Column(sqa.Float)
-    ContentImpressionShare = sqa.Column(sqa.Float)
-    ContentRankLostImpressionShare = sqa.Column(sqa.Float)
-    InvalidClickRate = sqa.Column(sqa.Float)
-    InvalidClicks = sqa.Column(sqa.BigInteger)
-    SearchBudgetLostImpressionShare = sqa.Column(sqa.Float)
-    SearchExactMatchImpressionShare = sqa.Column(sqa.Float)
-    SearchImpressionShare = sqa.Column(sqa.Float)
-    SearchRankLostImpressionShare = sqa.Column(sqa.Float)
-
-    def __init__(self, fields, values):
-        self.update(fields, values)
-
+class AccountRunStat(Base, MyBase):
+    """
+    bookkeeping of the last run of each account, used by the scheduler to
+    estimate how long an account takes to process.
+    """
+    __tablename__ = 'gads_sqa_account_runstat'
 
-class CampaignPerformance(Base, ReportBase, Versioned):
-    __tablename__ = 'gads_sqa_campaign_performance'
-
-    ExternalCustomerId = sqa.Column(sqa.BigInteger,
-                                    sqa.ForeignKey('gads_sqa_account.customerId'),
-                                    autoincrement = False,
-                                    primary_key = True)
-    CampaignId = sqa.Column(sqa.BigInteger,
-                            sqa.ForeignKey('gads_sqa_campaign.id'),
-                            autoincrement = False,
-                            primary_key = True)
-
-    AdvertisingChannelSubType = sqa.Column(sqa.NVARCHAR(100), primary_key = True, default = 'na')
-    AdvertisingChannelType = sqa.Column(sqa.NVARCHAR(100), primary_key = True)
-    Amount = sqa.Column(sqa.BigInteger)
-    BiddingStrategyId = sqa.Column(sqa.BigInteger)
-    BiddingStrategyName = sqa.Column(sqa.NVARCHAR(500))
-    BiddingStrategyType = sqa.Column(sqa.NVARCHAR(100))
-    BidType = sqa.Column(sqa.NVARCHAR(100))
-    BudgetId = sqa.Column(sqa.BigInteger)
-    CampaignDesktopBidModifier = sqa.Column(sqa.Float)
-    CampaignMobileBidModifier = sqa.Column(sqa.Float)
-    CampaignTabletBidModifier = sqa.Column(sqa.Float)
-    CampaignTrialType = sqa.Column(sqa.NVARCHAR(50))
-    ContentBudgetLostImpressionShare = sqa.Column(sqa.Float)
-    ContentImpressionShare = sqa.Column(sqa.Float)
-    ContentRankLostImpressionShare = sqa.Column(sqa.Float)
-    EnhancedCpcEnabled = sqa.Column(sqa.Boolean)
-    EnhancedCpvEnabled = sqa.Column(sqa.Boolean)
-    GmailForwards = sqa.Column(sqa.BigInteger)
-    GmailSaves = sqa.Column(sqa.BigInteger)
-    GmailSecondaryClicks = sqa.Column(sqa.BigInteger)
-    IsBudgetExplicitlyShared = sqa.Column(sqa.Boolean)
-    InvalidClickRate = sqa.Column(sqa.Float)
-    InvalidClicks = sqa.Column(sqa.BigInteger)
-    SearchBudgetLostImpressionShare = sqa.Column(sqa.Float)
-    SearchExactMatchImpressionShare = sqa.Column(sqa.Float)
-    SearchImpressionShare = sqa.Column(sqa.Float)
-    SearchRankLostImpressionShare = sqa.Column(sqa.Float)
+    accountId = sqa.Column(sqa.BigInteger,
+                           sqa.ForeignKey('gads_sqa_account.customerId'),
+                           autoincrement = False,
+                           primary_key = True)
+    lastStarted = sqa.Column(sqa.DateTime)
+    lastDuration = sqa.Column(sqa.Float)
+    lastRowCount = sqa.Column(sqa.BigInteger)
 
 
-    def __init__(self, fields, values):
-        self.update(fields, values)
+class EntitySync(Base, MyBase):
+    """
+    when the campaigns, adgroups and criteria of an account were last
+    synced, incrementally or fully. Times are in UTC.
+    """
+    __tablename__ = 'gads_sqa_entity_sync'
 
-class AdGroupPerformance(Base, ReportBase, Versioned):
-    __tablename__ = 'gads_sqa_adgroup_performance'
-
-    ExternalCustomerId = sqa.Column(sqa.BigInteger,
-                                    sqa.ForeignKey('gads_sqa_account.customerId'),
-                                    autoincrement = False,
-                                    primary_key = True)
-    AdGroupId = sqa.Column(sqa.BigInteger,
-                           sqa.ForeignKey('gads_sqa_adgroup.id'),
+    accountId = sqa.Column(sqa.BigInteger,
+                           sqa.ForeignKey('gads_sqa_account.customerId'),
                            autoincrement = False,
                            primary_key = True)
+    lastSync = sqa.Column(sqa.DateTime)
+    lastFullSync = sqa.Column(sqa.DateTime)
 
-    AdGroupDesktopBidModifier = sqa.Column(sqa.Float)
-    AdGroupMobileBidModifier = sqa.Column(sqa.Float)
-    AdGroupTabletBidModifier = sqa.Column(sqa.Float)
-    BiddingStrategyId = sqa.Column(sqa.BigInteger)
-    BiddingStrategyName = sqa.Column(sqa.NVARCHAR(500))
-    BiddingStrategySource = sqa.Column(sqa.NVARCHAR(50))
-    BiddingStrategyType = sqa.Column(sqa.NVARCHAR(100))
-    BidType = sqa.Column(sqa.NVARCHAR(100))
-    ContentBidCriterionTypeGroup = sqa.Column(sqa.NVARCHAR(50))
-    ContentImpressionShare = sqa.Column(sqa.Float)
-    ContentRankLostImpressionShare = sqa.Column(sqa.Float)
-    CpcBid = sqa.Column(sqa.BigInteger)
-    CpcBidAutoPrefix = sqa.Column(sqa.Boolean)
-    CpmBid = sqa.Column(sqa.BigInteger)
-    CpvBid = sqa.Column(sqa.BigInteger)
-    EnhancedCpcEnabled = sqa.Column(sqa.Boolean)
-    EnhancedCpvEnabled = sqa.Column(sqa.Boolean)
-    GmailForwards = sqa.Column(sqa.BigInteger)
-    GmailSaves = sqa.Column(sqa.BigInteger)
-    GmailSecondaryClicks = sqa.Column(sqa.BigInteger)
-    SearchExactMatchImpressionShare = sqa.Column(sqa.Float)
-    SearchImpressionShare = sqa.Column(sqa.Float)
-    SearchRankLostImpressionShare = sqa.Column(sqa.Float)
-    TargetCpa = sqa.Column(sqa.BigInteger)
-    TargetCpaBidSource = sqa.Column(sqa.NVARCHAR(100))
-
-    def __init__(self, fields, values):
-        self.update(fields, values)
 
+class BackfillProgress(Base, MyBase):
+    """
+    the date partitions of backfills, per account and report, so that an
+    interrupted backfill can be resumed. status is 'pending', 'done' or
+    'failed'.
+    """
+    __tablename__ = 'gads_sqa_backfill_progress'
 
-class CriterionPerformance(Base, ReportBase, Versioned):
-    __tablename__ = 'gads_sqa_criterion_performance'
+    accountId = sqa.Column(sqa.BigInteger,
+                           sqa.ForeignKey('gads_sqa_account.customerId'),
+                           autoincrement = False,
+                           primary_key = True)
+    report = sqa.Column(sqa.NVARCHAR(50), primary_key = True)
+    startDate = sqa.Column(sqa.Date, primary_key = True)
+    endDate = sqa.Column(sqa.Date)
+    status = sqa.Column(sqa.NVARCHAR(20))
+    rowCount = sqa.Column(sqa.BigInteger)
+    updated = sqa.Column(sqa.DateTime)
 
-    ExternalCustomerId = sqa.Column(sqa.BigInteger,
-                                    sqa.ForeignKey('gads_sqa_account.customerId'),
-                                    autoincrement = False,
-                                    primary_key = True)
 
-    CampaignId = sqa.Column(sqa.BigInteger,
-                            sqa.ForeignKey('gads_sqa_campaign.id'),
-                            autoincrement = False,
-                            primary_key = True)
+class ReportGap(Base, MyBase):
+    """
+    days of a report which could not be downloaded, even one day at a time.
+    They are retried on the next run.
+    """
+    __tablename__ = 'gads_sqa_report_gap'
 
-    AdGroupId = sqa.Column(sqa.BigInteger,
-                           sqa.ForeignKey('gads_sqa_adgroup.id'),
+    accountId = sqa.Column(sqa.BigInteger,
+                           sqa.ForeignKey('gads_sqa_account.customerId'),
                            autoincrement = False,
                            primary_key = True)
+    report = sqa.Column(sqa.NVARCHAR(50), primary_key = True)
+    startDate = sqa.Column(sqa.Date, primary_key = True)
+    endDate = sqa.Column(sqa.Date)
+    error = sqa.Column(sqa.NVARCHAR(500))
+    recorded = sqa.Column(sqa.DateTime)
 
-    Id = sqa.Column(sqa.BigInteger, primary_key = True, autoincrement = False)
-
-    __table_args__ = (
-        sqa.ForeignKeyConstraint(
-            ['AdGroupId', 'Id'],
-            ['gads_sqa_adgroupcriterion.adGroupId',
-             'gads_sqa_adgroupcriterion.criterion_id']),
-        )
-
-    BidModifier = sqa.Column(sqa.Float)
-    BidType = sqa.Column(sqa.NVARCHAR(100))
-    CpcBid = sqa.Column(sqa.BigInteger)
-    CpcBidAutoPrefix = sqa.Column(sqa.Boolean)
-    CpcBidSource = sqa.Column(sqa.NVARCHAR(100))
-    CpmBid = sqa.Column(sqa.BigInteger)
-    CpvBid = sqa.Column(sqa.BigInteger)
-    CpvBidSource = sqa.Column(sqa.NVARCHAR(100))
-    CreativeQualityScore = sqa.Column(sqa.NVARCHAR(50))
-    Criteria = sqa.Column(sqa.NVARCHAR(500))
-    EnhancedCpcEnabled = sqa.Column(sqa.Boolean)
-    EnhancedCpvEnabled = sqa.Column(sqa.Boolean)
-    EstimatedAddClicksAtFirstPositionCpc = sqa.Column(sqa.BigInteger)
-    EstimatedAddCostAtFirstPositionCpc = sqa.Column(sqa.BigInteger)
-    FirstPageCpc = sqa.Column(sqa.BigInteger)
-    FirstPageCpcAutoPrefix = sqa.Column(sqa.Boolean)
-    FirstPositionCpc = sqa.Column(sqa.BigInteger)
-    FirstPositionCpcAutoPrefix = sqa.Column(sqa.Boolean)
-    GmailForwards = sqa.Column(sqa.BigInteger)
-    GmailSaves = sqa.Column(sqa.BigInteger)
-    GmailSecondaryClicks = sqa.Column(sqa.BigInteger)
-    HasQualityScore = sqa.Column(sqa.Boolean)
-    PostClickQualityScore = sqa.Column(sqa.NVARCHAR(50))
-    QualityScore = sqa.Column(sqa.Integer)
-    SearchPredictedCtr = sqa.Column(sqa.NVARCHAR(50))
-    TopOfPageCpc = sqa.Column(sqa.BigInteger)
-    TopOfPageCpcAutoPrefix = sqa.Column(sqa.Boolean)
-
-    def __init__(self, fields, values):
-        self.update(fields, values)
 
+class Lookup(Base, MyBase):
+    """
+    the values of the dictionary encoded report fields, shared by all the
+    fields and reports; encoded columns hold their ids.
+    """
+    __tablename__ = report_registry.LOOKUP_TABLE
 
-class KeywordPerformance(Base, ReportBase, Versioned):
-    __tablename__ = 'gads_sqa_keyword_performance'
+    id = sqa.Column(sqa.SmallInteger, primary_key = True, autoincrement = False)
+    field = sqa.Column(sqa.NVARCHAR(100))
+    value = sqa.Column(sqa.NVARCHAR(500))
 
-    ExternalCustomerId = sqa.Column(sqa.BigInteger,
-                                    sqa.ForeignKey('gads_sqa_account.customerId'),
-                                    autoincrement = False,
-                                    primary_key = True)
+    __table_args__ = (sqa.UniqueConstraint('field', 'value'),)
 
-    CampaignId = sqa.Column(sqa.BigInteger,
-                            sqa.ForeignKey('gads_sqa_campaign.id'),
-                            autoincrement = False,
-                            primary_key = True)
 
-    AdGroupId = sqa.Column(sqa.BigInteger,
-                           sqa.ForeignKey('gads_sqa_adgroup.id'),
-                           autoincrement = False,
-                           primary_key = True)
-
-    Id = sqa.Column(sqa.BigInteger, primary_key = True, autoincrement = False)
-
-    #__table_args__ = (
-    #    sqa.ForeignKeyConstraint(
-    #        ['AdGroupId', 'Id'],
-    #        ['gads_sqa_adgroupcriterion.adGroupId',
-    #         'gads_sqa_adgroupcriterion.criterion_id']),
-    #    )
-
-    BiddingStrategyId = sqa.Column(sqa.BigInteger)
-    BiddingStrategyName = sqa.Column(sqa.NVARCHAR(500))
-    BiddingStrategySource = sqa.Column(sqa.NVARCHAR(50))
-    BiddingStrategyType = sqa.Column(sqa.NVARCHAR(50))
-    BidType = sqa.Column(sqa.NVARCHAR(100))
-    CpcBid = sqa.Column(sqa.BigInteger)
-    CpcBidAutoPrefix = sqa.Column(sqa.Boolean)
-    CpcBidSource = sqa.Column(sqa.NVARCHAR(100))
-    CpmBid = sqa.Column(sqa.BigInteger)
-    CreativeQualityScore = sqa.Column(sqa.NVARCHAR(50))
-    Criteria = sqa.Column(sqa.NVARCHAR(500))
-    EnhancedCpcEnabled = sqa.Column(sqa.Boolean)
-    EstimatedAddClicksAtFirstPositionCpc = sqa.Column(sqa.BigInteger)
-    EstimatedAddCostAtFirstPositionCpc = sqa.Column(sqa.BigInteger)
-    FirstPageCpc = sqa.Column(sqa.BigInteger)
-    FirstPageCpcAutoPrefix = sqa.Column(sqa.Boolean)
-    FirstPositionCpc = sqa.Column(sqa.BigInteger)
-    FirstPositionCpcAutoPrefix = sqa.Column(sqa.Boolean)
-    GmailForwards = sqa.Column(sqa.BigInteger)
-    GmailSaves = sqa.Column(sqa.BigInteger)
-    GmailSecondaryClicks = sqa.Column(sqa.BigInteger)
-    HasQualityScore = sqa.Column(sqa.Boolean)
-    PostClickQualityScore = sqa.Column(sqa.NVARCHAR(50))
-    QualityScore = sqa.Column(sqa.Integer)
-    SearchExactMatchImpressionShare = sqa.Column(sqa.Float)
-    SearchImpressionShare = sqa.Column(sqa.Float)
-    SearchPredictedCtr = sqa.Column(sqa.NVARCHAR(50))
-    SearchRankLostImpressionShare = sqa.Column(sqa.Float)
-    TopOfPageCpc = sqa.Column(sqa.BigInteger)
-    TopOfPageCpcAutoPrefix = sqa.Column(sqa.Boolean)
+class ReportBase(object):
+    """
+    base of the performance report tables. Their columns are generated from
+    the definitions in report_registry, minus the excluded fields.
+    """
+    logger = logging.getLogger('googleads')
 
     def __init__(self, fields, values):
         self.update(fields, values)
+
+    def update(self, fields, values):
+        converter = converter_for(self.__class__, tuple(fields))
+        for column, value in zip(converter.columns, converter.convert_values(values)):
+            if value is not None:
+                setattr(self, column, value)
+
+
+def report_model(definition, excluded=(), encoded=False):
+    """
+    creates the mapped class of a performance report table from its
+    definition. Only the fields not excluded become columns; the AWQL
+    field list to download is kept in the class' report_fields attribute.
+
+    With encoded, the encodable fields are stored as ids of the lookup
+    table, listed in encoded_fields, and the table is named
+    <table>_encoded; migrate creates a view with the original table name
+    and string columns.
+    """
+    fields = definition.active_fields(excluded)
+    table_name = definition.table_name
+    if encoded:
+        table_name += '_encoded'
+    attrs = {
+        '__tablename__': table_name,
+        # declarative's default constructor would otherwise take precedence
+        '__init__': ReportBase.__init__,
+        'report_definition': definition,
+        'report_fields': [x.name for x in fields],
+        'encoded_fields': [x.name for x in fields if encoded and x.encodable],
+    }
+    for field in fields:
+        for name, column in field.columns(encoded=encoded):
+            attrs[name] = column
+    table_args = [sqa.ForeignKeyConstraint(local, remote)
+                  for local, remote in definition.foreign_keys
+                  if all(x in attrs for x in local)]
+    # the primary keys lead with AdNetworkType1, AdNetworkType2, Date and
+    # Device, not with the account; these indexes serve the loader's queries
+    # by account and date, and lookups by entity and date.
+    table_args.append(sqa.Index('ix_%s_customer_date' % table_name,
+                                'ExternalCustomerId', 'Date'))
+    if definition.entity_keys:
+        table_args.append(sqa.Index('ix_%s_entity_date' % table_name,
+                                    *(list(definition.entity_keys) + ['Date'])))
+    attrs['__table_args__'] = tuple(table_args)
+    return type(definition.class_name, (Base, ReportBase, Versioned), attrs)
+
+
+excluded_report_fields = report_registry.load_excluded_fields()
+encoded_reports = report_registry.load_encoded_reports()
+
+AccountPerformance = report_model(report_registry.REPORTS['account'],
+                                  excluded_report_fields['account'],
+                                  'account' in encoded_reports)
+CampaignPerformance = report_model(report_registry.REPORTS['campaign'],
+                                   excluded_report_fields['campaign'],
+                                   'campaign' in encoded_reports)
+AdGroupPerformance = report_model(report_registry.REPORTS['adgroup'],
+                                  excluded_report_fields['adgroup'],
+                                  'adgroup' in encoded_reports)
+CriterionPerformance = report_model(report_registry.REPORTS['criterion'],
+                                    excluded_report_fields['criterion'],
+                                    'criterion' in encoded_reports)
+KeywordPerformance = report_model(report_registry.REPORTS['keyword'],
+                                  excluded_report_fields['keyword'],
+                                  'keyword' in encoded_reports)
+
+REPORT_MODELS = {
+    'account': AccountPerformance,
+    'campaign': CampaignPerformance,
+    'adgroup': AdGroupPerformance,
+    'criterion': CriterionPerformance,
+    'keyword': KeywordPerformance,
+}
+
+
+def rollup_model(source, level):
+    """
+    creates the mapped class of the rollup of a report table at the given
+    level (see report_registry.ROLLUP_LEVELS). Rows are identified by their
+    Grain ('day', 'week' or 'month') and the first day of their period.
+    """
+    definition = source.report_definition
+    attrs = {
+        '__tablename__': 'gads_sqa_%s_%s_rollup' % (definition.name, level),
+        'Grain': sqa.Column(sqa.NVARCHAR(5), primary_key = True),
+        'PeriodStart': sqa.Column(sqa.Date, primary_key = True),
+        'ExternalCustomerId': sqa.Column(sqa.BigInteger,
+                                         autoincrement = False,
+                                         primary_key = True),
+        'rollup_keys': report_registry.ROLLUP_LEVELS[level],
+        'rollup_measures': [x for x in report_registry.ROLLUP_MEASURES
+                            if hasattr(source, x)],
+    }
+    for key in attrs['rollup_keys']:
+        attrs[key] = sqa.Column(sqa.BigInteger, autoincrement = False,
+                                primary_key = True)
+    for measure in attrs['rollup_measures']:
+        attrs[measure] = sqa.Column(sqa.BigInteger)
+    attrs['__table_args__'] = (
+        sqa.Index('ix_%s_customer' % attrs['__tablename__'],
+                  'Grain', 'ExternalCustomerId', 'PeriodStart'),
+    )
+    # e.g. KeywordAdGroupRollup, named after the last key column
+    class_name = '%s%sRollup' % (definition.class_name.replace('Performance', ''),
+                                 attrs['rollup_keys'][-1][:-len('Id')])
+    return type(class_name, (Base, MyBase), attrs)
+
+
+ROLLUP_MODELS = {(name, level): rollup_model(REPORT_MODELS[name], level)
+                 for name in report_registry.ROLLUP_REPORTS
+                 for level in report_registry.ROLLUP_LEVELS}
@@ -0,0 +1,130 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import copy
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from objects.services import get
+from objects.deadlines import propagate
+
+logger = logging.getLogger('googleads')
+
+# entries per page of each service, and ids per IN predicate when only
+# some entities are fetched; main.py's --page-sizes overrides them.
+PAGE_SIZES = {
+    'ManagedCustomerService': 500,
+    'CampaignService': 9000,
+    'AdGroupService': 10000,
+    'AdGroupCriterionService': 10000,
+}
+IDS_PER_REQUEST = 500
+
+# the names of the page sizes on the command line
+SERVICE_NAMES = {
+    'accounts': 'ManagedCustomerService',
+    'campaigns': 'CampaignService',
+    'adgroups': 'AdGroupService',
+    'criteria': 'AdGroupCriterionService',
+}
+
+# pages requested at the same time
+MAX_IN_FLIGHT = 4
+
+
+def configure(page_sizes=None, ids_per_request=None, in_flight=None):
+    """
+    sets the page sizes ({service name: size}), the ids per request and the
+    pages in flight of the whole process.
+    """
+    global IDS_PER_REQUEST, MAX_IN_FLIGHT
+    if page_sizes:
+        PAGE_SIZES.update(page_sizes)
+    if ids_per_request:
+        IDS_PER_REQUEST = ids_per_request
+    if in_flight:
+        MAX_IN_FLIGHT = in_flight
+
+
+def page_selector(selector, start, page_size):
+    res = copy.deepcopy(selector)
+    res['paging'] = {'startIndex': str(start), 'numberResults': str(page_size)}
+    return res
+
+
+class PageFetcher(object):
+    """
+    gets all pages of selectors of a service. The first page of every
+    selector tells its number of entries, after which all the remaining
+    start indexes are known: these pages are requested concurrently, at
+    most in_flight at a time, each with a service of its own from the pool
+    of objects.services.
+    """
+    def __init__(self, client, service_name, version='v201607', page_size=None,
+                 in_flight=None):
+        self.client = client
+        self.service_name = service_name
+        self.version = version
+        self.page_size = page_size or PAGE_SIZES[service_name]
+        self.in_flight = in_flight or MAX_IN_FLIGHT
+
+    def get(self, selector):
+        return get(self.client, self.service_name, selector, self.version)
+
+    def _map(self, selectors):
+        if self.in_flight == 1 or len(selectors) == 1:
+            return [self.get(x) for x in selectors]
+        with ThreadPoolExecutor(max_workers=min(self.in_flight, len(selectors))) as executor:
+            return list(executor.map(propagate(self.get), selectors))
+
+    def fetch_pages(self, selectors):
+        """
+        returns all pages of the selectors, in the order of the selectors
+        and of their pages.
+        """
+        if isinstance(selectors, dict):
+            selectors = [selectors]
+        first_pages = self._map([page_selector(x, 0, self.page_size) for x in selectors])
+
+        rest = []
+        for i, (selector, page) in enumerate(zip(selectors, first_pages)):
+            for start in range(self.page_size, int(page['totalNumEntries']), self.page_size):
+                rest.append((i, page_selector(selector, start, self.page_size)))
+        logger.debug('%s: %d first pages, %d more pages' %
+                     (self.service_name, len(selectors), len(rest)))
+        rest_pages = self._map([x for _, x in rest]) if rest else []
+
+        pages = [[x] for x in first_pages]
+        for (i, _), page in zip(rest, rest_pages):
+            pages[i].append(page)
+        return [x for selector_pages in pages for x in selector_pages]
+
+    def fetch(self, selectors):
+        """
+        returns the entries of all pages of the selectors, in order.
+        """
+        entries = []
+        for page in self.fetch_pages(selectors):
+            if 'entries' in page and page['entries']:
+                entries.extend(page['entries'])
+        return entries
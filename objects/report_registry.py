@@ -0,0 +1,367 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import fnmatch
+import logging
+import sqlalchemy as sqa
+from os.path import exists, join, expanduser
+from configparser import ConfigParser
+from collections import OrderedDict
+
+CONFIG_FILENAME = 'gads-reports.cfg'
+LOOKUP_TABLE = 'gads_sqa_lookup'
+
+logger = logging.getLogger('googleads')
+
+
+class ReportField(object):
+    """
+    a column of a performance report, both as an AWQL field and as a column
+    of the destination table.
+    """
+    def __init__(self, name, type_, key=False, foreign_key=None,
+                 auto_prefix=False, default=None, encodable=False):
+        self.name = name
+        self.type_ = type_
+        self.key = key
+        self.foreign_key = foreign_key
+        # bids can be reported as "auto: 123"; such fields get an extra
+        # <name>AutoPrefix boolean column.
+        self.auto_prefix = auto_prefix
+        self.default = default
+        # low-cardinality strings, which can be stored as the ids of their
+        # values in the lookup table instead.
+        self.encodable = encodable
+
+    def columns(self, encoded=False):
+        """
+        the (name, column) pairs of the field; encoded makes the column of
+        an encodable field a small integer referencing the lookup table.
+        """
+        args = [self.type_]
+        foreign_key = self.foreign_key
+        if encoded and self.encodable:
+            args = [sqa.SmallInteger]
+            foreign_key = LOOKUP_TABLE + '.id'
+        if foreign_key is not None:
+            args.append(sqa.ForeignKey(foreign_key))
+        kwargs = {}
+        if self.key:
+            kwargs['primary_key'] = True
+            kwargs['autoincrement'] = False
+        if self.default is not None and not (encoded and self.encodable):
+            kwargs['default'] = self.default
+        res = [(self.name, sqa.Column(*args, **kwargs))]
+        if self.auto_prefix:
+            res.append((self.name + 'AutoPrefix', sqa.Column(sqa.Boolean)))
+        return res
+
+
+class ReportDefinition(object):
+    def __init__(self, name, report_service, class_name, table_name, fields,
+                 predicate=None, foreign_keys=(), entity_keys=()):
+        self.name = name
+        self.report_service = report_service
+        self.class_name = class_name
+        self.table_name = table_name
+        self.fields = fields
+        self.predicate = predicate
+        self.foreign_keys = foreign_keys
+        # the id columns of the entity a row belongs to; together with Date
+        # they make a secondary index of the table.
+        self.entity_keys = entity_keys
+
+    def active_fields(self, excluded=()):
+        """
+        the fields which are not matched by any of the excluded patterns.
+        Key fields are never excluded.
+        """
+        res = []
+        for field in self.fields:
+            patterns = [x for x in excluded if fnmatch.fnmatchcase(field.name, x)]
+            if patterns and field.key:
+                logger.warning('%s: cannot exclude key field %s' %
+                               (self.name, field.name))
+            elif patterns:
+                continue
+            res.append(field)
+        return res
+
+
+def read_config():
+    path = join(expanduser('~'), CONFIG_FILENAME)
+    p = ConfigParser()
+    if exists(path):
+        p.read(path)
+    for section in p.sections():
+        if section != 'all' and section not in REPORTS:
+            logger.warning('%s: unknown report %s' % (path, section))
+    return p
+
+
+def load_excluded_fields():
+    """
+    reads the fields not to download and store from gads-reports.cfg in the
+    home folder, which looks like:
+
+        [all]
+        exclude = Gmail*, ActiveView*
+
+        [keyword]
+        exclude = EstimatedAdd*
+        encode = yes
+
+    Sections are report names as in REPORTS, or "all". Returns a dict of
+    report name to the list of excluded patterns.
+    """
+    p = read_config()
+    res = {x:[] for x in REPORTS}
+    for section in p.sections():
+        if section != 'all' and section not in REPORTS:
+            continue
+        patterns = [x.strip() for x in p.get(section, 'exclude', fallback='').split(',')
+                    if x.strip() != '']
+        for name in (REPORTS if section == 'all' else [section]):
+            res[name].extend(patterns)
+    return res
+
+
+def load_encoded_reports():
+    """
+    the names of the reports whose encodable fields are stored as ids in the
+    lookup table, set with "encode = yes" in their section of
+    gads-reports.cfg, or in the "all" section. A report section overrides
+    the "all" one.
+    """
+    p = read_config()
+    res = set()
+    for name in REPORTS:
+        for section in [name, 'all']:
+            if p.has_option(section, 'encode'):
+                if p.getboolean(section, 'encode'):
+                    res.add(name)
+                break
+    return res
+
+
+# in the column order of the tables created before the registry: their
+# primary keys, which existing databases are clustered on, lead with the
+# network, date and device columns, followed by ExternalCustomerId.
+COMMON_FIELDS = [
+    ReportField('AdNetworkType1', sqa.NVARCHAR(50), key=True, encodable=True),
+    ReportField('AdNetworkType2', sqa.NVARCHAR(50), key=True, encodable=True),
+    ReportField('Date', sqa.Date, key=True),
+    ReportField('Device', sqa.NVARCHAR(50), key=True, encodable=True),
+    ReportField('ActiveViewCpm', sqa.BigInteger),
+    ReportField('ActiveViewCtr', sqa.Float),
+    ReportField('ActiveViewImpressions', sqa.BigInteger),
+    ReportField('ActiveViewMeasurability', sqa.Float),
+    ReportField('ActiveViewMeasurableCost', sqa.BigInteger),
+    ReportField('ActiveViewMeasurableImpressions', sqa.BigInteger),
+    ReportField('ActiveViewViewability', sqa.Float),
+    ReportField('AverageCost', sqa.BigInteger),
+    ReportField('AverageCpc', sqa.BigInteger),
+    ReportField('AverageCpe', sqa.Float),
+    ReportField('AverageCpm', sqa.BigInteger),
+    ReportField('AverageCpv', sqa.Float),
+    ReportField('AveragePosition', sqa.Float),
+    ReportField('Clicks', sqa.BigInteger),
+    ReportField('Cost', sqa.BigInteger),
+    ReportField('Ctr', sqa.Float),
+    ReportField('EngagementRate', sqa.Float),
+    ReportField('Engagements', sqa.BigInteger),
+    ReportField('Impressions', sqa.BigInteger),
+    ReportField('InteractionRate', sqa.Float),
+    ReportField('Interactions', sqa.BigInteger),
+    ReportField('InteractionTypes', sqa.NVARCHAR(500), encodable=True),
+    ReportField('VideoViewRate', sqa.Float),
+    ReportField('VideoViews', sqa.BigInteger),
+    ReportField('ExternalCustomerId', sqa.BigInteger, key=True, foreign_key='gads_sqa_account.customerId'),
+]
+
+REPORTS = OrderedDict()
+
+REPORTS['account'] = ReportDefinition(
+    'account', 'ACCOUNT_PERFORMANCE_REPORT',
+    'AccountPerformance', 'gads_sqa_account_performance',
+    COMMON_FIELDS + [
+        ReportField('ContentBudgetLostImpressionShare', sqa.Float),
+        ReportField('ContentImpressionShare', sqa.Float),
+        ReportField('ContentRankLostImpressionShare', sqa.Float),
+        ReportField('InvalidClickRate', sqa.Float),
+        ReportField('InvalidClicks', sqa.BigInteger),
+        ReportField('SearchBudgetLostImpressionShare', sqa.Float),
+        ReportField('SearchExactMatchImpressionShare', sqa.Float),
+        ReportField('SearchImpressionShare', sqa.Float),
+        ReportField('SearchRankLostImpressionShare', sqa.Float),
+    ])
+
+REPORTS['campaign'] = ReportDefinition(
+    'campaign', 'CAMPAIGN_PERFORMANCE_REPORT',
+    'CampaignPerformance', 'gads_sqa_campaign_performance',
+    COMMON_FIELDS + [
+        ReportField('CampaignId', sqa.BigInteger, key=True, foreign_key='gads_sqa_campaign.id'),
+        ReportField('AdvertisingChannelSubType', sqa.NVARCHAR(100), key=True, default='na', encodable=True),
+        ReportField('AdvertisingChannelType', sqa.NVARCHAR(100), key=True, encodable=True),
+        ReportField('Amount', sqa.BigInteger),
+        ReportField('BiddingStrategyId', sqa.BigInteger),
+        ReportField('BiddingStrategyName', sqa.NVARCHAR(500)),
+        ReportField('BiddingStrategyType', sqa.NVARCHAR(100), encodable=True),
+        ReportField('BidType', sqa.NVARCHAR(100), encodable=True),
+        ReportField('BudgetId', sqa.BigInteger),
+        ReportField('CampaignDesktopBidModifier', sqa.Float),
+        ReportField('CampaignMobileBidModifier', sqa.Float),
+        ReportField('CampaignTabletBidModifier', sqa.Float),
+        ReportField('CampaignTrialType', sqa.NVARCHAR(50), encodable=True),
+        ReportField('ContentBudgetLostImpressionShare', sqa.Float),
+        ReportField('ContentImpressionShare', sqa.Float),
+        ReportField('ContentRankLostImpressionShare', sqa.Float),
+        ReportField('EnhancedCpcEnabled', sqa.Boolean),
+        ReportField('EnhancedCpvEnabled', sqa.Boolean),
+        ReportField('GmailForwards', sqa.BigInteger),
+        ReportField('GmailSaves', sqa.BigInteger),
+        ReportField('GmailSecondaryClicks', sqa.BigInteger),
+        ReportField('IsBudgetExplicitlyShared', sqa.Boolean),
+        ReportField('InvalidClickRate', sqa.Float),
+        ReportField('InvalidClicks', sqa.BigInteger),
+        ReportField('SearchBudgetLostImpressionShare', sqa.Float),
+        ReportField('SearchExactMatchImpressionShare', sqa.Float),
+        ReportField('SearchImpressionShare', sqa.Float),
+        ReportField('SearchRankLostImpressionShare', sqa.Float),
+    ],
+    entity_keys=['CampaignId'])
+
+REPORTS['adgroup'] = ReportDefinition(
+    'adgroup', 'ADGROUP_PERFORMANCE_REPORT',
+    'AdGroupPerformance', 'gads_sqa_adgroup_performance',
+    COMMON_FIELDS + [
+        ReportField('AdGroupId', sqa.BigInteger, key=True, foreign_key='gads_sqa_adgroup.id'),
+        ReportField('AdGroupDesktopBidModifier', sqa.Float),
+        ReportField('AdGroupMobileBidModifier', sqa.Float),
+        ReportField('AdGroupTabletBidModifier', sqa.Float),
+        ReportField('BiddingStrategyId', sqa.BigInteger),
+        ReportField('BiddingStrategyName', sqa.NVARCHAR(500)),
+        ReportField('BiddingStrategySource', sqa.NVARCHAR(50), encodable=True),
+        ReportField('BiddingStrategyType', sqa.NVARCHAR(100), encodable=True),
+        ReportField('BidType', sqa.NVARCHAR(100), encodable=True),
+        ReportField('ContentBidCriterionTypeGroup', sqa.NVARCHAR(50), encodable=True),
+        ReportField('ContentImpressionShare', sqa.Float),
+        ReportField('ContentRankLostImpressionShare', sqa.Float),
+        ReportField('CpcBid', sqa.BigInteger, auto_prefix=True),
+        ReportField('CpmBid', sqa.BigInteger),
+        ReportField('CpvBid', sqa.BigInteger),
+        ReportField('EnhancedCpcEnabled', sqa.Boolean),
+        ReportField('EnhancedCpvEnabled', sqa.Boolean),
+        ReportField('GmailForwards', sqa.BigInteger),
+        ReportField('GmailSaves', sqa.BigInteger),
+        ReportField('GmailSecondaryClicks', sqa.BigInteger),
+        ReportField('SearchExactMatchImpressionShare', sqa.Float),
+        ReportField('SearchImpressionShare', sqa.Float),
+        ReportField('SearchRankLostImpressionShare', sqa.Float),
+        ReportField('TargetCpa', sqa.BigInteger),
+        ReportField('TargetCpaBidSource', sqa.NVARCHAR(100), encodable=True),
+    ],
+    entity_keys=['AdGroupId'])
+
+REPORTS['criterion'] = ReportDefinition(
+    'criterion', 'CRITERIA_PERFORMANCE_REPORT',
+    'CriterionPerformance', 'gads_sqa_criterion_performance',
+    COMMON_FIELDS + [
+        ReportField('CampaignId', sqa.BigInteger, key=True, foreign_key='gads_sqa_campaign.id'),
+        ReportField('AdGroupId', sqa.BigInteger, key=True, foreign_key='gads_sqa_adgroup.id'),
+        ReportField('Id', sqa.BigInteger, key=True),
+        ReportField('BidModifier', sqa.Float),
+        ReportField('BidType', sqa.NVARCHAR(100), encodable=True),
+        ReportField('CpcBid', sqa.BigInteger, auto_prefix=True),
+        ReportField('CpcBidSource', sqa.NVARCHAR(100), encodable=True),
+        ReportField('CpmBid', sqa.BigInteger),
+        ReportField('CpvBid', sqa.BigInteger),
+        ReportField('CpvBidSource', sqa.NVARCHAR(100), encodable=True),
+        ReportField('CreativeQualityScore', sqa.NVARCHAR(50), encodable=True),
+        ReportField('Criteria', sqa.NVARCHAR(500)),
+        ReportField('EnhancedCpcEnabled', sqa.Boolean),
+        ReportField('EnhancedCpvEnabled', sqa.Boolean),
+        ReportField('EstimatedAddClicksAtFirstPositionCpc', sqa.BigInteger),
+        ReportField('EstimatedAddCostAtFirstPositionCpc', sqa.BigInteger),
+        ReportField('FirstPageCpc', sqa.BigInteger, auto_prefix=True),
+        ReportField('FirstPositionCpc', sqa.BigInteger, auto_prefix=True),
+        ReportField('GmailForwards', sqa.BigInteger),
+        ReportField('GmailSaves', sqa.BigInteger),
+        ReportField('GmailSecondaryClicks', sqa.BigInteger),
+        ReportField('HasQualityScore', sqa.Boolean),
+        ReportField('PostClickQualityScore', sqa.NVARCHAR(50), encodable=True),
+        ReportField('QualityScore', sqa.Integer),
+        ReportField('SearchPredictedCtr', sqa.NVARCHAR(50), encodable=True),
+        ReportField('TopOfPageCpc', sqa.BigInteger, auto_prefix=True),
+    ],
+    foreign_keys=[(['AdGroupId', 'Id'],
+                   ['gads_sqa_adgroupcriterion.adGroupId',
+                    'gads_sqa_adgroupcriterion.criterion_id'])],
+    entity_keys=['AdGroupId', 'Id'])
+
+REPORTS['keyword'] = ReportDefinition(
+    'keyword', 'KEYWORDS_PERFORMANCE_REPORT',
+    'KeywordPerformance', 'gads_sqa_keyword_performance',
+    COMMON_FIELDS + [
+        ReportField('CampaignId', sqa.BigInteger, key=True, foreign_key='gads_sqa_campaign.id'),
+        ReportField('AdGroupId', sqa.BigInteger, key=True, foreign_key='gads_sqa_adgroup.id'),
+        ReportField('Id', sqa.BigInteger, key=True),
+        ReportField('BiddingStrategyId', sqa.BigInteger),
+        ReportField('BiddingStrategyName', sqa.NVARCHAR(500)),
+        ReportField('BiddingStrategySource', sqa.NVARCHAR(50), encodable=True),
+        ReportField('BiddingStrategyType', sqa.NVARCHAR(50), encodable=True),
+        ReportField('BidType', sqa.NVARCHAR(100), encodable=True),
+        ReportField('CpcBid', sqa.BigInteger, auto_prefix=True),
+        ReportField('CpcBidSource', sqa.NVARCHAR(100), encodable=True),
+        ReportField('CpmBid', sqa.BigInteger),
+        ReportField('CreativeQualityScore', sqa.NVARCHAR(50), encodable=True),
+        ReportField('Criteria', sqa.NVARCHAR(500)),
+        ReportField('EnhancedCpcEnabled', sqa.Boolean),
+        ReportField('EstimatedAddClicksAtFirstPositionCpc', sqa.BigInteger),
+        ReportField('EstimatedAddCostAtFirstPositionCpc', sqa.BigInteger),
+        ReportField('FirstPageCpc', sqa.BigInteger, auto_prefix=True),
+        ReportField('FirstPositionCpc', sqa.BigInteger, auto_prefix=True),
+        ReportField('GmailForwards', sqa.BigInteger),
+        ReportField('GmailSaves', sqa.BigInteger),
+        ReportField('GmailSecondaryClicks', sqa.BigInteger),
+        ReportField('HasQualityScore', sqa.Boolean),
+        ReportField('PostClickQualityScore', sqa.NVARCHAR(50), encodable=True),
+        ReportField('QualityScore', sqa.Integer),
+        ReportField('SearchExactMatchImpressionShare', sqa.Float),
+        ReportField('SearchImpressionShare', sqa.Float),
+        ReportField('SearchPredictedCtr', sqa.NVARCHAR(50), encodable=True),
+        ReportField('SearchRankLostImpressionShare', sqa.Float),
+        ReportField('TopOfPageCpc', sqa.BigInteger, auto_prefix=True),
+    ],
+    predicate='IsNegative IN [true, false]',
+    entity_keys=['AdGroupId', 'Id'])
+
+# rollups kept up to date by the loader: additive measures of these reports,
+# summed per campaign and per adgroup, by day, week and month.
+ROLLUP_REPORTS = ['criterion', 'keyword']
+ROLLUP_LEVELS = OrderedDict([
+    ('campaign', ['CampaignId']),
+    ('adgroup', ['CampaignId', 'AdGroupId']),
+])
+ROLLUP_MEASURES = ['Impressions', 'Clicks', 'Cost', 'Interactions',
+                   'Engagements', 'VideoViews']
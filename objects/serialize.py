@@ -0,0 +1,207 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import ast
+import json
+import re
+
+
+def to_plain(value):
+    """
+    the value with its suds objects turned into dicts of their set fields,
+    in one pass, ready for json.
+    """
+    if isinstance(value, (list, tuple)):
+        return [to_plain(x) for x in value]
+    if isinstance(value, str):
+        # suds' Text is a str subclass
+        return str(value)
+    if hasattr(value, '__keylist__'):
+        items = [(x, getattr(value, x)) for x in value.__keylist__]
+    elif hasattr(value, '__dict__'):
+        items = vars(value).items()
+    else:
+        return value
+    return dict((x, to_plain(y)) for x, y in items if y is not None)
+
+
+def dumps(value):
+    """
+    the compact, canonical JSON of a list of suds objects or strings: keys
+    sorted and no spaces, so that equal values give equal strings.
+    """
+    if value is None:
+        return None
+    return json.dumps(to_plain(value), sort_keys=True, separators=(',', ':'),
+                      ensure_ascii=False)
+
+
+_KEY = re.compile(r'\s*([\w.]+)(\[\])? = ')
+_SCALAR = re.compile(r'[^,\n\]}]*')
+_QUOTED = re.compile(r"'(?:[^'\\]|\\.)*'")
+
+
+class SudsDumpParser(object):
+    """
+    parses back the str() of a list of suds objects as they were stored
+    before the JSON form: a python list whose items are suds' printed
+    objects, "(Type){ name = value ... }", quoted strings, or the unquoted
+    text of suds' Text values.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def skip(self, chars=' \n\t\r'):
+        while self.pos < len(self.text) and self.text[self.pos] in chars:
+            self.pos += 1
+
+    def peek(self, s):
+        return self.text.startswith(s, self.pos)
+
+    def expect(self, s):
+        if not self.peek(s):
+            raise ValueError('expected %r at %d' % (s, self.pos))
+        self.pos += len(s)
+
+    def parse(self):
+        self.skip()
+        res = self.list_(']')
+        self.skip()
+        if self.pos != len(self.text):
+            raise ValueError('trailing text at %d' % self.pos)
+        return res
+
+    def list_(self, end):
+        self.expect('[')
+        res = []
+        self.skip(' ')
+        while not self.peek(end):
+            position = self.pos
+            # bare items of the python list are suds' unquoted Text
+            res.append(self.value(text=True))
+            if self.pos == position:
+                # e.g. the end of a truncated value
+                raise ValueError('unexpected text at %d' % self.pos)
+            self.skip(' ')
+            if self.peek(','):
+                self.pos += 1
+                self.skip(' \n')
+        self.expect(end)
+        return res
+
+    def object_(self):
+        self.expect('(')
+        self.pos = self.text.index(')', self.pos) + 1
+        self.expect('{')
+        res = {}
+        while True:
+            self.skip()
+            if self.peek('}'):
+                self.pos += 1
+                return res
+            match = _KEY.match(self.text, self.pos)
+            if match is None:
+                raise ValueError('expected a field at %d' % self.pos)
+            self.pos = match.end()
+            self.skip(' ')
+            if match.group(2):
+                value = self.collection()
+            else:
+                self.skip()
+                value = self.value()
+            if value is not None:
+                res[match.group(1)] = value
+
+    def collection(self):
+        # the items of a list field, each on its own line and followed by ','
+        if self.peek('<empty>'):
+            self.pos += len('<empty>')
+            return []
+        res = []
+        while True:
+            position = self.pos
+            self.skip()
+            if self.peek('}') or _KEY.match(self.text, self.pos):
+                self.pos = position
+                return res
+            res.append(self.value())
+            self.expect(',')
+
+    def value(self, text=False):
+        if self.peek('('):
+            return self.object_()
+        if self.peek('['):
+            return self.list_(']')
+        if self.peek('"'):
+            # suds doesn't escape quotes: the string ends at the line's last
+            line_end = self.text.find('\n', self.pos)
+            if line_end < 0:
+                line_end = len(self.text)
+            end = self.text.rindex('"', self.pos + 1, line_end)
+            value = self.text[self.pos + 1:end]
+            self.pos = end + 1
+            return value
+        if self.peek("'"):
+            match = _QUOTED.match(self.text, self.pos)
+            if match is None:
+                raise ValueError('unterminated string at %d' % self.pos)
+            self.pos = match.end()
+            return ast.literal_eval(match.group(0))
+        match = _SCALAR.match(self.text, self.pos)
+        self.pos = match.end()
+        if text:
+            return match.group(0).strip()
+        return self._scalar(match.group(0).strip())
+
+    @staticmethod
+    def _scalar(value):
+        if value == 'None':
+            return None
+        if value == '<empty>':
+            return []
+        if value in ('True', 'False'):
+            return value == 'True'
+        for kind in (int, float):
+            try:
+                return kind(value)
+            except ValueError:
+                pass
+        return value
+
+
+def legacy_to_json(text):
+    """
+    the JSON form of a value stored as str() of a list, or None if it can't
+    be parsed back.
+    """
+    try:
+        value = ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        try:
+            value = SudsDumpParser(text).parse()
+        except ValueError:
+            return None
+    if not isinstance(value, list):
+        return None
+    return dumps(value)
@@ -0,0 +1,111 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import contextlib
+import logging
+import threading
+import weakref
+
+from objects.deadlines import call_with_deadline, given_up
+
+logger = logging.getLogger('googleads')
+
+
+class ServicePool(object):
+    """
+    the SOAP services of each client, created once and reused for all the
+    accounts: the client's customer id is put in the headers of every call,
+    so a service follows the account the client is set to. A service is
+    used by one thread at a time, since suds clients can't be shared; the
+    pool grows to the number of threads using a service at once.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        # client -> {(service name, version): [free services]}
+        self.free = weakref.WeakKeyDictionary()
+        # client -> {version: report downloader}
+        self.downloaders = weakref.WeakKeyDictionary()
+        self.created = 0
+
+    @contextlib.contextmanager
+    def borrow(self, client, service_name, version='v201607'):
+        key = (service_name, version)
+        with self.lock:
+            free = self.free.setdefault(client, {}).setdefault(key, [])
+            service = free.pop() if free else None
+        if service is None:
+            logger.debug('creating %s %s' % (service_name, version))
+            service = client.GetService(service_name, version=version)
+            with self.lock:
+                self.created += 1
+        try:
+            yield service
+        finally:
+            if given_up():
+                logger.debug('dropping the %s of a call given up on' % service_name)
+            else:
+                with self.lock:
+                    self.free[client][key].append(service)
+
+    def report_downloader(self, client, version='v201607', renew=False):
+        """
+        the report downloader of the client, built once since it parses the
+        report definition schema. Downloads of a client are done by one
+        thread at a time, as every worker has its own client. renew builds
+        a new one, for when a download given up on may still be running on
+        the current one.
+        """
+        with self.lock:
+            downloaders = self.downloaders.setdefault(client, {})
+            if renew or version not in downloaders:
+                downloaders[version] = client.GetReportDownloader(version=version)
+            return downloaders[version]
+
+
+pool = ServicePool()
+
+
+def borrow(client, service_name, version='v201607'):
+    """
+    a service of the client from the process' pool, as a context manager:
+
+        with borrow(client, 'CampaignService') as service:
+            page = service.get(selector)
+    """
+    return pool.borrow(client, service_name, version)
+
+
+def get(client, service_name, selector, version='v201607'):
+    """
+    service.get(selector) on a service of the pool, given up after the call
+    deadline of objects.deadlines and tried again on another service. The
+    service of a call given up on is dropped from the pool when it ends.
+    """
+    def call():
+        with borrow(client, service_name, version) as service:
+            return service.get(selector)
+    return call_with_deadline(call, name='%s.get' % service_name)
+
+
+def report_downloader(client, version='v201607', renew=False):
+    return pool.report_downloader(client, version, renew)
@@ -0,0 +1,183 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import logging
+import sqlalchemy as sqa
+
+logger = logging.getLogger('googleads')
+
+VERSION_COLUMN = '_lastUpdated'
+
+# local time, as the Versioned mixin uses datetime.now()
+NOW = {
+    'mssql': 'GETDATE()',
+    'sqlite': "datetime('now', 'localtime')",
+    'postgresql': 'LOCALTIMESTAMP',
+}
+
+
+def engine_options(connection_string):
+    """
+    the create_engine options the staged upserts need on the database of
+    the connection string. pyodbc sends an executemany one row at a time,
+    a round trip each, unless fast_executemany is set.
+    """
+    url = sqa.engine.url.make_url(connection_string)
+    if url.get_backend_name() == 'mssql' and url.get_driver_name() == 'pyodbc':
+        return {'fast_executemany': True}
+    return {}
+
+
+def _staging_table(table, dialect):
+    columns = [sqa.Column(x.name, x.type) for x in table.columns
+               if x.name != VERSION_COLUMN]
+    if dialect == 'mssql':
+        return sqa.Table('#stage_%s' % table.name, sqa.MetaData(), *columns)
+    return sqa.Table('stage_%s' % table.name, sqa.MetaData(), *columns,
+                     prefixes=['TEMPORARY'])
+
+
+def _merge_statement(table, stage, key_cols, columns, quote):
+    """
+    MSSQL: rows are only updated when one of their columns differs, which
+    EXISTS (... EXCEPT ...) tests with NULLs compared as equal.
+    """
+    target, source = quote(table.name), quote(stage.name)
+    on = ' AND '.join(['t.%s = s.%s' % (quote(x), quote(x)) for x in key_cols])
+    values = [x for x in columns if x not in key_cols]
+    sql = 'MERGE INTO %s AS t USING %s AS s ON %s' % (target, source, on)
+    if values:
+        sql += (' WHEN MATCHED AND EXISTS (SELECT %s EXCEPT SELECT %s)'
+                ' THEN UPDATE SET %s, %s = %s' %
+                (', '.join(['s.%s' % quote(x) for x in values]),
+                 ', '.join(['t.%s' % quote(x) for x in values]),
+                 ', '.join(['%s = s.%s' % (quote(x), quote(x)) for x in values]),
+                 quote(VERSION_COLUMN), NOW['mssql']))
+    sql += (' WHEN NOT MATCHED BY TARGET THEN INSERT (%s, %s) VALUES (%s, %s);' %
+            (', '.join([quote(x) for x in columns]), quote(VERSION_COLUMN),
+             ', '.join(['s.%s' % quote(x) for x in columns]), NOW['mssql']))
+    return sql
+
+
+def _on_conflict_statement(table, stage, key_cols, columns, quote, dialect):
+    """
+    sqlite and postgresql: INSERT ... ON CONFLICT, again only touching the
+    rows which changed.
+    """
+    distinct = 'IS NOT' if dialect == 'sqlite' else 'IS DISTINCT FROM'
+    target = quote(table.name)
+    values = [x for x in columns if x not in key_cols]
+    sql = ('INSERT INTO %s (%s, %s) SELECT %s, %s FROM %s WHERE 1 = 1'
+           ' ON CONFLICT (%s)' %
+           (target, ', '.join([quote(x) for x in columns]), quote(VERSION_COLUMN),
+            ', '.join([quote(x) for x in columns]), NOW[dialect], quote(stage.name),
+            ', '.join([quote(x) for x in key_cols])))
+    if not values:
+        return sql + ' DO NOTHING'
+    return sql + (' DO UPDATE SET %s, %s = excluded.%s WHERE %s' %
+                  (', '.join(['%s = excluded.%s' % (quote(x), quote(x)) for x in values]),
+                   quote(VERSION_COLUMN), quote(VERSION_COLUMN),
+                   ' OR '.join(['%s.%s %s excluded.%s' % (target, quote(x), distinct, quote(x))
+                                for x in values])))
+
+
+def _row_upsert(connection, table, rows, key_cols, columns):
+    """
+    other dialects: one lookup per row, then an INSERT or an UPDATE of the
+    rows which changed. Slower, but plain SQL which any database runs.
+    """
+    written = 0
+    for row in rows:
+        values = {x: row.get(x) for x in columns}
+        where = sqa.and_(*[table.c[x] == values[x] for x in key_cols])
+        existing = connection.execute(
+            sqa.select([table.c[x] for x in columns]).where(where)).first()
+        if existing is None:
+            values[VERSION_COLUMN] = datetime.datetime.now()
+            connection.execute(table.insert(), values)
+        elif any(existing[x] != values[x] for x in columns):
+            values[VERSION_COLUMN] = datetime.datetime.now()
+            connection.execute(table.update().where(where), values)
+        else:
+            continue
+        written += 1
+    return written
+
+
+def bulk_upsert(session, table, rows, key_cols=None):
+    """
+    writes rows, dicts of column values, to the table in a handful of round
+    trips: they are bulk loaded into a temporary staging table, which is then
+    applied with a single MERGE (MSSQL) or INSERT ... ON CONFLICT (sqlite,
+    postgresql). New rows are inserted and changed ones updated, setting
+    _lastUpdated on the server; unchanged rows are not touched. Other
+    databases fall back to one statement per row. key_cols default to the
+    primary key of the table. Commits.
+    """
+    if not rows:
+        return 0
+    connection = session.connection()
+    dialect = connection.dialect.name
+    if key_cols is None:
+        key_cols = [x.name for x in table.primary_key.columns]
+    columns = [x.name for x in table.columns if x.name != VERSION_COLUMN]
+    quote = connection.dialect.identifier_preparer.quote
+
+    if dialect not in NOW:
+        written = _row_upsert(connection, table, rows, key_cols, columns)
+        session.commit()
+        session.expire_all()
+        logger.info('%s: %d rows upserted one by one, %d inserted or changed' %
+                    (table.name, len(rows), written))
+        return written
+
+    stage = _staging_table(table, dialect)
+    if dialect == 'sqlite':
+        # pysqlite commits the CREATE but rolls back a DROP issued after a
+        # failure, leaving the staging table of a failed upsert behind
+        stage.drop(connection, checkfirst=True)
+    stage.create(connection)
+    try:
+        connection.execute(stage.insert(),
+                           [{x: row.get(x) for x in columns} for row in rows])
+        if dialect == 'mssql':
+            sql = _merge_statement(table, stage, key_cols, columns, quote)
+        else:
+            sql = _on_conflict_statement(table, stage, key_cols, columns, quote, dialect)
+        written = connection.execute(sqa.text(sql)).rowcount
+    except Exception:
+        # the drop may fail as well in the broken transaction; the original
+        # error is the one worth raising
+        try:
+            stage.drop(connection)
+        except Exception as e:
+            logger.warning('could not drop %s: %s' % (stage.name, e))
+        raise
+    stage.drop(connection)
+    session.commit()
+    # the identity map may hold stale versions of the rows
+    session.expire_all()
+    logger.info('%s: %d rows staged, %d inserted or changed' %
+                (table.name, len(rows), written))
+    return written
@@ -0,0 +1,153 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import csv
+import io
+import re
+
+from reports.parsing import spec_columns
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = None
+    pd = None
+
+
+def available():
+    return pd is not None
+
+
+# characters with code more than 2 bites, which cannot be handled by pyodbc
+# https://github.com/mkleehammer/pyodbc/issues/140
+WIDE_CHARS = re.compile('[\U00010000-\U0010FFFF]')
+
+
+class ColumnarConverter(object):
+    """
+    the columnar counterpart of parsing.RowConverter: pandas' C parser splits
+    a whole report chunk into columns, inferring numbers and booleans, with
+    '--' as NULL. Columns which don't come out with the dtype of their
+    column type in the report table, e.g. floats with '%', '<' or '>', or
+    'auto:' bids, which set their AutoPrefix column, are converted at once
+    with numpy's string functions.
+
+    The columns are turned into rows of python values only at the end, as
+    the database drivers expect them.
+    """
+    engine = 'columnar'
+
+    def __init__(self, specs):
+        if not available():
+            raise ImportError('the columnar engine needs numpy and pandas')
+        self.specs = specs
+        self.columns = spec_columns(specs)
+        self.dtypes = {x[0]: str for x in specs if x[2] in ('str', 'date')}
+
+    def _read(self, report_str):
+        return pd.read_csv(io.StringIO(report_str), sep='\t', header=None,
+                           usecols=[x[0] for x in self.specs], dtype=self.dtypes,
+                           keep_default_na=False, na_values=['--', ' --'],
+                           quoting=csv.QUOTE_NONE, skip_blank_lines=True,
+                           engine='c')
+
+    @staticmethod
+    def _with_nulls(values, null):
+        values = values.astype(object)
+        if null.any():
+            values[null] = None
+        return values
+
+    @staticmethod
+    def _startswith(values, prefix):
+        return (np.char.startswith(values, prefix) |
+                np.char.startswith(values, prefix.capitalize()) |
+                np.char.startswith(values, prefix.upper()))
+
+    def _convert_strings(self, values, kind, auto_column, res):
+        """
+        the slow path, for columns which didn't parse as their dtype.
+        """
+        null = pd.isna(values)
+        values = np.char.strip(np.where(null, '--', values).astype(str), '"')
+        null = np.char.strip(values) == '--'
+        if kind in ('bigint', 'int'):
+            values = np.char.strip(values)
+            auto = self._startswith(values, 'auto') & ~null
+            if auto.any():
+                values = np.where(auto, np.char.lstrip(values, 'autoAUTO: '), values)
+            null = null | (values == '')
+            if auto_column is not None:
+                res[auto_column] = np.where(auto, True, None)
+            values = np.where(null, '0', values).astype(np.int64)
+        elif kind == 'float':
+            values = np.where(null, 'nan', np.char.strip(values, '%>< ')).astype(np.float64)
+        elif kind == 'bool':
+            values = self._startswith(values, 'tr')
+        elif kind == 'date':
+            values = np.where(null, 'NaT', values).astype('datetime64[D]')
+        return values, null
+
+    def convert_columns(self, report_str):
+        """
+        returns {column: object array of python values or None}.
+        """
+        if report_str.strip() == '':
+            return {x: np.array([], dtype=object) for x in self.columns}
+        frame = self._read(report_str)
+        quoted = '"' in report_str
+        wide_chars = WIDE_CHARS.search(report_str) is not None
+        res = {}
+        for index, column, kind, auto_column in self.specs:
+            values = frame[index].to_numpy()
+            null = pd.isna(values)
+            if kind == 'str':
+                if quoted:
+                    values = np.array([x.strip('"') if isinstance(x, str) else x
+                                       for x in values], dtype=object)
+                    null = null | (values == '--')
+                if wide_chars:
+                    values = np.array([WIDE_CHARS.sub('', x) if isinstance(x, str) else x
+                                       for x in values], dtype=object)
+            elif kind in ('bigint', 'int') and values.dtype.kind in 'iu':
+                pass
+            elif kind in ('bigint', 'int') and values.dtype.kind == 'f' and \
+                 np.array_equal(values[~null], np.round(values[~null])) and \
+                 not (np.abs(values[~null]) >= 2 ** 53).any():
+                # integers with NULLs come out as floats
+                values = np.where(null, 0, values).astype(np.int64)
+            elif kind == 'float' and values.dtype.kind in 'iuf':
+                values = values.astype(np.float64)
+            elif kind == 'bool' and values.dtype.kind == 'b':
+                pass
+            else:
+                values, null = self._convert_strings(values, kind, auto_column, res)
+            if auto_column is not None and auto_column not in res:
+                res[auto_column] = np.full(len(values), None, dtype=object)
+            res[column] = self._with_nulls(values, null)
+        return res
+
+    def convert_text(self, report_str):
+        arrays = self.convert_columns(report_str)
+        return list(zip(*[arrays[x].tolist() for x in self.columns]))
@@ -0,0 +1,229 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import concurrent.futures
+import datetime
+import functools
+import multiprocessing
+import threading
+import sqlalchemy as sqa
+
+# below this number of lines a chunk is parsed in the calling process
+MIN_PARALLEL_LINES = 20000
+# each worker gets a few slices, so that a slow one doesn't hold the rest
+SLICES_PER_WORKER = 4
+
+
+def _to_str(value):
+    # this is to remove characters with code more than 2 bites,
+    # which cannot be handled by pyodbc
+    # https://github.com/mkleehammer/pyodbc/issues/140
+    return ''.join([x for x in value if ord(x) < 65536])
+
+
+def _to_float(value):
+    return float(value.strip('%>< '))
+
+
+def _to_bool(value):
+    return value.lower().startswith('tr')
+
+
+def _to_date(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _kind(column_type):
+    if isinstance(column_type, sqa.BigInteger):
+        return 'bigint'
+    if isinstance(column_type, sqa.Integer):
+        return 'int'
+    if isinstance(column_type, sqa.Float):
+        return 'float'
+    if isinstance(column_type, sqa.Boolean):
+        return 'bool'
+    if isinstance(column_type, sqa.Date):
+        return 'date'
+    return 'str'
+
+
+CONVERTERS = {
+    'bigint': int,
+    'int': int,
+    'float': _to_float,
+    'bool': _to_bool,
+    'date': _to_date,
+    'str': _to_str,
+}
+
+
+def model_specs(ormType, fields):
+    """
+    the conversion specs of the given report fields, a tuple of (field
+    index, column, kind, auto prefix column). Fields which are not columns
+    of the table are left out. Encoded fields are converted to strings, the
+    loader replaces them with their lookup ids.
+    """
+    specs = []
+    for index, field in enumerate(fields):
+        if not hasattr(ormType, field):
+            continue
+        column_type = getattr(ormType, field).property.columns[0].type
+        kind = _kind(column_type)
+        if field in getattr(ormType, 'encoded_fields', ()):
+            kind = 'str'
+        auto_column = field + 'AutoPrefix'
+        if not hasattr(ormType, auto_column):
+            auto_column = None
+        specs.append((index, field, kind, auto_column))
+    return tuple(specs)
+
+
+def spec_columns(specs):
+    """
+    the output columns of the specs: their columns, then the auto prefix
+    columns.
+    """
+    return [x[1] for x in specs] + [x[3] for x in specs if x[3] is not None]
+
+
+class RowConverter(object):
+    """
+    converts the values of report lines to tuples of column values, in the
+    order of self.columns. It is built from specs (see model_specs), which
+    are cheap to send to other processes; the converter of each field is
+    looked up once.
+
+    BigInteger fields may come prefixed with 'auto:', which sets their
+    AutoPrefix column when there is one. '--' stands for no value.
+    """
+    engine = 'rows'
+
+    def __init__(self, specs):
+        self.specs = specs
+        self.columns = spec_columns(specs)
+        self.converters = []
+        for index, column, kind, auto_column in specs:
+            auto = self.columns.index(auto_column) if auto_column is not None else None
+            self.converters.append((index, self.columns.index(column),
+                                    CONVERTERS[kind], kind == 'bigint', auto))
+
+    def convert_values(self, values):
+        row = [None] * len(self.columns)
+        for index, position, convert, bigint, auto in self.converters:
+            value = values[index].strip('"')
+            if value.strip() == '--':
+                continue
+            if bigint:
+                value = value.lower().strip()
+                if value.startswith('auto'):
+                    if auto is not None:
+                        row[auto] = True
+                    value = value[len('auto'):].lstrip(': ')
+                if value == '':
+                    continue
+            row[position] = convert(value)
+        return tuple(row)
+
+    def convert(self, lines):
+        return [self.convert_values(x.split('\t')) for x in lines if x.strip() != '']
+
+    def convert_text(self, report_str):
+        return self.convert(report_str.split('\n'))
+
+
+ENGINES = ['rows', 'columnar']
+
+
+@functools.lru_cache(maxsize=None)
+def _converter_from_specs(engine, specs):
+    if engine == 'columnar':
+        from reports.columnar import ColumnarConverter
+
+        return ColumnarConverter(specs)
+    return RowConverter(specs)
+
+
+@functools.lru_cache(maxsize=None)
+def converter_for(ormType, fields, engine='rows'):
+    """
+    the converter of a report table for the given (tuple of) fields, using
+    the given engine: 'rows' converts line by line, 'columnar' whole
+    columns with pandas (see reports.columnar).
+    """
+    return _converter_from_specs(engine, model_specs(ormType, fields))
+
+
+def _convert_slice(task):
+    engine, specs, data = task
+    return _converter_from_specs(engine, specs).convert_text(data.decode('utf-8'))
+
+
+def split_slices(data, count):
+    """
+    splits bytes into about count slices, at line boundaries.
+    """
+    size = max(len(data) // count, 1)
+    slices = []
+    start = 0
+    while start < len(data):
+        end = data.find(b'\n', start + size)
+        if end == -1:
+            end = len(data)
+        slices.append(data[start:end])
+        start = end + 1
+    return slices
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers):
+    """
+    the process pool shared by all the reports, and threads, of the run.
+    Its processes are spawned rather than forked, as the pool may be
+    created while other threads hold locks.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def parse_report(converter, report_str, workers=0):
+    """
+    yields the rows of a downloaded report as lists of tuples, in the order
+    of the report. With more than one worker, large reports are split into
+    slices of raw bytes which are converted in a process pool.
+    """
+    if workers <= 1 or report_str.count('\n') < MIN_PARALLEL_LINES:
+        yield converter.convert_text(report_str)
+        return
+    slices = split_slices(report_str.encode('utf-8'), workers * SLICES_PER_WORKER)
+    pool = get_pool(workers)
+    tasks = [(converter.engine, converter.specs, x) for x in slices]
+    for rows in pool.map(_convert_slice, tasks):
+        yield rows
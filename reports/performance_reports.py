@@ -25,63 +25,112 @@ import logging
 from io import StringIO
 import sys
 from decimal import Decimal
-from googleads import adwords
-from googleads.errors import AdWordsReportBadRequestError
+from googleads.errors import AdWordsReportBadRequestError, AdWordsReportError
+import http.client
 import sqlalchemy as sqa
 import datetime
 from objects import model
+from objects import report_registry
+from reports.rollups import RollupUpdater
+from reports.parsing import converter_for, parse_report
+from objects.lookup import LookupEncoder
+from objects.services import report_downloader
+from objects import deadlines
 import gc
 import math
 
+# bad request errors, matched against their type, which mean that the account
+# can't have the report at all, e.g. a manager account. The report is then
+# empty. Other bad requests are failures.
+UNSUPPORTED_REPORT_ERRORS = [
+    'CUSTOMER_SERVING_TYPE_REPORT_MISMATCH',
+]
+# bad request errors of reports too large to be served, which may pass on a
+# shorter date range
+SIZE_ERRORS = [
+    'ERROR_GETTING_RESPONSE_FROM_BACKEND',
+    'REPORT_TOO_LARGE',
+]
+# the measures compared per day to tell whether loaded days are complete,
+# over the last COMPLETENESS_DAYS days in the database
+COMPLETENESS_MEASURES = ['Impressions', 'Clicks', 'Cost']
+COMPLETENESS_DAYS = 3
+# the first day loaded into an empty table
+FIRST_DAY = datetime.date(2016, 1, 1)
+# the download errors which fail a chunk rather than the run
+DOWNLOAD_ERRORS = (AdWordsReportError, OSError, http.client.HTTPException)
+
+
+def is_unsupported(error):
+    return any(x in str(error.type) for x in UNSUPPORTED_REPORT_ERRORS)
+
+
+def is_splittable(error):
+    """
+    whether a failed download may pass on a shorter date range: timeouts,
+    server errors and size errors.
+    """
+    if isinstance(error, AdWordsReportBadRequestError):
+        return any(x in str(error.type) for x in SIZE_ERRORS)
+    if isinstance(error, AdWordsReportError):
+        return error.code is None or error.code >= 500
+    return isinstance(error, (OSError, http.client.HTTPException))
+
+
 
 class BasePerformanceReport(object):
-    def __init__(self, client, session, approximate_chunk_size = 300000):
+    """
+    subclasses set ormType, the table class of the report; the report name,
+    predicate and AWQL fields come from its definition in
+    objects.report_registry.
+    """
+    ormType = None
+
+    def __init__(self, client, session, approximate_chunk_size = 300000,
+                 parse_workers = 0, engine = 'rows'):
         """
         approximate_chunk_size is to limit the size of the report in memory
-        each time fetched from google
+        each time fetched from google. With parse_workers > 1, large chunks
+        are converted in a pool of that many processes. engine is the
+        conversion engine, 'rows' or 'columnar' (see reports.parsing).
         """
         self.client = client
         self.session = session
-        self.report_downloader = client.GetReportDownloader(version='v201607')
+        self.report_downloader = report_downloader(client)
         self.logger = logging.getLogger('googleads')
-        self.predicate = None
         self.approximate_chunk_size = approximate_chunk_size
         # this is the estimated number of days to stay within limits of the
         # approximate chunk size
         self.days_iteration = None
+        # the (start, end, error) of the chunks the last refresh could not
+        # download
+        self.gaps = []
         
-        self.fields = ['ExternalCustomerId',
-                       'AdNetworkType1',
-                       'AdNetworkType2',
-                       'Date',
-                       'Device',
-                       'ActiveViewCpm',
-                       'ActiveViewCtr',
-                       'ActiveViewImpressions',
-                       'ActiveViewMeasurability',
-                       'ActiveViewMeasurableCost',
-                       'ActiveViewMeasurableImpressions',
-                       'ActiveViewViewability',
-                       'AverageCost',
-                       'AverageCpc',
-                       'AverageCpe',
-                       'AverageCpm',
-                       'AverageCpv',
-                       'AveragePosition',
-                       'Clicks',
-                       'Cost',
-                       'Ctr',
-                       'EngagementRate',
-                       'Engagements',
-                       'Impressions',
-                       'InteractionRate',
-                       'Interactions',
-                       'InteractionTypes',
-                       'VideoViewRate',
-                       'VideoViews'
-        ]
+        self.report_service = self.ormType.report_definition.report_service
+        self.predicate = self.ormType.report_definition.predicate
+        # copied, so that the list of the table class is left untouched
+        self.fields = list(self.ormType.report_fields)
+        self.converter = converter_for(self.ormType, tuple(self.fields), engine)
+        self.encoder = LookupEncoder(self.ormType, self.converter.columns)
+        # the report leaves some key fields empty, the insert doesn't apply
+        # the column defaults to explicit nulls
+        self.defaults = [(self.converter.columns.index(x.name), x.default)
+                         for x in self.ormType.report_definition.fields
+                         if x.default is not None and x.name in self.converter.columns]
+        self.parse_workers = parse_workers
+
+        if self.ormType.report_definition.name in report_registry.ROLLUP_REPORTS:
+            self.rollups = RollupUpdater(session, self.ormType.report_definition.name)
+        else:
+            self.rollups = None
     
-    def get_report(self, start_date, end_date):
+    def download_report(self, start_date, end_date, fields=None):
+        """
+        the report of the given days as a TSV string, without headers. fields
+        default to all the fields of the report.
+        """
+        if fields is None:
+            fields = self.fields
         if isinstance(start_date, datetime.datetime) or isinstance(start_date, datetime.date):
             start_date = start_date.strftime('%Y%m%d')
         if isinstance(end_date, datetime.datetime) or isinstance(end_date, datetime.date):
@@ -93,258 +142,367 @@ class BasePerformanceReport(object):
             where_clause = ''
             
         self.logger.debug("start_date %s \t end_date %s" % (start_date, end_date))
-        report_query = ('SELECT ' + ', '.join(self.fields) +
+        report_query = ('SELECT ' + ', '.join(fields) +
                         ' FROM ' + self.report_service +
                         where_clause +
                         ' During %s,%s' % (start_date, end_date)
         )
 
+        # a download over the chunk deadline is split like the other
+        # timeouts, which is its retry
         try:
-            report_str = self.report_downloader.DownloadReportAsStringWithAwql(
+            report_str = deadlines.call_with_deadline(
+                self.report_downloader.DownloadReportAsStringWithAwql,
                 report_query, 'TSV', skip_report_header=True, skip_column_header=True,
-                skip_report_summary=True, include_zero_impressions=False)
+                skip_report_summary=True, include_zero_impressions=False,
+                seconds=deadlines.CHUNK_TIMEOUT, retries=0,
+                name='download of %s' % self.report_service)
+        except deadlines.TIMEOUTS:
+            # the download given up on may still be running on the
+            # downloader, the next ones are made on a new one
+            self.report_downloader = report_downloader(self.client, renew=True)
+            raise
         except AdWordsReportBadRequestError as e:
+            if not is_unsupported(e):
+                raise
             self.logger.info('Report not supported')
             self.logger.debug(e)
             report_str = ''
+        return report_str
+
+    def download_chunks(self, start_date, end_date):
+        """
+        yields (start, end, report_str, error) covering the given days. When
+        a download fails with a timeout, a server or a size error, its days
+        are split in halves, recursively down to single days. Days which
+        still fail are yielded with report_str None and the error, to be
+        recorded as gaps. Other errors, e.g. an invalid query or denied
+        access, would fail on any day and are raised.
+        """
+        try:
+            report_str = self.download_report(start_date, end_date)
+        except DOWNLOAD_ERRORS as e:
+            if not is_splittable(e):
+                raise
+            if start_date >= end_date:
+                yield start_date, end_date, None, e
+                return
+            middle = start_date + datetime.timedelta(days=(end_date - start_date).days // 2)
+            self.logger.info('download of %s-%s failed (%s), splitting it' %
+                             (start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d'), e))
+            yield from self.download_chunks(start_date, middle)
+            yield from self.download_chunks(middle + datetime.timedelta(days=1), end_date)
+            return
+        yield start_date, end_date, report_str, None
+
+    def record_gap(self, start_date, end_date, error):
+        """
+        remembers days which could not be loaded, for the next run. Commits.
+        """
+        self.logger.warning('could not load %s-%s of %s for %d, recorded as a gap: %s' %
+                            (start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d'),
+                             self.__class__, self.get_customer_id(), error))
+        gap = model.ReportGap()
+        gap.accountId = self.get_customer_id()
+        gap.report = self.ormType.report_definition.name
+        gap.startDate = start_date
+        gap.endDate = end_date
+        gap.error = str(error)[:500]
+        gap.recorded = datetime.datetime.now()
+        self.session.merge(gap)
+        self.session.commit()
+
+    def clear_gaps(self, start_date, end_date):
+        """
+        forgets the gaps starting within the given days, which were loaded.
+        The caller commits.
+        """
+        self.session.query(model.ReportGap).\
+            filter(model.ReportGap.accountId == self.get_customer_id()).\
+            filter(model.ReportGap.report == self.ormType.report_definition.name).\
+            filter(model.ReportGap.startDate >= start_date).\
+            filter(model.ReportGap.startDate <= end_date).\
+            delete(synchronize_session=False)
+
+    def retry_gaps(self, until=None):
+        """
+        loads again the gaps recorded by previous runs, up to until.
+        Returns the number of rows loaded.
+        """
+        query = self.session.query(model.ReportGap).\
+                filter(model.ReportGap.accountId == self.get_customer_id()).\
+                filter(model.ReportGap.report == self.ormType.report_definition.name)
+        if until is not None:
+            query = query.filter(model.ReportGap.startDate <= until)
+        gaps = [(x.startDate, x.endDate) for x in query.order_by(model.ReportGap.startDate)]
+        rows = 0
+        for start_date, end_date in gaps:
+            self.logger.info('retrying gap %s-%s of %s' %
+                             (start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d'),
+                              self.__class__))
+            rows += self.refresh(start_date, end_date)
+        return rows
+
+    def get_report(self, start_date, end_date):
+        report_str = self.download_report(start_date, end_date)
         return [x for x in report_str.split('\n') if x.strip() != '']
 
-    def get_first_date_of_no_data(self):
-        customerId = int(str(self.client.client_customer_id).replace('-',''))
-        last_day = self.session.\
-                   query(sqa.func.max(self.ormType.Date)).\
-                   filter(self.ormType.ExternalCustomerId == customerId).scalar()
+    def get_customer_id(self):
+        return int(str(self.client.client_customer_id).replace('-',''))
+
+    def get_last_day(self, until=None):
+        """
+        the last day of the account in the database, up to until, or None.
+        """
+        query = self.session.\
+                query(sqa.func.max(self.ormType.Date)).\
+                filter(self.ormType.ExternalCustomerId == self.get_customer_id())
+        if until is not None:
+            query = query.filter(self.ormType.Date <= until)
+        return query.scalar()
+
+    def get_first_date_of_no_data(self, until=None):
+        """
+        the day to start downloading from: the day after the last day in the
+        database. The last days in the database are checked for completeness
+        first, and those which turn out incomplete are loaded again. Days
+        after until (e.g. today's partial data loaded by a refresh) are not
+        considered.
+        """
+        last_day = self.get_last_day(until)
         if last_day is None:
-            return datetime.datetime.strptime('2016-01-01', '%Y-%m-%d').date()
-        
-        last_day_gads_format = last_day.strftime('%Y%m%d')
-        last_day_count = self.session.query(self.ormType).\
-                         filter(self.ormType.ExternalCustomerId == customerId).\
-                         filter(self.ormType.Date == last_day).count()
+            return FIRST_DAY
 
-        self.logger.debug('last day in DB %s, %s rows' % (last_day, last_day_count))
-    
-        last_day_report = self.get_report(last_day_gads_format, last_day_gads_format)
+        try:
+            incomplete = self.get_incomplete_days(last_day)
+        except DOWNLOAD_ERRORS as e:
+            if not is_splittable(e):
+                raise
+            self.record_gap(last_day, last_day, e)
+            return last_day + datetime.timedelta(days=1)
+        for day in incomplete:
+            self.logger.info('%s of %s is incomplete, loading it again' %
+                             (day.strftime('%Y%m%d'), self.__class__))
+            self.refresh(day, day)
+        return last_day + datetime.timedelta(days=1)
+
+    def get_incomplete_days(self, last_day):
+        """
+        the days of the COMPLETENESS_DAYS days up to last_day whose sums of
+        COMPLETENESS_MEASURES in the database differ from those of a narrow
+        report with only the date and these measures. Without any of the
+        measures among the fields, only last_day is checked, by comparing
+        its number of rows with its full report.
+        """
+        customerId = self.get_customer_id()
+        measures = [x for x in COMPLETENESS_MEASURES if x in self.fields]
+        if not measures:
+            return self.get_incomplete_last_day(last_day)
+
+        first_day = last_day - datetime.timedelta(days=COMPLETENESS_DAYS - 1)
+        totals = {}
+        query = self.session.\
+                query(self.ormType.Date,
+                      *[sqa.func.sum(getattr(self.ormType, x)) for x in measures]).\
+                filter(self.ormType.ExternalCustomerId == customerId).\
+                filter(self.ormType.Date >= first_day).\
+                filter(self.ormType.Date <= last_day).\
+                group_by(self.ormType.Date)
+        for row in query:
+            totals[row[0]] = [int(x or 0) for x in row[1:]]
 
-        self.logger.debug('gads report row count: %d' % len(last_day_report))
+        fields = ['Date'] + measures
+        converter = converter_for(self.ormType, tuple(fields))
+        report_str = self.download_report(first_day, last_day, fields=fields)
+        report_totals = {}
+        for row in converter.convert_text(report_str):
+            day_totals = report_totals.setdefault(row[0], [0] * len(measures))
+            for i, value in enumerate(row[1:]):
+                day_totals[i] += int(value or 0)
 
+        incomplete = []
+        day = first_day
+        while day <= last_day:
+            if totals.get(day, [0] * len(measures)) != \
+               report_totals.get(day, [0] * len(measures)):
+                self.logger.debug('%s totals: database %s, report %s' %
+                                  (day, totals.get(day), report_totals.get(day)))
+                incomplete.append(day)
+            day += datetime.timedelta(days=1)
+        return incomplete
+
+    def get_incomplete_last_day(self, last_day):
+        customerId = self.get_customer_id()
+        last_day_count = self.session.query(self.ormType).\
+                         filter(self.ormType.ExternalCustomerId == customerId).\
+                         filter(self.ormType.Date == last_day).count()
+        last_day_report = self.get_report(last_day, last_day)
+        self.logger.debug('last day in DB %s, %s rows, gads report row count: %d' %
+                          (last_day, last_day_count, len(last_day_report)))
         if len(last_day_report) != int(last_day_count):
-            deleted_count = self.session.query(self.ormType).\
-                            filter(self.ormType.ExternalCustomerId == customerId).\
-                            filter(self.ormType.Date == last_day).delete()
-            self.session.commit()
-            self.logger.debug('deleted rows: %d' % deleted_count)
-            return last_day
-        else:
-            return last_day + datetime.timedelta(days=1)
+            return [last_day]
+        return []
 
     def get_days_for_chunk_size(self):
         start_date = datetime.datetime.now().date() + datetime.timedelta(days=-7)
         end_date = datetime.datetime.now().date() + datetime.timedelta(days=-1)
-        week_len = max(len(self.get_report(start_date, end_date)), 1)
+        try:
+            week_len = max(len(self.get_report(start_date, end_date)), 1)
+        except DOWNLOAD_ERRORS as e:
+            if not is_splittable(e):
+                raise
+            self.logger.warning('could not estimate the chunk size of %s: %s' %
+                                (self.__class__, e))
+            return 1
         day_len = week_len / 7
         return max(int(math.ceil(self.approximate_chunk_size / day_len)), 1)
         
+    def update_rollups(self, start_date, end_date, commit=True):
+        if self.rollups is not None:
+            self.rollups.update(self.get_customer_id(), start_date, end_date,
+                                commit=commit)
+
+    def convert_report(self, report_str):
+        """
+        converts a downloaded report to the rows of the table, in the order
+        of the report and without creating ORM objects. The values of the
+        encoded fields are replaced by their lookup ids, which adds the new
+        values to the lookup table.
+        """
+        rows = []
+        for x in parse_report(self.converter, report_str, self.parse_workers):
+            rows.extend(x)
+        if self.defaults:
+            rows = [list(x) for x in rows]
+            for row in rows:
+                for position, default in self.defaults:
+                    if row[position] is None:
+                        row[position] = default
+        return self.encoder.encode(self.session, rows)
+
+    def insert_rows(self, rows, batch_size = 20000):
+        """
+        inserts converted rows, the caller commits. Returns the number of
+        rows.
+        """
+        table = self.ormType.__table__
+        columns = self.converter.columns
+        now = datetime.datetime.now()
+        for i in range(0, len(rows), batch_size):
+            self.session.execute(table.insert(),
+                                 [dict(zip(columns, x), _lastUpdated=now)
+                                  for x in rows[i:i + batch_size]])
+        return len(rows)
+
+    def write_report(self, report_str):
+        """
+        converts a downloaded report and inserts its rows. The caller
+        commits. Returns the number of rows.
+        """
+        return self.insert_rows(self.convert_report(report_str))
+
     def dump(self, start_date = None, end_date = None):
-        if start_date == None:
-            start_date = self.get_first_date_of_no_data()
         if end_date == None:
             end_date = datetime.datetime.now().date() + datetime.timedelta(days=-1)
-
-        if isinstance(start_date, str):
-            start_date = datetime.datetime.strptime(start_date, '%Y%m%d').date()
         if isinstance(end_date, str):
             end_date = datetime.datetime.strptime(end_date, '%Y%m%d').date()
+        rows_loaded = self.retry_gaps(until=end_date)
+        if start_date == None:
+            start_date = self.get_first_date_of_no_data(until=end_date)
+        if isinstance(start_date, str):
+            start_date = datetime.datetime.strptime(start_date, '%Y%m%d').date()
+
+        if start_date > end_date:
+            self.logger.info('nothing to fetch for %s' % self.__class__)
+            return rows_loaded
         self.days_iteration = self.get_days_for_chunk_size()
 
         istart_date = start_date
         while True:
             iend_date = min(end_date,
                             istart_date + datetime.timedelta(days = self.days_iteration - 1))
-            report_str = self.get_report(istart_date, iend_date)
-            
-            self.logger.info('fetched %d report rows %s-%s %s' % (len(report_str),
-                                                                  istart_date.strftime('%Y%m%d'),
-                                                                  iend_date.strftime('%Y%m%d'),
-                                                                  self.__class__))
-            self.session.close()
-            ormobjs = []
-            for line in report_str:
-                items = line.split('\t')
-                ormobjs.append(self.ormType(self.fields, items))
-
-            gc.collect()
-            self.logger.info('adding %d report rows %s' % (len(ormobjs), self.__class__))
-            self.session.bulk_save_objects(ormobjs)
-            self.session.commit()
-            self.session.close()
+            for cstart_date, cend_date, report_str, error in \
+                self.download_chunks(istart_date, iend_date):
+                self.session.close()
+                if report_str is None:
+                    self.record_gap(cstart_date, cend_date, error)
+                    continue
+
+                count = self.write_report(report_str)
+                del report_str
+                gc.collect()
+                # in the transaction of the rows, so that a crash can't leave
+                # the rollups of committed days stale
+                self.update_rollups(cstart_date, cend_date, commit=False)
+                self.session.commit()
+                self.logger.info('added %d report rows %s-%s %s' % (count,
+                                                                    cstart_date.strftime('%Y%m%d'),
+                                                                    cend_date.strftime('%Y%m%d'),
+                                                                    self.__class__))
+                self.session.close()
+                rows_loaded += count
         
             istart_date = iend_date + datetime.timedelta(days = 1)
             if istart_date > end_date:
                 break
 
+        return rows_loaded
+
+    def refresh(self, start_date, end_date, rollups=True):
+        """
+        replaces the rows of the given days with a fresh download. The old
+        rows are deleted and the new ones inserted in a single transaction,
+        so readers never see the days empty, along with the rollups. Days
+        which can't be downloaded keep their rows and are recorded as gaps,
+        listed in self.gaps too. With rollups False the rollup tables are
+        left for the caller to update. Returns the number of rows inserted.
+        """
+        customerId = self.get_customer_id()
+        deleted_count = 0
+        count = 0
+        self.gaps = gaps = []
+        for cstart_date, cend_date, report_str, error in \
+            self.download_chunks(start_date, end_date):
+            if report_str is None:
+                gaps.append((cstart_date, cend_date, error))
+                continue
+            # converted before the delete, so that the lookup values are
+            # added while the transaction holds no locks yet
+            rows = self.convert_report(report_str)
+            deleted_count += self.session.query(self.ormType).\
+                             filter(self.ormType.ExternalCustomerId == customerId).\
+                             filter(self.ormType.Date >= cstart_date).\
+                             filter(self.ormType.Date <= cend_date).\
+                             delete(synchronize_session=False)
+            count += self.insert_rows(rows)
+            self.clear_gaps(cstart_date, cend_date)
+        if rollups:
+            self.update_rollups(start_date, end_date, commit=False)
+        self.session.commit()
+        for gap in gaps:
+            self.record_gap(*gap)
+        self.session.close()
+        self.logger.info('refreshed %s-%s %s: %d rows replaced by %d' %
+                         (start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d'),
+                          self.__class__, deleted_count, count))
+        return count
+
         
 class AccountPerformanceReport(BasePerformanceReport):
-    def __init__(self, client, session, approximate_chunk_size = 300000):
-        super().__init__(client, session, approximate_chunk_size)
-        self.report_service = 'ACCOUNT_PERFORMANCE_REPORT'
-        self.ormType = model.AccountPerformance
-
-        self.fields.extend([
-            'ContentBudgetLostImpressionShare',
-            'ContentImpressionShare',
-            'ContentRankLostImpressionShare',
-            'InvalidClickRate',
-            'InvalidClicks',
-            'SearchExactMatchImpressionShare',
-            'SearchImpressionShare',
-            'SearchRankLostImpressionShare',
-            'SearchBudgetLostImpressionShare'])
-            
+    ormType = model.AccountPerformance
+
 
 class CampaignPerformanceReport(BasePerformanceReport):
-    def __init__(self, client, session, approximate_chunk_size = 300000):
-        super().__init__(client, session, approximate_chunk_size)
-        self.report_service = 'CAMPAIGN_PERFORMANCE_REPORT'
-        self.ormType = model.CampaignPerformance
-
-        self.fields.extend([
-            'CampaignId',
-            'AdvertisingChannelSubType',
-            'AdvertisingChannelType',
-            'Amount',
-            'BiddingStrategyId',
-            'BiddingStrategyName',
-            'BiddingStrategyType',
-            'BidType',
-            'BudgetId',
-            'CampaignDesktopBidModifier',
-            'CampaignMobileBidModifier',
-            'CampaignTabletBidModifier',
-            'CampaignTrialType',
-            'ContentBudgetLostImpressionShare',
-            'ContentImpressionShare',
-            'ContentRankLostImpressionShare',
-            'EnhancedCpcEnabled',
-            'EnhancedCpvEnabled',
-            'GmailForwards',
-            'GmailSaves',
-            'GmailSecondaryClicks',
-            'IsBudgetExplicitlyShared',
-            'InvalidClickRate',
-            'InvalidClicks',
-            'SearchExactMatchImpressionShare',
-            'SearchImpressionShare',
-            'SearchRankLostImpressionShare',
-            'SearchBudgetLostImpressionShare'])
+    ormType = model.CampaignPerformance
 
 
 class AdGroupPerformanceReport(BasePerformanceReport):
-    def __init__(self, client, session, approximate_chunk_size = 300000):
-        super().__init__(client, session, approximate_chunk_size)
-        self.report_service = 'ADGROUP_PERFORMANCE_REPORT'
-        self.ormType = model.AdGroupPerformance
-
-        self.fields.extend([
-            'AdGroupId',
-            'AdGroupDesktopBidModifier',
-            'AdGroupMobileBidModifier',
-            'AdGroupTabletBidModifier',
-            'BiddingStrategyId',
-            'BiddingStrategyName',
-            'BiddingStrategySource',
-            'BiddingStrategyType',
-            'BidType',
-            'ContentBidCriterionTypeGroup',
-            'ContentImpressionShare',
-            'ContentRankLostImpressionShare',
-            'CpcBid',
-            'CpmBid',
-            'CpvBid',
-            'EnhancedCpcEnabled',
-            'EnhancedCpvEnabled',
-            'GmailForwards',
-            'GmailSaves',
-            'GmailSecondaryClicks',
-            'SearchExactMatchImpressionShare',
-            'SearchImpressionShare',
-            'SearchRankLostImpressionShare',
-            'TargetCpa',
-            'TargetCpaBidSource'
-        ])
+    ormType = model.AdGroupPerformance
 
 
 class CriterionPerformanceReport(BasePerformanceReport):
-    def __init__(self, client, session, approximate_chunk_size = 300000):
-        super().__init__(client, session, approximate_chunk_size)
-        self.report_service = 'CRITERIA_PERFORMANCE_REPORT'
-        self.ormType = model.CriterionPerformance
-
-        self.fields.extend([
-            'CampaignId',
-            'AdGroupId',
-            'Id',
-            'BidModifier',
-            'BidType',
-            'CpcBid',
-            'CpcBidSource',
-            'CpmBid',
-            'CpvBid',
-            'CpvBidSource',
-            'CreativeQualityScore',
-            'Criteria',
-            'EnhancedCpcEnabled',
-            'EnhancedCpvEnabled',
-            'EstimatedAddClicksAtFirstPositionCpc',
-            'EstimatedAddCostAtFirstPositionCpc',
-            'FirstPageCpc',
-            'FirstPositionCpc',
-            'GmailForwards',
-            'GmailSaves',
-            'GmailSecondaryClicks',
-            'HasQualityScore',
-            'PostClickQualityScore',
-            'QualityScore',
-            'SearchPredictedCtr',
-            'TopOfPageCpc'
-        ])
+    ormType = model.CriterionPerformance
 
 
 class KeywordPerformanceReport(BasePerformanceReport):
-    def __init__(self, client, session, approximate_chunk_size = 300000):
-        super().__init__(client, session, approximate_chunk_size)
-        self.report_service = 'KEYWORDS_PERFORMANCE_REPORT'
-        self.ormType = model.KeywordPerformance
-        self.predicate = 'IsNegative IN [true, false]'
-    
-        self.fields.extend([
-            'CampaignId',
-            'AdGroupId',
-            'Id',
-            'BiddingStrategyId',
-            'BiddingStrategyName',
-            'BiddingStrategySource',
-            'BiddingStrategyType',
-            'BidType',
-            'CpcBid',
-            'CpcBidSource',
-            'CpmBid',
-            'CreativeQualityScore',
-            'Criteria',
-            'EnhancedCpcEnabled',
-            'EstimatedAddClicksAtFirstPositionCpc',
-            'EstimatedAddCostAtFirstPositionCpc',
-            'FirstPageCpc',
-            'FirstPositionCpc',
-            'GmailForwards',
-            'GmailSaves',
-            'GmailSecondaryClicks',
-            'HasQualityScore',
-            'PostClickQualityScore',
-            'QualityScore',
-            'SearchExactMatchImpressionShare',
-            'SearchImpressionShare',
-            'SearchPredictedCtr',
-            'SearchRankLostImpressionShare',
-            'TopOfPageCpc'
-        ])
+    ormType = model.KeywordPerformance
@@ -0,0 +1,136 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import sqlalchemy as sqa
+
+from objects import model
+from objects.migrate import decoded_columns
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = None
+    pd = None
+
+BATCH_SIZE = 10000
+
+
+class PerformanceReader:
+    """
+    streams the rows of a performance table without loading ORM objects:
+    the query runs with a server-side cursor where the driver has one, and
+    its rows are fetched batch_size at a time, so that memory stays the
+    same however many rows match.
+
+    report is one of model.REPORT_MODELS, e.g. 'keyword'. columns default
+    to all the columns of the table. With names, the rows also get the
+    CampaignName and AdGroupName of their campaign and adgroup, when the
+    table has these ids. Encoded fields are read as their string values.
+
+        reader = PerformanceReader(session, 'keyword', ['Date', 'Id', 'Clicks'])
+        for frame in reader.frames(accounts=[1234567890],
+                                   start_date=datetime.date(2016, 1, 1)):
+            ...
+    """
+    def __init__(self, session, report, columns=None, names=False,
+                 batch_size=BATCH_SIZE):
+        self.session = session
+        self.ormType = model.REPORT_MODELS[report]
+        table = self.ormType.__table__
+        if columns is None:
+            columns = [x.name for x in table.columns if x.name != '_lastUpdated']
+        self.columns = [table.c[x] for x in columns]
+        self.names = names
+        self.batch_size = batch_size
+
+    def query(self, accounts=None, start_date=None, end_date=None,
+              campaigns=None, adgroups=None):
+        """
+        the select of the rows of the given accounts, days (both included),
+        campaigns and adgroups; None means no filter.
+        """
+        table = self.ormType.__table__
+        columns, source = decoded_columns(self.ormType, self.columns)
+        if self.names and 'CampaignId' in table.c:
+            campaign = model.Campaign.__table__
+            columns.append(campaign.c.name.label('CampaignName'))
+            source = source.outerjoin(campaign, campaign.c.id == table.c.CampaignId)
+        if self.names and 'AdGroupId' in table.c:
+            adgroup = model.AdGroup.__table__
+            columns.append(adgroup.c.name.label('AdGroupName'))
+            source = source.outerjoin(adgroup, adgroup.c.id == table.c.AdGroupId)
+
+        query = sqa.select(columns).select_from(source)
+        if accounts is not None:
+            query = query.where(table.c.ExternalCustomerId.in_(list(accounts)))
+        if start_date is not None:
+            query = query.where(table.c.Date >= start_date)
+        if end_date is not None:
+            query = query.where(table.c.Date <= end_date)
+        for name, ids in (('CampaignId', campaigns), ('AdGroupId', adgroups)):
+            if ids is None:
+                continue
+            if name not in table.c:
+                raise ValueError('%s has no %s column' % (table.name, name))
+            query = query.where(table.c[name].in_(list(ids)))
+        return query
+
+    def column_names(self):
+        return [x.name for x in self.query().columns]
+
+    def batches(self, **filters):
+        """
+        yields lists of at most batch_size row tuples. Takes the filters of
+        query.
+        """
+        connection = self.session.connection().execution_options(stream_results=True)
+        result = connection.execute(self.query(**filters))
+        try:
+            while True:
+                rows = result.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                yield [tuple(x) for x in rows]
+        finally:
+            result.close()
+
+    def arrays(self, **filters):
+        """
+        yields the batches as {column: numpy array}.
+        """
+        if np is None:
+            raise ImportError('arrays need numpy')
+        names = self.column_names()
+        for rows in self.batches(**filters):
+            yield {x: np.array(y) for x, y in zip(names, zip(*rows))}
+
+    def frames(self, **filters):
+        """
+        yields the batches as pandas DataFrames.
+        """
+        if pd is None:
+            raise ImportError('frames need pandas')
+        names = self.column_names()
+        for rows in self.batches(**filters):
+            yield pd.DataFrame.from_records(rows, columns=names)
@@ -0,0 +1,157 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import logging
+import sqlalchemy as sqa
+
+from objects import model
+from objects import report_registry
+
+
+def week_start(day):
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def week_end(day):
+    return week_start(day) + datetime.timedelta(days=6)
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def month_end(day):
+    next_month = (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return next_month - datetime.timedelta(days=1)
+
+
+# coarser grains are summed up from the daily rollup, not from the report
+PERIODS = [('week', week_start, week_end),
+           ('month', month_start, month_end)]
+
+
+class RollupUpdater:
+    """
+    keeps the rollups of a report table up to date. Only the days of the
+    given date range, and the weeks and months containing them, are
+    recomputed.
+    """
+    def __init__(self, session, report_name):
+        self.session = session
+        self.source = model.REPORT_MODELS[report_name]
+        self.rollups = [model.ROLLUP_MODELS[(report_name, level)]
+                        for level in report_registry.ROLLUP_LEVELS]
+        self.logger = logging.getLogger('googleads')
+
+    def _update_days(self, rollup, customerId, start_date, end_date):
+        table = rollup.__table__
+        source = self.source.__table__
+        self.session.execute(
+            table.delete().\
+            where(table.c.Grain == 'day').\
+            where(table.c.ExternalCustomerId == customerId).\
+            where(table.c.PeriodStart.between(start_date, end_date)))
+
+        keys = [source.c[x] for x in rollup.rollup_keys]
+        select = sqa.select(
+            [sqa.literal('day'), source.c.Date, source.c.ExternalCustomerId] +
+            keys +
+            [sqa.func.sum(source.c[x]) for x in rollup.rollup_measures]).\
+            where(source.c.ExternalCustomerId == customerId).\
+            where(source.c.Date.between(start_date, end_date)).\
+            group_by(*([source.c.Date, source.c.ExternalCustomerId] + keys))
+        self.session.execute(table.insert().from_select(
+            ['Grain', 'PeriodStart', 'ExternalCustomerId'] +
+            rollup.rollup_keys + rollup.rollup_measures,
+            select))
+
+    def _update_periods(self, rollup, customerId, start_date, end_date,
+                        grain, period_start, period_end):
+        table = rollup.__table__
+        first = period_start(start_date)
+        last = period_end(end_date)
+        self.session.execute(
+            table.delete().\
+            where(table.c.Grain == grain).\
+            where(table.c.ExternalCustomerId == customerId).\
+            where(table.c.PeriodStart.between(first, last)))
+
+        days = self.session.execute(
+            sqa.select([table.c.PeriodStart] +
+                       [table.c[x] for x in rollup.rollup_keys] +
+                       [table.c[x] for x in rollup.rollup_measures]).\
+            where(table.c.Grain == 'day').\
+            where(table.c.ExternalCustomerId == customerId).\
+            where(table.c.PeriodStart.between(first, last)))
+        n_keys = len(rollup.rollup_keys)
+        sums = {}
+        for row in days:
+            key = (period_start(row[0]),) + tuple(row[1:1 + n_keys])
+            values = sums.setdefault(key, [None] * len(rollup.rollup_measures))
+            for i, value in enumerate(row[1 + n_keys:]):
+                if value is not None:
+                    values[i] = value if values[i] is None else values[i] + value
+
+        rows = []
+        for key, values in sums.items():
+            row = {'Grain': grain,
+                   'PeriodStart': key[0],
+                   'ExternalCustomerId': customerId}
+            row.update(zip(rollup.rollup_keys, key[1:]))
+            row.update(zip(rollup.rollup_measures, values))
+            rows.append(row)
+        if rows:
+            self.session.execute(table.insert(), rows)
+
+    def update(self, customerId, start_date, end_date, commit=True):
+        """
+        recomputes the rollups of the account for the days between
+        start_date and end_date, and the weeks and months they fall in, in
+        one transaction. With commit False the transaction is left open, for
+        the caller to commit along with the report rows the rollups sum up.
+        """
+        for rollup in self.rollups:
+            self._update_days(rollup, customerId, start_date, end_date)
+            for grain, period_start, period_end in PERIODS:
+                self._update_periods(rollup, customerId, start_date, end_date,
+                                     grain, period_start, period_end)
+        if commit:
+            self.session.commit()
+        self.logger.debug('updated rollups of %s for %d, %s-%s' %
+                          (self.source.__tablename__, customerId,
+                           start_date, end_date))
+
+    def rebuild(self):
+        """
+        recomputes the rollups of all accounts over their whole history, to
+        fill them in the first time.
+        """
+        ranges = self.session.query(self.source.ExternalCustomerId,
+                                    sqa.func.min(self.source.Date),
+                                    sqa.func.max(self.source.Date)).\
+                 group_by(self.source.ExternalCustomerId).all()
+        for customerId, start_date, end_date in ranges:
+            self.logger.info('rebuilding rollups of %s for %d' %
+                             (self.source.__tablename__, customerId))
+            self.update(customerId, start_date, end_date)
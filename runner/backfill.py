@@ -0,0 +1,209 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import logging
+import queue
+import threading
+
+from objects import model
+from objects import report_registry
+from reports.rollups import RollupUpdater
+from runner.pipeline import import_type, sync_entities, REPORT_TYPES, FULL_SYNC_DAYS
+from runner.profiler import stage
+
+PARTITION_DAYS = 7
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+logger = logging.getLogger('googleads')
+
+
+class PartitionGaps(Exception):
+    """
+    some days of a partition could not be downloaded; the others are loaded
+    and the partition is marked failed, to be loaded again.
+    """
+    def __init__(self, rows, gaps):
+        super().__init__('%d days not downloaded' %
+                         sum((y - x).days + 1 for x, y, e in gaps))
+        self.rows = rows
+        self.gaps = gaps
+
+
+def partitions(start_date, end_date, days=PARTITION_DAYS):
+    """
+    splits the days from start_date to end_date, both included, into
+    (start, end) partitions of the given number of days, the last one
+    possibly shorter.
+    """
+    res = []
+    start = start_date
+    while start <= end_date:
+        end = min(end_date, start + datetime.timedelta(days=days - 1))
+        res.append((start, end))
+        start = end + datetime.timedelta(days=1)
+    return res
+
+
+class Backfill:
+    """
+    loads the reports of one account over a date range, split into date
+    partitions which are downloaded and loaded concurrently by worker
+    threads, each with its own client and session. Every partition replaces
+    its days in a single transaction, so loading it again is harmless, and
+    its progress is kept in the backfill progress table: running the same
+    backfill again only loads the partitions which are not done. The
+    rollups are updated once, at the end of every run, so that resuming an
+    interrupted backfill brings them up to date too.
+    """
+    def __init__(self, make_client, Session, accountId, start_date, end_date,
+                 reports=None, workers=4, partition_days=PARTITION_DAYS,
+                 parse_workers=0, engine='rows'):
+        self.make_client = make_client
+        self.Session = Session
+        self.accountId = accountId
+        self.start_date = start_date
+        self.end_date = end_date
+        self.reports = reports if reports is not None else list(REPORT_TYPES.keys())
+        self.workers = max(int(workers), 1)
+        self.partition_days = partition_days
+        self.parse_workers = parse_workers
+        self.engine = engine
+
+    def plan(self, session):
+        """
+        records the partitions of the backfill which are not known yet as
+        pending, and returns the (report, start, end) of those not done.
+        """
+        known = {(x.report, x.startDate): x for x in session.query(model.BackfillProgress).\
+                 filter(model.BackfillProgress.accountId == self.accountId).\
+                 filter(model.BackfillProgress.report.in_(self.reports))}
+        todo = []
+        for name in self.reports:
+            for start, end in partitions(self.start_date, self.end_date,
+                                         self.partition_days):
+                progress = known.get((name, start))
+                if progress is not None and progress.endDate == end and \
+                   progress.status == DONE:
+                    continue
+                if progress is None:
+                    progress = model.BackfillProgress()
+                    progress.accountId = self.accountId
+                    progress.report = name
+                    progress.startDate = start
+                    session.add(progress)
+                progress.endDate = end
+                progress.status = PENDING
+                progress.updated = datetime.datetime.now()
+                todo.append((name, start, end))
+        session.commit()
+        return todo
+
+    def set_status(self, session, name, start, status, rows=None):
+        progress = session.query(model.BackfillProgress).\
+                   get((self.accountId, name, start))
+        progress.status = status
+        progress.rowCount = rows
+        progress.updated = datetime.datetime.now()
+        session.commit()
+
+    def load_partition(self, client, session, name, start, end, rollups=False):
+        report = import_type(REPORT_TYPES, name)(client, session,
+                                                 parse_workers=self.parse_workers,
+                                                 engine=self.engine)
+        with stage('%s.refresh' % type(report).__name__):
+            rows = report.refresh(start, end, rollups=rollups)
+        if report.gaps:
+            self.set_status(session, name, start, FAILED, rows)
+            raise PartitionGaps(rows, report.gaps)
+        self.set_status(session, name, start, DONE, rows)
+        return rows
+
+    def _work(self, tasks, failed):
+        client = self.make_client()
+        client.client_customer_id = self.accountId
+        session = self.Session()
+        while True:
+            try:
+                name, start, end = tasks.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                self.load_partition(client, session, name, start, end)
+            except PartitionGaps as e:
+                logger.error('backfill of %s %s-%s incomplete: %s' %
+                             (name, start.strftime('%Y%m%d'), end.strftime('%Y%m%d'), e))
+                failed.append((name, start, end))
+            except Exception:
+                logger.exception('backfill of %s %s-%s failed' %
+                                 (name, start.strftime('%Y%m%d'), end.strftime('%Y%m%d')))
+                session.rollback()
+                self.set_status(session, name, start, FAILED)
+                failed.append((name, start, end))
+        session.close()
+
+    def run(self, entities=None, incremental=False, full_sync_days=FULL_SYNC_DAYS):
+        """
+        syncs the entities of the account, so that the report rows find
+        them, then loads the partitions which are not done. Returns the
+        list of (report, start, end) which failed.
+        """
+        session = self.Session()
+        if entities is None or entities:
+            client = self.make_client()
+            client.client_customer_id = self.accountId
+            with stage('sync_entities'):
+                sync_entities(client, session, self.accountId, incremental=incremental,
+                              full_sync_days=full_sync_days, entities=entities)
+        todo = self.plan(session)
+        session.close()
+        logger.info('backfill of %d %s-%s: %d partitions to load' %
+                    (self.accountId, self.start_date.strftime('%Y%m%d'),
+                     self.end_date.strftime('%Y%m%d'), len(todo)))
+
+        tasks = queue.Queue()
+        for task in todo:
+            tasks.put(task)
+        failed = []
+        threads = [threading.Thread(target=self._work, args=(tasks, failed))
+                   for i in range(min(self.workers, len(todo)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # the rollups of all partitions, including those loaded by earlier
+        # runs of the backfill, and of any failed ones which kept old rows
+        session = self.Session()
+        for name in self.reports:
+            if name in report_registry.ROLLUP_REPORTS:
+                RollupUpdater(session, name).update(self.accountId, self.start_date,
+                                                    self.end_date)
+        session.close()
+
+        if failed:
+            logger.error('backfill: %d partitions failed, run it again to retry them' %
+                         len(failed))
+        return failed
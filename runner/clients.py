@@ -0,0 +1,68 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import logging
+from os.path import join, expanduser
+
+from googleads import adwords
+
+from objects import deadlines
+from runner.token_cache import TOKEN_CACHE_PATH, FileTokenCache, CachedOAuth2Client
+
+logger = logging.getLogger('googleads')
+
+# the WSDLs and schemas of a versioned API don't change
+WSDL_CACHE_DIR = join(expanduser('~'), '.cache', 'google-adwords-dumper', 'wsdl')
+WSDL_CACHE_DAYS = 30
+
+
+def make_adwords_client(path=None, cache_dir=WSDL_CACHE_DIR, cache_days=WSDL_CACHE_DAYS,
+                        token_cache=TOKEN_CACHE_PATH, timeout=None):
+    """
+    loads an AdWordsClient from its googleads.yaml (the one in the home
+    folder by default). With cache_dir, the WSDL and schema documents its
+    services download are kept parsed in that folder by suds, and reused
+    by later runs instead of being fetched and parsed again. With
+    token_cache, the access token is shared with the other clients and
+    processes using the same file (see runner.token_cache). timeout is
+    the seconds after which the SOAP and report transports give up a
+    stalled request, deadlines.CALL_TIMEOUT by default, so that a call
+    given up on by objects.deadlines ends too.
+    """
+    if path is None:
+        client = adwords.AdWordsClient.LoadFromStorage()
+    else:
+        client = adwords.AdWordsClient.LoadFromStorage(path)
+    if timeout is None:
+        timeout = deadlines.CALL_TIMEOUT
+    if timeout:
+        client.timeout = timeout
+    if cache_dir:
+        from suds.cache import ObjectCache
+
+        client.cache = ObjectCache(location=cache_dir, days=cache_days)
+        logger.debug('caching the WSDLs in %s' % cache_dir)
+    if token_cache:
+        client.oauth2_client = CachedOAuth2Client(client.oauth2_client,
+                                                  FileTokenCache(token_cache))
+    return client
@@ -0,0 +1,164 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import itertools
+import logging
+import time
+
+from objects.accounts import Accounts
+from runner.pipeline import process_account, refresh_account, FULL_SYNC_DAYS
+from runner.scheduler import AccountScheduler
+from runner.profiler import stage
+from runner.freshness import load_latest_day
+
+
+def all_accounts(client, session):
+    """
+    fetches the whole account graph and writes it to the database. None of
+    the accounts skips the entity sync.
+    """
+    accounts = Accounts()
+    accounts.load(client)
+    with stage('Accounts.dump'):
+        accounts.dump(session)
+    return accounts.accounts, set()
+
+
+class Daemon:
+    """
+    keeps the adwords clients, the database connection pool and the account
+    graph alive between runs. Once a day, after nightly_hour, it runs the
+    full cycle; the rest of the time it replaces today's and yesterday's
+    report rows every refresh_minutes minutes. With fresh_first, the
+    nightly cycle loads yesterday of every account before the rest.
+
+    select_accounts(client, session) returns the accounts to process
+    ({accountId: account}) and the set of those which skip the entity sync,
+    and entities and reports limit the stages run as in process_account.
+    """
+    def __init__(self, make_client, Session, workers=1,
+                 refresh_minutes=30, nightly_hour=3, refresh_days=2,
+                 incremental=False, full_sync_days=FULL_SYNC_DAYS,
+                 select_accounts=all_accounts, entities=None, reports=None,
+                 parse_workers=0, engine='rows', fresh_first=False):
+        self.Session = Session
+        self.workers = max(int(workers), 1)
+        self.refresh_minutes = refresh_minutes
+        self.nightly_hour = nightly_hour
+        self.refresh_days = refresh_days
+        self.incremental = incremental
+        self.full_sync_days = full_sync_days
+        self.select_accounts = select_accounts
+        self.entities = entities
+        self.reports = reports
+        self.parse_workers = parse_workers
+        self.engine = engine
+        self.fresh_first = fresh_first
+        self.logger = logging.getLogger('googleads')
+
+        # one warm client per worker, handed out in turn on every run
+        self.clients = [make_client() for i in range(self.workers)]
+        self.accounts = None
+        self.dormant = set()
+        self.last_nightly = None
+
+    def load_accounts(self):
+        session = self.Session()
+        self.accounts, self.dormant = self.select_accounts(self.clients[0], session)
+        session.close()
+
+    def _run(self, process, record_stats):
+        session = self.Session()
+        scheduler = AccountScheduler(session, self.workers)
+        clients = itertools.cycle(self.clients)
+        failed = scheduler.run(self.accounts, process,
+                               lambda: next(clients), self.Session,
+                               record_stats=record_stats)
+        session.close()
+        if failed:
+            self.logger.error('failed accounts: %s' %
+                              ', '.join([str(x) for x in failed]))
+
+    def entities_of(self, accountId):
+        return [] if accountId in self.dormant else self.entities
+
+    def nightly(self):
+        self.logger.info('starting nightly cycle')
+        self.load_accounts()
+
+        def process(client, session, accountId, account):
+            return process_account(client, session, accountId, account,
+                                   incremental=self.incremental,
+                                   full_sync_days=self.full_sync_days,
+                                   entities=self.entities_of(accountId),
+                                   reports=self.reports,
+                                   parse_workers=self.parse_workers,
+                                   engine=self.engine)
+
+        if self.fresh_first:
+            def latest(client, session, accountId, account):
+                return load_latest_day(client, session, accountId, account,
+                                       full_sync_days=self.full_sync_days,
+                                       entities=self.entities_of(accountId),
+                                       reports=self.reports,
+                                       parse_workers=self.parse_workers,
+                                       engine=self.engine)
+            self._run(latest, record_stats=False)
+        self._run(process, record_stats=True)
+        self.last_nightly = datetime.datetime.now().date()
+
+    def refresh(self):
+        self.logger.info('starting refresh of the last %d days' % self.refresh_days)
+        if self.accounts is None:
+            self.load_accounts()
+
+        def process(client, session, accountId, account):
+            return refresh_account(client, session, accountId, account,
+                                   days=self.refresh_days,
+                                   full_sync_days=self.full_sync_days,
+                                   entities=self.entities_of(accountId),
+                                   reports=self.reports,
+                                   parse_workers=self.parse_workers,
+                                   engine=self.engine)
+        self._run(process, record_stats=False)
+
+    def nightly_due(self, now):
+        return self.last_nightly != now.date() and now.hour >= self.nightly_hour
+
+    def run_forever(self):
+        while True:
+            started = datetime.datetime.now()
+            try:
+                if self.nightly_due(started):
+                    self.nightly()
+                else:
+                    self.refresh()
+            except Exception:
+                self.logger.exception('daemon cycle failed')
+
+            next_run = started + datetime.timedelta(minutes=self.refresh_minutes)
+            wait = (next_run - datetime.datetime.now()).total_seconds()
+            if wait > 0:
+                self.logger.info('next run at %s' % next_run)
+                time.sleep(wait)
@@ -0,0 +1,130 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import logging
+
+from objects import model
+from objects.deadlines import DeadlineExceeded
+from runner.backfill import Backfill, PartitionGaps, DONE, FAILED, PARTITION_DAYS
+from runner.pipeline import import_type, sync_entities, REPORT_TYPES, FULL_SYNC_DAYS
+from runner.profiler import stage
+
+logger = logging.getLogger('googleads')
+
+
+def load_latest_day(client, session, accountId, account, reports=None,
+                    incremental=True, full_sync_days=FULL_SYNC_DAYS, entities=None,
+                    partition_days=PARTITION_DAYS, parse_workers=0, engine='rows'):
+    """
+    phase one of a fresh-first run: loads yesterday's rows of the reports
+    of the account which don't have them yet, after syncing its entities
+    (incrementally by default) so that the rows find their campaigns,
+    adgroups and criteria; entities limits the sync as in process_account.
+    The older missing days, back to the last day in the database, are
+    recorded as pending backfill partitions, which process_account loads.
+    Reports without any row of the account are left to phase two, which
+    loads their history in chunks sized by their volume. Returns the
+    number of report rows loaded.
+    """
+    if reports is None:
+        reports = list(REPORT_TYPES.keys())
+
+    client.client_customer_id = accountId
+    yesterday = datetime.datetime.now().date() - datetime.timedelta(days=1)
+    rows = 0
+    synced = False
+    for name in reports:
+        session.close()
+        report = import_type(REPORT_TYPES, name)(client, session,
+                                                 parse_workers=parse_workers,
+                                                 engine=engine)
+        last_day = report.get_last_day(until=yesterday)
+        if last_day is None or last_day == yesterday:
+            continue
+        # only accounts missing yesterday pay for the sync
+        if not synced:
+            with stage('sync_entities'):
+                if not sync_entities(client, session, accountId, incremental=incremental,
+                                     full_sync_days=full_sync_days, entities=entities):
+                    break
+            synced = True
+        with stage('%s.refresh' % type(report).__name__):
+            rows += report.refresh(yesterday, yesterday)
+
+        start = last_day + datetime.timedelta(days=1)
+        end = yesterday - datetime.timedelta(days=1)
+        if start <= end:
+            logger.info('%s-%s of %s for %d deferred' %
+                        (start.strftime('%Y%m%d'), end.strftime('%Y%m%d'),
+                         name, accountId))
+            Backfill(None, None, accountId, start, end, reports=[name],
+                     partition_days=partition_days).plan(session)
+    session.close()
+    return rows
+
+
+def load_deferred(client, session, accountId, reports=None, parse_workers=0,
+                  engine='rows'):
+    """
+    loads the backfill partitions of the account which are not done,
+    oldest first, those deferred by load_latest_day as well as those of
+    interrupted backfills; process_account calls it after the entity sync.
+    A partition which fails is marked so and tried again on the next run.
+    Returns the number of report rows loaded.
+    """
+    if reports is None:
+        reports = list(REPORT_TYPES.keys())
+
+    client.client_customer_id = accountId
+    todo = [(x.report, x.startDate, x.endDate) for x in
+            session.query(model.BackfillProgress).\
+            filter(model.BackfillProgress.accountId == accountId).\
+            filter(model.BackfillProgress.report.in_(reports)).\
+            filter(model.BackfillProgress.status != DONE).\
+            order_by(model.BackfillProgress.startDate)]
+    rows = 0
+    for name, start, end in todo:
+        backfill = Backfill(None, None, accountId, start, end, reports=[name],
+                            workers=1, parse_workers=parse_workers, engine=engine)
+        try:
+            # one at a time, so each partition updates its rollups in the
+            # transaction of its rows
+            rows += backfill.load_partition(client, session, name, start, end,
+                                            rollups=True)
+        except DeadlineExceeded:
+            # the account is given up, the partition stays pending
+            raise
+        except PartitionGaps as e:
+            logger.error('deferred %s %s-%s of %d incomplete: %s' %
+                         (name, start.strftime('%Y%m%d'), end.strftime('%Y%m%d'),
+                          accountId, e))
+            rows += e.rows
+        except Exception:
+            logger.exception('deferred %s %s-%s of %d failed' %
+                             (name, start.strftime('%Y%m%d'), end.strftime('%Y%m%d'),
+                              accountId))
+            session.rollback()
+            backfill.set_status(session, name, start, FAILED)
+    session.close()
+    return rows
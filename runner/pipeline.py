@@ -0,0 +1,226 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import importlib
+import logging
+import gc
+from collections import OrderedDict
+
+from objects import model
+from objects.change_history import ChangeHistory, MAX_HISTORY_DAYS
+from runner.profiler import stage
+
+# the entity and report classes are only imported when a stage using them
+# runs, so that targeted runs don't pay for the rest.
+ENTITY_TYPES = OrderedDict([
+    ('campaigns', ('objects.campaigns', 'Campaigns')),
+    ('adgroups', ('objects.adgroups', 'AdGroups')),
+    ('criteria', ('objects.adgroup_criteria', 'AdGroupCriteria')),
+])
+
+REPORT_TYPES = OrderedDict([
+    ('account', ('reports.performance_reports', 'AccountPerformanceReport')),
+    ('campaign', ('reports.performance_reports', 'CampaignPerformanceReport')),
+    ('adgroup', ('reports.performance_reports', 'AdGroupPerformanceReport')),
+    ('criterion', ('reports.performance_reports', 'CriterionPerformanceReport')),
+    ('keyword', ('reports.performance_reports', 'KeywordPerformanceReport')),
+])
+
+# number of days after which an incremental sync falls back to a full one
+FULL_SYNC_DAYS = 7
+# changes are asked for starting a bit before the last sync, so that nothing
+# falls between two runs because of clock differences.
+SYNC_OVERLAP = datetime.timedelta(minutes=10)
+
+logger = logging.getLogger('googleads')
+
+
+def import_type(types, name):
+    module_name, class_name = types[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def dump(obj, session):
+    with stage('%s.dump' % type(obj).__name__):
+        obj.dump(session)
+
+
+def sync_entities(client, session, accountId, incremental=False,
+                  full_sync_days=FULL_SYNC_DAYS, entities=None):
+    """
+    syncs the campaigns, adgroups and adgroup criteria of the account, or
+    only the entity types listed in entities.
+
+    If incremental is True and the account has been fully synced within the
+    last full_sync_days days, only the adgroups and criteria which
+    CustomerSyncService reports as changed since the last sync are fetched.
+    Campaigns are always fetched in full; they are few, and the change
+    history can only be asked for campaigns we already know about.
+
+    Returns False if the account has no campaigns.
+    """
+    if entities is None:
+        entities = list(ENTITY_TYPES.keys())
+
+    started = datetime.datetime.utcnow()
+    sync = session.query(model.EntitySync).get(accountId)
+    last_sync = sync.lastSync if sync is not None else None
+    last_full_sync = sync.lastFullSync if sync is not None else None
+    full = (not incremental or
+            last_sync is None or last_full_sync is None or
+            started - last_full_sync > datetime.timedelta(days=full_sync_days) or
+            started - last_sync > datetime.timedelta(days=MAX_HISTORY_DAYS - 1))
+
+    if 'campaigns' in entities:
+        campaigns = import_type(ENTITY_TYPES, 'campaigns')(accountId)
+        campaigns.load(client)
+        campaign_ids = list(campaigns.campaigns.keys())
+    else:
+        campaigns = None
+        campaign_ids = [x for x, in session.query(model.Campaign.id).\
+                        filter(model.Campaign.accountId == accountId)]
+    if len(campaign_ids) == 0:
+        # recorded all the same, so that accounts without campaigns, such as
+        # managers, can be found dormant and skipped
+        record_sync(session, accountId, entities, started, full, last_full_sync)
+        return False
+
+    adgroup_ids = None
+    criteria_adgroup_ids = None
+    if not full and ('adgroups' in entities or 'criteria' in entities):
+        history = ChangeHistory(accountId)
+        history.load(client, campaign_ids, last_sync - SYNC_OVERLAP, started)
+        adgroup_ids = history.changed_adgroups
+        criteria_adgroup_ids = history.changed_criteria_adgroups
+
+    if campaigns is not None:
+        dump(campaigns, session)
+
+    if 'adgroups' in entities and (adgroup_ids is None or adgroup_ids):
+        adgroups = import_type(ENTITY_TYPES, 'adgroups')(accountId)
+        adgroups.load(client, ids=adgroup_ids)
+        dump(adgroups, session)
+
+    if 'criteria' in entities and (criteria_adgroup_ids is None or criteria_adgroup_ids):
+        adgroupcriteria = import_type(ENTITY_TYPES, 'criteria')(accountId)
+        adgroupcriteria.load(client, adgroup_ids=criteria_adgroup_ids)
+        dump(adgroupcriteria, session)
+
+    record_sync(session, accountId, entities, started, full, last_full_sync)
+    return True
+
+
+def record_sync(session, accountId, entities, started, full, last_full_sync):
+    # a partial sync would make the next incremental one miss changes
+    if set(entities) == set(ENTITY_TYPES.keys()):
+        sync = model.EntitySync()
+        sync.accountId = accountId
+        sync.lastSync = started
+        sync.lastFullSync = started if full else last_full_sync
+        session.merge(sync)
+        session.commit()
+
+
+def process_account(client, session, accountId, account,
+                    start_date=None, end_date=None,
+                    incremental=False, full_sync_days=FULL_SYNC_DAYS,
+                    entities=None, reports=None, parse_workers=0, engine='rows'):
+    """
+    syncs the entities of the given account and dumps its performance
+    reports; entities and reports limit the stages to the listed entity
+    types and report names (all of them if None). parse_workers is the
+    size of the process pool converting large report chunks, and engine
+    the conversion engine. Returns the number of report rows loaded.
+    """
+    if reports is None:
+        reports = list(REPORT_TYPES.keys())
+
+    logger.info('processing (%d) %s' % (accountId, account.name))
+    client.client_customer_id = accountId
+
+    with stage('sync_entities'):
+        synced = sync_entities(client, session, accountId, incremental=incremental,
+                               full_sync_days=full_sync_days, entities=entities)
+    if not synced:
+        return 0
+
+    # the days deferred by fresh-first runs and the partitions of failed or
+    # interrupted backfills lie before the last day in the database, which
+    # the dumps continue from; freshness imports this module
+    from runner.freshness import load_deferred
+    rows = load_deferred(client, session, accountId, reports=reports,
+                         parse_workers=parse_workers, engine=engine)
+    for name in reports:
+        session.close()
+        gc.collect()
+
+        report = import_type(REPORT_TYPES, name)(client, session,
+                                                 parse_workers=parse_workers,
+                                                 engine=engine)
+        with stage('%s.dump' % type(report).__name__):
+            rows += report.dump(start_date=start_date, end_date=end_date)
+        report = None
+
+    session.close()
+    gc.collect()
+    return rows
+
+
+def refresh_account(client, session, accountId, account, days=2,
+                    full_sync_days=FULL_SYNC_DAYS, entities=None, reports=None,
+                    parse_workers=0, engine='rows'):
+    """
+    replaces the last days (today and yesterday by default) of the
+    performance reports of the account, after an incremental entity sync so
+    that new campaigns, adgroups and criteria exist before their rows.
+    entities and reports limit the stages as in process_account. Returns
+    the number of report rows loaded.
+    """
+    if reports is None:
+        reports = list(REPORT_TYPES.keys())
+
+    logger.info('refreshing (%d) %s' % (accountId, account.name))
+    client.client_customer_id = accountId
+
+    with stage('sync_entities'):
+        synced = sync_entities(client, session, accountId, incremental=True,
+                               full_sync_days=full_sync_days, entities=entities)
+    if not synced:
+        return 0
+
+    end_date = datetime.datetime.now().date()
+    start_date = end_date - datetime.timedelta(days=days - 1)
+    rows = 0
+    for name in reports:
+        session.close()
+        report = import_type(REPORT_TYPES, name)(client, session,
+                                                 parse_workers=parse_workers,
+                                                 engine=engine)
+        with stage('%s.refresh' % type(report).__name__):
+            rows += report.refresh(start_date, end_date)
+        report = None
+
+    session.close()
+    gc.collect()
+    return rows
@@ -0,0 +1,209 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import contextlib
+import logging
+import re
+import threading
+import time
+
+import sqlalchemy as sqa
+import sqlalchemy.orm
+
+logger = logging.getLogger('googleads')
+
+# a statement run at least this many times in a stage, one row at a time,
+# is flagged as an N+1 pattern
+N_PLUS_ONE = 20
+# statements listed per stage in the report
+TOP_STATEMENTS = 10
+
+_PARAM = re.compile(r"%\(\w+\)s|%s|(?<![:\w]):\w+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACES = re.compile(r'\s+')
+_PARAM_LIST = re.compile(r'\(\?(?:, \?)+\)')
+_ROWS = re.compile(r'(\([^()]*\))(?:, \1)+')
+_JOINED_LOAD = re.compile(r'LEFT OUTER JOIN \(?\w+ AS \w+_\d+')
+# the version check of the Versioned mixin, quoted "..." or [...] by dialect
+_VERSION_CHECK = re.compile(r'[\["]?_lastUpdated[\]"]? = \?')
+
+
+def statement_shape(statement):
+    """
+    the statement with its parameters, literals, IN lists and multi-row
+    VALUES collapsed, so that the executions of one query share a shape.
+    """
+    shape = _PARAM.sub('?', statement)
+    shape = _STRING.sub('?', shape)
+    shape = _NUMBER.sub('?', shape)
+    shape = _SPACES.sub(' ', shape).strip()
+    shape = _PARAM_LIST.sub('(?, ...)', shape)
+    return _ROWS.sub(r'\1, ...', shape)
+
+
+def patterns(shape, count, rows, unknown=0):
+    """
+    the N+1 patterns the statement of the given shape looks like, from how
+    many times it ran and the rows it returned or changed. unknown is the
+    number of runs whose rows aren't known, which are left out.
+    """
+    res = []
+    known = count - unknown
+    per_row = known >= N_PLUS_ONE and rows <= known
+    verb = shape.split(' ', 1)[0].upper()
+    if verb == 'SELECT' and _JOINED_LOAD.search(shape):
+        res.append('joined eager load')
+    if verb == 'SELECT' and per_row:
+        res.append('per-row SELECT')
+    if verb == 'UPDATE' and per_row and _VERSION_CHECK.search(shape.split(' WHERE ', 1)[-1]):
+        res.append('per-row versioned UPDATE')
+    return res
+
+
+class StatementStats(object):
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+        # the runs whose rows are unknown: SELECTs, which the drivers don't
+        # count, loading no ORM objects
+        self.unknown = 0
+
+
+class SQLProfiler(object):
+    """
+    records, through the engine events, the count, time and rows of the
+    statements of each shape by the stage running them. Stages are named
+    with stage() around the code issuing the statements, per thread; the
+    statements outside of any stage are recorded under '-'.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.stats = {}
+        self.engines = []
+
+    def attach(self, engine):
+        sqa.event.listen(engine, 'before_cursor_execute', self._before)
+        sqa.event.listen(engine, 'after_cursor_execute', self._after)
+        if not self.engines:
+            # the rows of the ORM queries, which the drivers don't count
+            sqa.event.listen(sqa.orm.Mapper, 'load', self._load)
+        self.engines.append(engine)
+
+    def detach(self):
+        for engine in self.engines:
+            sqa.event.remove(engine, 'before_cursor_execute', self._before)
+            sqa.event.remove(engine, 'after_cursor_execute', self._after)
+        if self.engines:
+            sqa.event.remove(sqa.orm.Mapper, 'load', self._load)
+        self.engines = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        stages = self.local.__dict__.setdefault('stages', [])
+        stages.append(name)
+        try:
+            yield
+        finally:
+            stages.pop()
+
+    def current_stage(self):
+        stages = getattr(self.local, 'stages', None)
+        return stages[-1] if stages else '-'
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        context._profiler_start = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - context._profiler_start
+        if executemany:
+            rows = len(parameters)
+        else:
+            rows = max(cursor.rowcount, 0)
+        unknown = not executemany and cursor.rowcount < 0
+        key = (self.current_stage(), statement_shape(statement))
+        with self.lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = StatementStats()
+            stats.count += 1
+            stats.seconds += seconds
+            stats.rows += rows
+            stats.unknown += unknown
+        self.local.last = stats
+        self.local.unknown = unknown
+
+    def _load(self, target, context):
+        stats = getattr(self.local, 'last', None)
+        if stats is not None:
+            with self.lock:
+                stats.rows += 1
+                # the objects loaded tell the rows of the statement
+                if self.local.unknown:
+                    stats.unknown -= 1
+                    self.local.unknown = False
+
+    def report(self):
+        """
+        the lines of the profile: the totals of each stage, slowest first,
+        with its slowest statement shapes and the patterns they look like.
+        """
+        with self.lock:
+            stats = list(self.stats.items())
+        stages = {}
+        for (stage, shape), x in stats:
+            stages.setdefault(stage, []).append((shape, x))
+        total = sum(x.seconds for _, x in stats)
+        lines = ['SQL profile: %d statements, %d shapes, %.3fs' %
+                 (sum(x.count for _, x in stats), len(stats), total)]
+        stages = sorted(stages.items(),
+                        key=lambda x: -sum(y.seconds for _, y in x[1]))
+        for stage, shapes in stages:
+            lines.append('%s: %d statements, %.3fs, %d rows' %
+                         (stage, sum(x.count for _, x in shapes),
+                          sum(x.seconds for _, x in shapes),
+                          sum(x.rows for _, x in shapes)))
+            shapes.sort(key=lambda x: -x[1].seconds)
+            listed = 0
+            for i, (shape, x) in enumerate(shapes):
+                # the flagged shapes are listed even when they're fast
+                flags = patterns(shape, x.count, x.rows, x.unknown)
+                if i >= TOP_STATEMENTS and not flags:
+                    continue
+                listed += 1
+                lines.append('  %6d %9.3fs %8d  %s%s' %
+                             (x.count, x.seconds, x.rows, shape[:160],
+                              ' [%s]' % ', '.join(flags) if flags else ''))
+            if len(shapes) > listed:
+                lines.append('  ... %d more shapes' % (len(shapes) - listed))
+        return lines
+
+    def log_report(self):
+        for line in self.report():
+            logger.info(line)
+
+
+profiler = SQLProfiler()
+stage = profiler.stage
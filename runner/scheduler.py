@@ -0,0 +1,201 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import heapq
+import logging
+import queue
+import threading
+import sqlalchemy as sqa
+
+from objects import model
+from objects import deadlines
+
+# seconds per campaign/adgroup assumed for accounts which have never been
+# processed, if there are no processed accounts to calibrate it from.
+COLD_SECONDS_PER_ENTITY = 0.05
+# cost assumed for accounts we know nothing about, not even their entities.
+UNKNOWN_ACCOUNT_COST = 60.0
+
+
+class AccountScheduler:
+    """
+    dispatches accounts to a number of workers, largest first (LPT), using
+    the duration of the previous run of each account as its cost.
+    """
+    def __init__(self, session, workers=1):
+        self.session = session
+        self.workers = max(int(workers), 1)
+        self.logger = logging.getLogger('googleads')
+
+    def _entity_counts(self, account_ids):
+        counts = {x:0 for x in account_ids}
+        q = self.session.query(model.Campaign.accountId,
+                               sqa.func.count(model.Campaign.id)).\
+            group_by(model.Campaign.accountId)
+        for accountId, count in q:
+            if accountId in counts:
+                counts[accountId] += count
+        q = self.session.query(model.Campaign.accountId,
+                               sqa.func.count(model.AdGroup.id)).\
+            join(model.AdGroup, model.AdGroup.campaignId == model.Campaign.id).\
+            group_by(model.Campaign.accountId)
+        for accountId, count in q:
+            if accountId in counts:
+                counts[accountId] += count
+        return counts
+
+    def estimate_costs(self, account_ids):
+        """
+        returns a dict of accountId to the estimated processing time in
+        seconds. Accounts without a recorded run fall back to the number of
+        their campaigns and adgroups, scaled by the seconds per entity
+        observed on the accounts which do have one.
+        """
+        stats = self.session.query(model.AccountRunStat).all()
+        durations = {x.accountId: x.lastDuration for x in stats
+                     if x.lastDuration is not None}
+        entities = self._entity_counts(account_ids)
+
+        warm_entities = sum(entities.get(x, 0) for x in durations)
+        warm_seconds = sum(y for x, y in durations.items() if entities.get(x, 0) > 0)
+        if warm_entities > 0 and warm_seconds > 0:
+            seconds_per_entity = warm_seconds / warm_entities
+        else:
+            seconds_per_entity = COLD_SECONDS_PER_ENTITY
+
+        costs = {}
+        for accountId in account_ids:
+            if accountId in durations:
+                costs[accountId] = durations[accountId]
+            elif entities[accountId] > 0:
+                costs[accountId] = entities[accountId] * seconds_per_entity
+            else:
+                costs[accountId] = UNKNOWN_ACCOUNT_COST
+        return costs
+
+    def plan(self, costs):
+        """
+        LPT assignment of the accounts to the workers. Returns a list with
+        one (predicted load, [accountIds]) tuple per worker.
+        """
+        loads = [(0.0, i) for i in range(self.workers)]
+        assignments = [[] for i in range(self.workers)]
+        for accountId in sorted(costs, key=lambda x: costs[x], reverse=True):
+            load, worker = heapq.heappop(loads)
+            assignments[worker].append(accountId)
+            heapq.heappush(loads, (load + costs[accountId], worker))
+        loads = {worker: load for load, worker in loads}
+        return [(loads[i], assignments[i]) for i in range(self.workers)]
+
+    def log_plan(self, costs, plan):
+        total = sum(costs.values())
+        makespan = max([x[0] for x in plan] + [0])
+        self.logger.info('schedule: %d accounts, %d workers, total %.0fs, '
+                         'lower bound %.0fs, predicted makespan %.0fs' %
+                         (len(costs), self.workers, total,
+                          max(total / self.workers, max(list(costs.values()) + [0])),
+                          makespan))
+        for i, (load, accountIds) in enumerate(plan):
+            self.logger.info('worker %d: %d accounts, predicted %.0fs' %
+                             (i, len(accountIds), load))
+            self.logger.debug('worker %d: %s' %
+                              (i, ', '.join(['%d (%.0fs)' % (x, costs[x])
+                                             for x in accountIds])))
+
+    def record(self, session, accountId, started, duration, rows):
+        stat = model.AccountRunStat()
+        stat.accountId = accountId
+        stat.lastStarted = started
+        stat.lastDuration = duration
+        stat.lastRowCount = rows
+        session.merge(stat)
+        session.commit()
+
+    def run(self, accounts, process, make_client, Session, record_stats=True):
+        """
+        processes the given accounts ({accountId: account}) with
+        process(client, session, accountId, account). Accounts are handed
+        out to the workers through a queue in LPT order, each worker having
+        its own client and session. If record_stats is True, the durations
+        are kept as the cost estimates of the next run.
+
+        An account whose API calls go past deadlines.ACCOUNT_TIMEOUT is
+        given up at its next call and counted as failed; its time so far is
+        recorded, so that it's started first the next time.
+        """
+        costs = self.estimate_costs(list(accounts.keys()))
+        plan = self.plan(costs)
+        self.log_plan(costs, plan)
+
+        tasks = queue.Queue()
+        for accountId in sorted(costs, key=lambda x: costs[x], reverse=True):
+            tasks.put(accountId)
+
+        failed = []
+        run_start = datetime.datetime.now()
+
+        def worker(client):
+            session = Session()
+            while True:
+                try:
+                    accountId = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                started = datetime.datetime.now()
+                try:
+                    with deadlines.deadline(deadlines.ACCOUNT_TIMEOUT,
+                                            'account %d' % accountId):
+                        rows = process(client, session, accountId, accounts[accountId])
+                    duration = (datetime.datetime.now() - started).total_seconds()
+                    self.logger.info('account %d done in %.0fs (estimated %.0fs), %d rows' %
+                                     (accountId, duration, costs[accountId], rows))
+                    if record_stats:
+                        self.record(session, accountId, started, duration, rows)
+                except deadlines.DeadlineExceeded as e:
+                    self.logger.error('%s, skipped' % e)
+                    failed.append(accountId)
+                    session.rollback()
+                    if record_stats:
+                        duration = (datetime.datetime.now() - started).total_seconds()
+                        self.record(session, accountId, started, duration, None)
+                except Exception:
+                    self.logger.exception('processing account %d failed' % accountId)
+                    failed.append(accountId)
+                    session.rollback()
+                finally:
+                    session.close()
+
+        if self.workers == 1:
+            worker(make_client())
+        else:
+            threads = [threading.Thread(target=worker, args=(make_client(),))
+                       for i in range(self.workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.logger.info('actual makespan %.0fs' %
+                         (datetime.datetime.now() - run_start).total_seconds())
+        return failed
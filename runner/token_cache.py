@@ -0,0 +1,168 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import calendar
+import contextlib
+import datetime
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import time
+from os.path import join, expanduser, dirname, exists
+
+logger = logging.getLogger('googleads')
+
+TOKEN_CACHE_PATH = join(expanduser('~'), '.cache', 'google-adwords-dumper', 'token.json')
+
+# a cached token is refreshed this many seconds before it expires
+REFRESH_MARGIN = 300
+
+# lifetime assumed when the credentials don't tell
+DEFAULT_LIFETIME = 3000
+
+
+class FileTokenCache(object):
+    """
+    access tokens shared by the processes of a host through a JSON file,
+    by the hash of the credentials they belong to. Refreshes are serialized
+    by an exclusive lock on a lock file next to it, so that concurrent
+    processes with an expired token refresh it only once.
+    """
+    def __init__(self, path=TOKEN_CACHE_PATH, margin=REFRESH_MARGIN):
+        self.path = path
+        self.margin = margin
+
+    @contextlib.contextmanager
+    def locked(self):
+        os.makedirs(dirname(self.path), exist_ok=True)
+        with open(self.path + '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def read(self):
+        if not exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except ValueError:
+            logger.warning('ignoring the unreadable token cache %s' % self.path)
+            return {}
+
+    def write(self, tokens):
+        # written aside and renamed, so that readers never see half a file
+        tmp = '%s.%d' % (self.path, os.getpid())
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(tokens, f)
+        os.replace(tmp, self.path)
+
+    def valid(self, entry):
+        return entry is not None and entry['expiry'] - self.margin > time.time()
+
+    def get(self, key):
+        """
+        the (access token, expiry as a timestamp) cached for key, if valid.
+        """
+        entry = self.read().get(key)
+        if self.valid(entry):
+            return entry['token'], entry['expiry']
+        return None
+
+    def get_or_refresh(self, key, refresh, force=False):
+        """
+        the valid token of key, refreshed under the lock with refresh(),
+        which returns (access token, expiry timestamp), when there is none.
+        With force, it is refreshed unless another process did it meanwhile.
+        """
+        cached = None if force else self.get(key)
+        if cached is not None:
+            return cached
+        with self.locked():
+            tokens = self.read()
+            entry = tokens.get(key)
+            if self.valid(entry) and (not force or entry['refreshed'] > time.time() - self.margin):
+                return entry['token'], entry['expiry']
+            token, expiry = refresh()
+            tokens = dict((x, y) for x, y in tokens.items() if y['expiry'] > time.time())
+            tokens[key] = {'token': token, 'expiry': expiry, 'refreshed': time.time()}
+            self.write(tokens)
+            logger.info('refreshed the access token, valid until %s' %
+                        datetime.datetime.fromtimestamp(expiry))
+            return token, expiry
+
+
+class CachedOAuth2Client(object):
+    """
+    wraps the OAuth2 client of googleads (refresh token or service account
+    flow), so that its access token comes from a FileTokenCache: the token
+    is only refreshed when the cached one is close to expiry, by one of the
+    processes sharing the cache. Everything else is left to the wrapped
+    client.
+    """
+    def __init__(self, oauth2_client, cache):
+        self.oauth2_client = oauth2_client
+        self.cache = cache
+        credentials = oauth2_client.oauth2credentials
+        self.key = hashlib.sha256(('%s %s %s' % (
+            getattr(credentials, 'client_id', None),
+            getattr(credentials, 'refresh_token', None),
+            getattr(credentials, 'service_account_email', None))).encode('utf-8')).hexdigest()
+
+    def _refresh(self):
+        self.oauth2_client.Refresh()
+        credentials = self.oauth2_client.oauth2credentials
+        if credentials.token_expiry is None:
+            expiry = time.time() + DEFAULT_LIFETIME
+        else:
+            # oauth2client keeps naive UTC datetimes
+            expiry = calendar.timegm(credentials.token_expiry.timetuple())
+        return credentials.access_token, expiry
+
+    def _set(self, token, expiry):
+        credentials = self.oauth2_client.oauth2credentials
+        credentials.access_token = token
+        credentials.token_expiry = datetime.datetime.utcfromtimestamp(expiry)
+
+    def _valid(self):
+        credentials = self.oauth2_client.oauth2credentials
+        if credentials.access_token is None or credentials.token_expiry is None:
+            return False
+        expiry = calendar.timegm(credentials.token_expiry.timetuple())
+        return expiry - self.cache.margin > time.time()
+
+    def CreateHttpHeader(self):
+        if not self._valid():
+            self._set(*self.cache.get_or_refresh(self.key, self._refresh))
+        return {'Authorization': 'Bearer %s' % self.oauth2_client.oauth2credentials.access_token}
+
+    def Refresh(self):
+        self._set(*self.cache.get_or_refresh(self.key, self._refresh, force=True))
+
+    def __getattr__(self, name):
+        return getattr(self.oauth2_client, name)
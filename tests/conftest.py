@@ -0,0 +1,65 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+
+import pytest
+import sqlalchemy as sqa
+import sqlalchemy.orm
+
+# the modules import each other from the root of the repository, as main.py
+# does when it is run from there
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from objects import model
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = sqa.create_engine('sqlite:///%s' % tmp_path.joinpath('test.db'))
+    model.Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    session = sqa.orm.sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def scale():
+    from fakes import synthetic
+
+    return synthetic.Scale(accounts=2, campaigns=2, adgroups=3, criteria=4,
+                           active_criteria=10, labels=3)
+
+
+@pytest.fixture
+def client(scale):
+    from fakes import synthetic
+
+    return synthetic.make_client(scale)
@@ -0,0 +1,117 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import json
+
+from fakes.client import FakeAdWordsClient
+from fakes.suds_objects import FakeSudsObject
+from objects import model
+from objects.accounts import Accounts, find_dormant_accounts
+
+MANAGER_ID = 1
+
+
+def account(customerId, manager=False, test=False):
+    return FakeSudsObject(customerId=customerId, name='account %d' % customerId,
+                          companyName=None, canManageClients=manager,
+                          currencyCode='EUR', dateTimeZone='Europe/Berlin',
+                          testAccount=test,
+                          accountLabels=[FakeSudsObject(id=7, name='label')])
+
+
+def link(client, manager):
+    return FakeSudsObject(clientCustomerId=client, managerCustomerId=manager)
+
+
+class FakeManagedCustomerService(object):
+    """
+    a manager 1 with an account 2 and a manager 3, which has the test
+    account 4.
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, selector):
+        self.calls += 1
+        return FakeSudsObject(entries=[account(1, manager=True), account(2),
+                                       account(3, manager=True), account(4, test=True)],
+                              links=[link(2, 1), link(3, 1), link(4, 3)],
+                              totalNumEntries=4)
+
+
+def test_filter():
+    accounts = Accounts()
+    accounts.load(FakeAdWordsClient({'ManagedCustomerService': FakeManagedCustomerService()}))
+    assert sorted(accounts.filter()) == [1, 2, 3, 4]
+    assert sorted(accounts.filter(subtree_of=3)) == [3, 4]
+    assert sorted(accounts.filter(exclude_test=True, exclude_managers=True)) == [2]
+    assert sorted(accounts.filter(include=[2, 4, 5], exclude=[4])) == [2]
+
+
+def test_load_cached(tmp_path):
+    path = str(tmp_path.joinpath('accounts.json'))
+    service = FakeManagedCustomerService()
+    client = FakeAdWordsClient({'ManagedCustomerService': service})
+
+    accounts = Accounts()
+    accounts.load_cached(client, 24, path=path)
+    assert not accounts.from_cache and service.calls == 1
+
+    cached = Accounts()
+    cached.load_cached(client, 24, path=path)
+    assert cached.from_cache and service.calls == 1
+    assert sorted(cached.filter(subtree_of=3, exclude_test=True)) == [3]
+    assert cached.accounts[2].name == 'account 2'
+    assert cached.accounts[2].accountLabels[0].id == 7
+
+    # too old, or not to be used
+    with open(path) as f:
+        cache = json.load(f)
+    fetched = datetime.datetime.now() - datetime.timedelta(hours=25)
+    cache['fetched'] = fetched.strftime('%Y-%m-%dT%H:%M:%S')
+    with open(path, 'w') as f:
+        json.dump(cache, f)
+    Accounts().load_cached(client, 24, path=path)
+    assert service.calls == 2
+    Accounts().load_cached(client, 0, path=path)
+    assert service.calls == 3
+
+
+def test_find_dormant_accounts(session):
+    today = datetime.datetime.now().date()
+    now = datetime.datetime.utcnow()
+    session.execute(model.AccountPerformance.__table__.insert(), [
+        {'AdNetworkType1': 'Search Network', 'AdNetworkType2': 'Google search',
+         'Device': 'Computers', 'ExternalCustomerId': x, 'Date': y, 'Impressions': z}
+        # 1 is active, 2 had impressions too long ago, 3 none
+        for x, y, z in [(1, today, 5), (2, today - datetime.timedelta(days=40), 5),
+                        (3, today, 0)]])
+    session.execute(model.EntitySync.__table__.insert(), [
+        {'accountId': x, 'lastSync': y, 'lastFullSync': y}
+        # 4 wasn't synced for too long
+        for x, y in [(1, now), (2, now), (3, now),
+                     (4, now - datetime.timedelta(days=10))]])
+    session.commit()
+    # 5 was never synced
+    assert find_dormant_accounts(session, [1, 2, 3, 4, 5], 30, 7) == {2, 3}
@@ -0,0 +1,134 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+
+import pytest
+import sqlalchemy as sqa
+import sqlalchemy.orm
+
+from fakes.client import FakeAdWordsClient
+from objects import model
+from runner import backfill
+from runner import pipeline
+
+ACCOUNT_ID = 1
+START = datetime.date(2026, 1, 1)
+END = datetime.date(2026, 1, 10)
+
+
+def test_partitions():
+    assert backfill.partitions(START, END, 4) == [
+        (START, datetime.date(2026, 1, 4)),
+        (datetime.date(2026, 1, 5), datetime.date(2026, 1, 8)),
+        (datetime.date(2026, 1, 9), END)]
+    assert backfill.partitions(START, START, 7) == [(START, START)]
+
+
+class FakeReport(object):
+    """
+    stands in for the performance reports, keeping the partitions loaded
+    and failing those listed in failing.
+    """
+    loads = []
+    failing = set()
+    # the partitions loaded with a day not downloaded
+    partial = set()
+
+    def __init__(self, client, session, **kwargs):
+        self.client = client
+        self.gaps = []
+
+    def refresh(self, start_date, end_date, rollups=True):
+        assert not rollups
+        assert self.client.client_customer_id == ACCOUNT_ID
+        if start_date in self.failing:
+            raise ValueError('download failed')
+        if start_date in self.partial:
+            self.gaps = [(start_date, start_date, OSError('timed out'))]
+        self.loads.append((start_date, end_date))
+        return 1
+
+
+@pytest.fixture
+def reports(monkeypatch):
+    monkeypatch.setitem(pipeline.REPORT_TYPES, 'criterion', (__name__, 'FakeReport'))
+    monkeypatch.setattr(FakeReport, 'loads', [])
+    monkeypatch.setattr(FakeReport, 'failing', set())
+    monkeypatch.setattr(FakeReport, 'partial', set())
+    return FakeReport
+
+
+def make_backfill(engine, clients, workers=2):
+    def make_client():
+        clients.append(FakeAdWordsClient())
+        return clients[-1]
+    return backfill.Backfill(make_client, sqa.orm.sessionmaker(bind=engine),
+                             ACCOUNT_ID, START, END, reports=['criterion'],
+                             workers=workers, partition_days=4)
+
+
+def test_resume(reports, engine, session):
+    reports.failing = {datetime.date(2026, 1, 5)}
+    failed = make_backfill(engine, []).run(entities=[])
+    assert failed == [('criterion', datetime.date(2026, 1, 5), datetime.date(2026, 1, 8))]
+    assert sorted(reports.loads) == [(START, datetime.date(2026, 1, 4)),
+                                     (datetime.date(2026, 1, 9), END)]
+    status = {x.startDate: x.status for x in session.query(model.BackfillProgress)}
+    assert status == {START: backfill.DONE,
+                      datetime.date(2026, 1, 5): backfill.FAILED,
+                      datetime.date(2026, 1, 9): backfill.DONE}
+
+    # only the failed partition is loaded again
+    reports.failing = set()
+    reports.loads = []
+    assert make_backfill(engine, [], workers=1).run(entities=[]) == []
+    assert reports.loads == [(datetime.date(2026, 1, 5), datetime.date(2026, 1, 8))]
+    session.expire_all()
+    assert {x.status for x in session.query(model.BackfillProgress)} == {backfill.DONE}
+
+
+def test_partition_with_gaps(reports, engine, session):
+    # loaded, but failed so that the next run loads it again
+    reports.partial = {START}
+    failed = make_backfill(engine, []).run(entities=[])
+    assert failed == [('criterion', START, datetime.date(2026, 1, 4))]
+    assert len(reports.loads) == 3
+    progress = session.query(model.BackfillProgress).get((ACCOUNT_ID, 'criterion', START))
+    assert (progress.status, progress.rowCount) == (backfill.FAILED, 1)
+
+
+def test_rollups_without_client(reports, engine, session):
+    session.execute(model.CriterionPerformance.__table__.insert(), [{
+        'AdNetworkType1': 'Search Network', 'AdNetworkType2': 'Google search',
+        'Date': START, 'Device': 'Computers', 'ExternalCustomerId': ACCOUNT_ID,
+        'CampaignId': 11, 'AdGroupId': 111, 'Id': 1, 'Impressions': 5}])
+    session.commit()
+
+    clients = []
+    assert make_backfill(engine, clients, workers=1).run(entities=[]) == []
+    # the clients of the workers only, none for the rollups
+    assert len(clients) == 1
+    table = model.ROLLUP_MODELS[('criterion', 'campaign')].__table__
+    rows = session.execute(table.select().where(table.c.Grain == 'day'))
+    assert [(x.PeriodStart, x.Impressions) for x in rows] == [(START, 5)]
@@ -0,0 +1,165 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+
+import pytest
+
+from fakes.client import FakeAdWordsClient
+from fakes.customer_sync import FakeCustomerSyncService
+from objects import model
+from objects.change_history import ChangeHistory
+from runner import pipeline
+
+ACCOUNT_ID = 1
+CAMPAIGN_IDS = [11, 12]
+
+
+class FakeEntities(object):
+    """
+    stands in for Campaigns, AdGroups and AdGroupCriteria, keeping the ids
+    each load was asked for (None for all).
+    """
+    loads = []
+    campaigns = {x: None for x in CAMPAIGN_IDS}
+
+    def __init__(self, accountId):
+        pass
+
+    def load(self, client, ids=None, adgroup_ids=None):
+        self.loads.append((type(self).__name__, ids if ids is not None else adgroup_ids))
+
+    def dump(self, session):
+        pass
+
+
+class FakeCampaigns(FakeEntities):
+    pass
+
+
+class FakeAdGroups(FakeEntities):
+    pass
+
+
+class FakeAdGroupCriteria(FakeEntities):
+    pass
+
+
+@pytest.fixture
+def entities(monkeypatch):
+    # the pipeline imports them by name when they are synced
+    monkeypatch.setattr('objects.campaigns.Campaigns', FakeCampaigns)
+    monkeypatch.setattr('objects.adgroups.AdGroups', FakeAdGroups)
+    monkeypatch.setattr('objects.adgroup_criteria.AdGroupCriteria', FakeAdGroupCriteria)
+    monkeypatch.setattr(FakeEntities, 'loads', [])
+    return FakeEntities.loads
+
+
+def test_change_history():
+    service = FakeCustomerSyncService()
+    now = datetime.datetime.utcnow().replace(microsecond=0)
+    since = now - datetime.timedelta(days=1)
+    service.record_campaign_change(1, when=now - datetime.timedelta(hours=2), new=True)
+    service.record_adgroup_change(1, 10, when=now - datetime.timedelta(hours=2))
+    service.record_adgroup_change(1, 11, when=now - datetime.timedelta(hours=1),
+                                  fields=False, criteria=True)
+    service.record_adgroup_change(2, 20, when=now - datetime.timedelta(hours=1), new=True)
+    # before the range, and of a campaign which isn't asked for
+    service.record_adgroup_change(2, 21, when=since - datetime.timedelta(hours=1))
+    service.record_adgroup_change(3, 30, when=now - datetime.timedelta(hours=1))
+
+    history = ChangeHistory(1)
+    history.load(FakeAdWordsClient({'CustomerSyncService': service}), [1, 2], since, now)
+    assert history.new_campaigns == {1}
+    assert history.changed_campaigns == {1}
+    assert history.changed_adgroups == {10, 20}
+    assert history.changed_criteria_adgroups == {11, 20}
+
+
+def test_incremental_sync(entities, session):
+    service = FakeCustomerSyncService()
+    client = FakeAdWordsClient({'CustomerSyncService': service})
+    assert pipeline.sync_entities(client, session, ACCOUNT_ID, incremental=True)
+    # the first sync is a full one
+    assert entities == [('FakeCampaigns', None), ('FakeAdGroups', None),
+                        ('FakeAdGroupCriteria', None)]
+    sync = session.query(model.EntitySync).get(ACCOUNT_ID)
+    first_sync, first_full_sync = sync.lastSync, sync.lastFullSync
+    assert first_full_sync == first_sync
+
+    # nothing changed: only the campaigns are fetched
+    del entities[:]
+    assert pipeline.sync_entities(client, session, ACCOUNT_ID, incremental=True)
+    assert entities == [('FakeCampaigns', None)]
+
+    when = datetime.datetime.utcnow() - datetime.timedelta(seconds=5)
+    service.record_adgroup_change(11, 111, when=when)
+    service.record_adgroup_change(12, 121, when=when, fields=False, criteria=True)
+    del entities[:]
+    assert pipeline.sync_entities(client, session, ACCOUNT_ID, incremental=True)
+    assert entities == [('FakeCampaigns', None), ('FakeAdGroups', {111}),
+                        ('FakeAdGroupCriteria', {121})]
+    session.expire_all()
+    sync = session.query(model.EntitySync).get(ACCOUNT_ID)
+    assert sync.lastFullSync == first_full_sync
+    assert sync.lastSync > first_sync
+
+    # a full sync is due after full_sync_days
+    del entities[:]
+    assert pipeline.sync_entities(client, session, ACCOUNT_ID, incremental=True,
+                                  full_sync_days=0)
+    assert entities == [('FakeCampaigns', None), ('FakeAdGroups', None),
+                        ('FakeAdGroupCriteria', None)]
+
+
+def test_full_sync_without_incremental(entities, session):
+    client = FakeAdWordsClient({})
+    assert pipeline.sync_entities(client, session, ACCOUNT_ID)
+    assert pipeline.sync_entities(client, session, ACCOUNT_ID)
+    # CustomerSyncService isn't asked, every sync is a full one
+    assert [x[1] for x in entities] == [None] * 6
+
+
+def test_partial_sync(entities, session):
+    client = FakeAdWordsClient({'CustomerSyncService': FakeCustomerSyncService()})
+    # without campaigns, those of the database are used
+    assert not pipeline.sync_entities(client, session, ACCOUNT_ID, entities=['adgroups'])
+    session.execute(model.Campaign.__table__.insert(),
+                    [{'id': x, 'accountId': ACCOUNT_ID} for x in CAMPAIGN_IDS])
+    assert pipeline.sync_entities(client, session, ACCOUNT_ID, entities=['adgroups'])
+    assert entities == [('FakeAdGroups', None)]
+    # a partial sync isn't recorded, the next incremental one is a full one
+    assert session.query(model.EntitySync).get(ACCOUNT_ID) is None
+    del entities[:]
+    assert pipeline.sync_entities(client, session, ACCOUNT_ID, incremental=True,
+                                  entities=[])
+    assert entities == []
+
+
+def test_sync_without_campaigns(entities, session, monkeypatch):
+    monkeypatch.setattr(FakeCampaigns, 'campaigns', {})
+    client = FakeAdWordsClient({'CustomerSyncService': FakeCustomerSyncService()})
+    # managers have no campaigns, their sync is recorded all the same
+    assert not pipeline.sync_entities(client, session, ACCOUNT_ID, incremental=True)
+    assert session.query(model.EntitySync).get(ACCOUNT_ID) is not None
+    assert entities == [('FakeCampaigns', None)]
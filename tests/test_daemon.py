@@ -0,0 +1,141 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+
+import pytest
+import sqlalchemy as sqa
+import sqlalchemy.orm
+
+from objects import model
+from runner import daemon
+
+ACCOUNTS = {1: None, 2: None}
+
+
+class FakeAccounts(object):
+    loads = 0
+
+    def __init__(self):
+        self.accounts = {}
+
+    def load(self, client):
+        FakeAccounts.loads += 1
+        self.accounts = dict(ACCOUNTS)
+
+    def dump(self, session):
+        pass
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def process_account(client, session, accountId, account, **kwargs):
+        calls.append(('process', accountId, kwargs))
+        return 1
+
+    def refresh_account(client, session, accountId, account, **kwargs):
+        calls.append(('refresh', accountId, kwargs))
+        return 1
+
+    monkeypatch.setattr(daemon, 'Accounts', FakeAccounts)
+    monkeypatch.setattr(FakeAccounts, 'loads', 0)
+    monkeypatch.setattr(daemon, 'process_account', process_account)
+    monkeypatch.setattr(daemon, 'refresh_account', refresh_account)
+    return calls
+
+
+def test_nightly_due():
+    d = daemon.Daemon(lambda: None, None, nightly_hour=3)
+    day = datetime.datetime(2026, 1, 2)
+    assert not d.nightly_due(day.replace(hour=2))
+    assert d.nightly_due(day.replace(hour=3))
+    d.last_nightly = day.date()
+    assert not d.nightly_due(day.replace(hour=23))
+    assert d.nightly_due(day + datetime.timedelta(days=1, hours=3))
+
+
+def test_cycles(calls, engine):
+    Session = sqa.orm.sessionmaker(bind=engine)
+    clients = []
+    d = daemon.Daemon(lambda: clients.append(object()) or clients[-1], Session,
+                      workers=2, refresh_days=3, incremental=True)
+    # the clients are made once, and kept
+    assert len(clients) == 2
+
+    d.refresh()
+    assert FakeAccounts.loads == 1
+    assert sorted((x[0], x[1]) for x in calls) == [('refresh', 1), ('refresh', 2)]
+    assert calls[0][2]['days'] == 3
+    # refreshes don't count as runs for the scheduler's estimates
+    session = Session()
+    assert session.query(model.AccountRunStat).count() == 0
+
+    del calls[:]
+    d.nightly()
+    assert FakeAccounts.loads == 2
+    assert sorted((x[0], x[1]) for x in calls) == [('process', 1), ('process', 2)]
+    assert calls[0][2]['incremental']
+    assert d.last_nightly == datetime.date.today()
+    assert session.query(model.AccountRunStat).count() == 2
+    session.close()
+
+    # the account graph of the nightly cycle is reused
+    d.refresh()
+    assert FakeAccounts.loads == 2
+    assert len(clients) == 2
+
+
+def test_selection(calls, engine):
+    Session = sqa.orm.sessionmaker(bind=engine)
+    d = daemon.Daemon(lambda: None, Session,
+                      select_accounts=lambda client, session: ({2: None, 3: None}, {3}),
+                      entities=['campaigns'], reports=['account'])
+    d.nightly()
+    d.refresh()
+    # the whole account graph isn't fetched
+    assert FakeAccounts.loads == 0
+    assert sorted((x[0], x[1]) for x in calls) == \
+        [('process', 2), ('process', 3), ('refresh', 2), ('refresh', 3)]
+    for name, accountId, kwargs in calls:
+        # the dormant account skips the entity sync
+        assert kwargs['entities'] == ([] if accountId == 3 else ['campaigns'])
+        assert kwargs['reports'] == ['account']
+
+
+def test_fresh_first(calls, engine, monkeypatch):
+    def load_latest_day(client, session, accountId, account, **kwargs):
+        calls.append(('latest', accountId, kwargs))
+        return 1
+    monkeypatch.setattr(daemon, 'load_latest_day', load_latest_day)
+    Session = sqa.orm.sessionmaker(bind=engine)
+    d = daemon.Daemon(lambda: None, Session, workers=2, fresh_first=True)
+    d.nightly()
+    # yesterday of every account before the rest of any
+    assert [x[0] for x in calls] == ['latest'] * 2 + ['process'] * 2
+    assert sorted(x[1] for x in calls[:2]) == [1, 2]
+    # phase one doesn't count as a run for the scheduler's estimates
+    session = Session()
+    assert session.query(model.AccountRunStat).count() == 2
+    session.close()
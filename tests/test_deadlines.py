@@ -0,0 +1,101 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+
+import pytest
+
+from objects import deadlines
+from objects.services import ServicePool
+from tests.test_services import CountingClient
+
+
+def test_call_within_its_deadline():
+    assert deadlines.call_with_deadline(lambda x: x + 1, 1, seconds=1) == 2
+    with pytest.raises(ValueError):
+        deadlines.call_with_deadline(int, 'x', seconds=1)
+
+
+def test_call_over_its_deadline_is_retried():
+    calls = []
+    release = threading.Event()
+
+    def call():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(5)
+        return len(calls)
+    assert deadlines.call_with_deadline(call, seconds=0.05, retries=1) == 2
+    release.set()
+
+    with pytest.raises(deadlines.CallTimeout):
+        deadlines.call_with_deadline(time.sleep, 1, seconds=0.05, retries=0)
+    # a download over its deadline is split like the network timeouts
+    assert issubclass(deadlines.CallTimeout, OSError)
+
+
+def test_enclosing_deadline():
+    with deadlines.deadline(0.05, 'account 1'):
+        with pytest.raises(deadlines.DeadlineExceeded) as e:
+            deadlines.call_with_deadline(time.sleep, 1, seconds=10, retries=3)
+        assert e.value.deadline.name == 'account 1'
+        # the calls of other threads run under it too
+        with pytest.raises(deadlines.DeadlineExceeded):
+            deadlines.propagate(deadlines.check)()
+    deadlines.check()
+
+
+def test_retry_on_a_fresh_service():
+    release = threading.Event()
+    stalled = []
+
+    class StallingClient(CountingClient):
+        """
+        its first service stalls until released.
+        """
+        def GetService(self, service_name, version=None, server=None):
+            service = super().GetService(service_name, version, server)
+            if not stalled:
+                stalled.append(service)
+            return service
+
+    pool = ServicePool()
+    client = StallingClient()
+
+    def get(selector):
+        with pool.borrow(client, 'CampaignService') as service:
+            if service in stalled:
+                release.wait(5)
+            return service
+    service = deadlines.call_with_deadline(get, 'page', seconds=0.05, retries=1,
+                                           name='stalled get')
+    assert service is not stalled[0]
+
+    # the call given up on ends, and its service isn't used again
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'stalled get':
+            thread.join()
+    assert pool.free[client][('CampaignService', 'v201607')] == [service]
+    assert pool.created == 2
@@ -0,0 +1,115 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import collections
+import datetime
+
+import pytest
+
+from objects import model
+from runner import backfill
+from runner import freshness
+from runner import pipeline
+
+YESTERDAY = datetime.date.today() - datetime.timedelta(days=1)
+Account = collections.namedtuple('Account', 'name')
+
+
+class FakeReport(object):
+    """
+    stands in for the performance reports of accounts whose last day in
+    the database is in last_days, recording the days loaded.
+    """
+    last_days = {}
+    loads = []
+
+    def __init__(self, client, session, **kwargs):
+        self.accountId = client.client_customer_id
+        self.gaps = []
+
+    def get_last_day(self, until=None):
+        return self.last_days.get(self.accountId)
+
+    def refresh(self, start_date, end_date, rollups=True):
+        self.loads.append(('refresh', self.accountId, start_date, end_date))
+        return 1
+
+    def dump(self, start_date=None, end_date=None):
+        self.loads.append(('dump', self.accountId))
+        return 1
+
+
+def day(n):
+    return YESTERDAY - datetime.timedelta(days=n)
+
+
+class FakeClient(object):
+    client_customer_id = None
+
+
+@pytest.fixture
+def reports(monkeypatch):
+    monkeypatch.setitem(pipeline.REPORT_TYPES, 'criterion', (__name__, 'FakeReport'))
+    monkeypatch.setattr(FakeReport, 'loads', [])
+    monkeypatch.setattr(FakeReport, 'last_days', {
+        # ten days behind, up to date, and without any row
+        1: YESTERDAY - datetime.timedelta(days=10), 2: YESTERDAY})
+    syncs = []
+
+    def sync_entities(client, session, accountId, **kwargs):
+        syncs.append(accountId)
+        FakeReport.loads.append(('sync', accountId))
+        return True
+    monkeypatch.setattr(freshness, 'sync_entities', sync_entities)
+    monkeypatch.setattr(pipeline, 'sync_entities', sync_entities)
+    return FakeReport
+
+
+def test_phases(reports, session):
+    client = FakeClient()
+    accounts = [1, 2, 3]
+    for accountId in accounts:
+        freshness.load_latest_day(client, session, accountId, Account('a'),
+                                  reports=['criterion'], partition_days=4)
+    # only the account missing yesterday is synced and loaded
+    assert reports.loads == [('sync', 1), ('refresh', 1, YESTERDAY, YESTERDAY)]
+    pending = [(x.accountId, x.startDate, x.endDate, x.status)
+               for x in session.query(model.BackfillProgress).order_by('startDate')]
+    assert pending == [(1, day(9), day(6), backfill.PENDING),
+                       (1, day(5), day(2), backfill.PENDING),
+                       (1, day(1), day(1), backfill.PENDING)]
+
+    del reports.loads[:]
+    for accountId in accounts:
+        pipeline.process_account(client, session, accountId, Account('a'),
+                                 reports=['criterion'])
+    # the deferred days, oldest first, after the entity sync and before
+    # the dump
+    assert reports.loads == [('sync', 1),
+                             ('refresh', 1, day(9), day(6)),
+                             ('refresh', 1, day(5), day(2)),
+                             ('refresh', 1, day(1), day(1)),
+                             ('dump', 1),
+                             ('sync', 2), ('dump', 2), ('sync', 3), ('dump', 3)]
+    session.expire_all()
+    assert {x.status for x in session.query(model.BackfillProgress)} == {backfill.DONE}
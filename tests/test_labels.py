@@ -0,0 +1,80 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import sqlalchemy as sqa
+
+from fakes.suds_objects import FakeSudsObject
+from objects import model
+from objects.labels import sync_labels, sync_label_associations
+
+
+def labelled(*ids):
+    return FakeSudsObject(labels=[FakeSudsObject(id=x, name='label %d' % x,
+                                                 status='ENABLED')
+                                  for x in ids])
+
+
+def pairs(session, table):
+    return set(tuple(x) for x in session.execute(sqa.select(list(table.c))))
+
+
+def test_sync_label_associations(session):
+    table = model.campaign_labels
+    session.execute(table.insert(), [
+        {'campaignId': 1, 'labelId': 10}, {'campaignId': 1, 'labelId': 11},
+        {'campaignId': 2, 'labelId': 10}, {'campaignId': 3, 'labelId': 12}])
+    session.commit()
+
+    # 3 wasn't fetched, its labels are left alone
+    gobjs = {1: labelled(11, 12), 2: labelled(), 4: labelled(10)}
+    existing = sqa.select([table.c.campaignId, table.c.labelId])
+    sync_label_associations(session, table, 'campaignId', gobjs, existing)
+    assert pairs(session, table) == {(1, 11), (1, 12), (3, 12), (4, 10)}
+
+    # nothing changed, nothing to do
+    sync_label_associations(session, table, 'campaignId', gobjs, existing)
+    assert pairs(session, table) == {(1, 11), (1, 12), (3, 12), (4, 10)}
+
+
+def test_sync_label_associations_composite_ids(session):
+    table = model.adgroupcriterion_labels
+    session.execute(table.insert(), [
+        {'adgroupId': 1, 'criterionId': 5, 'labelId': 10},
+        {'adgroupId': 1, 'criterionId': 6, 'labelId': 10},
+        {'adgroupId': 2, 'criterionId': 5, 'labelId': 11}])
+    session.commit()
+
+    gobjs = {(1, 5): labelled(10, 11), (1, 6): labelled(), (2, 5): labelled(11)}
+    existing = sqa.select([table.c.adgroupId, table.c.criterionId, table.c.labelId])
+    sync_label_associations(session, table, ('adgroupId', 'criterionId'), gobjs, existing)
+    assert pairs(session, table) == {(1, 5, 10), (1, 5, 11), (2, 5, 11)}
+
+
+def test_sync_labels(session):
+    sync_labels(session, [labelled(10, 11), labelled(11)])
+    assert sorted((x.id, x.name) for x in session.query(model.Label)) == \
+        [(10, 'label 10'), (11, 'label 11')]
+
+    renamed = FakeSudsObject(labels=[FakeSudsObject(id=10, name='renamed', status='ENABLED')])
+    sync_labels(session, [renamed])
+    assert session.query(model.Label).get(10).name == 'renamed'
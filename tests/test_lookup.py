@@ -0,0 +1,97 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import copy
+import datetime
+
+import pytest
+
+from objects import model
+from objects import report_registry
+from objects.lookup import LookupCache, LookupEncoder
+from objects.migrate import create_views
+from reports.reader import PerformanceReader
+
+
+def encoded_definition(name):
+    # under another class name, next to the plain table's class
+    definition = copy.copy(report_registry.REPORTS[name])
+    definition.class_name = 'Encoded' + definition.class_name
+    return definition
+
+
+EncodedCampaignPerformance = model.report_model(encoded_definition('campaign'),
+                                                encoded=True)
+ROW = {'AdNetworkType1': 'Search Network', 'AdNetworkType2': 'Google search',
+       'Date': datetime.date(2026, 1, 1), 'Device': 'Computers',
+       'ExternalCustomerId': 1, 'CampaignId': 11,
+       'AdvertisingChannelSubType': 'na', 'AdvertisingChannelType': 'Search',
+       'Clicks': 3}
+
+
+def test_lookup_cache(engine):
+    cache = LookupCache()
+    ids = cache.get_ids(engine, 'Device', {'Computers', 'Tablets'})
+    assert sorted(ids.values()) == [1, 2]
+    assert cache.get_ids(engine, 'Device', {'Tablets'}) == {'Tablets': ids['Tablets']}
+    # the same value of another field gets its own id
+    assert cache.get_ids(engine, 'BidType', {'Tablets'}) == {'Tablets': 3}
+
+    # another process adds a value, taking the id this cache would give next
+    other = LookupCache()
+    assert other.get_ids(engine, 'Device', {'Mobile devices'}) == {'Mobile devices': 4}
+    assert cache.get_ids(engine, 'Device', {'Mobile devices', 'Other'}) == \
+        {'Mobile devices': 4, 'Other': 5}
+
+
+@pytest.fixture
+def encoded(engine, session, monkeypatch):
+    """
+    the encoded campaign table as the campaign report, with a row of ROW
+    """
+    monkeypatch.setattr('objects.lookup.lookup_cache', LookupCache())
+    monkeypatch.setitem(model.REPORT_MODELS, 'campaign', EncodedCampaignPerformance)
+    columns = list(ROW.keys())
+    rows = LookupEncoder(EncodedCampaignPerformance, columns).\
+        encode(session, [tuple(ROW.values())])
+    assert all(isinstance(x, int) for x in rows[0][:2])
+    session.execute(EncodedCampaignPerformance.__table__.insert(),
+                    [dict(zip(columns, x)) for x in rows])
+    session.commit()
+
+
+def test_view(engine, encoded):
+    # no view over the plain table of the same name
+    assert create_views(engine) == []
+    model.CampaignPerformance.__table__.drop(engine)
+    assert create_views(engine) == ['gads_sqa_campaign_performance']
+    with engine.connect() as connection:
+        row, = connection.execute('SELECT AdNetworkType1, Device, Clicks '
+                                  'FROM gads_sqa_campaign_performance')
+    assert tuple(row) == ('Search Network', 'Computers', 3)
+
+
+def test_reader_decodes(session, encoded):
+    reader = PerformanceReader(session, 'campaign',
+                               ['AdNetworkType2', 'AdvertisingChannelType', 'Clicks'])
+    assert list(reader.batches()) == [[('Google search', 'Search', 3)]]
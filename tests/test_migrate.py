@@ -0,0 +1,78 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import sqlalchemy as sqa
+
+from objects import model
+from objects.migrate import convert_criterion_lists, create_missing_indexes, migrate
+
+
+def index_names(engine, table):
+    return set(x['name'] for x in sqa.inspect(engine).get_indexes(table.name))
+
+
+def test_migrate(engine):
+    table = model.KeywordPerformance.__table__
+    customer_date = 'ix_%s_customer_date' % table.name
+    # a database created before the indexes were declared, and before the
+    # rollups existed
+    engine.execute('DROP INDEX %s' % customer_date)
+    model.ROLLUP_MODELS[('keyword', 'campaign')].__table__.drop(engine)
+    assert customer_date not in index_names(engine, table)
+
+    migrate(engine)
+    assert customer_date in index_names(engine, table)
+    assert 'gads_sqa_keyword_campaign_rollup' in sqa.inspect(engine).get_table_names()
+    # nothing left to do
+    assert create_missing_indexes(engine) == []
+
+
+def test_create_missing_indexes_of_tables(engine):
+    table = model.KeywordPerformance.__table__
+    other = model.CriterionPerformance.__table__
+    for name in index_names(engine, table) | index_names(engine, other):
+        engine.execute('DROP INDEX %s' % name)
+
+    created = create_missing_indexes(engine, [table])
+    assert set(created) == set(x.name for x in table.indexes)
+    # the other tables are left alone
+    assert index_names(engine, other) == set()
+
+
+def test_convert_criterion_lists(engine):
+    table = model.AdGroupCriterion.__table__
+    values = {1: "['A', 'B']", 2: '["A","B"]', 3: '[]', 4: None, 5: "['C'",
+              6: "[u'D']", 7: '[{"type":"BRAND","value":"x"}]'}
+    engine.execute(table.insert(), [{'adGroupId': 11, 'criterion_id': x,
+                                     'criterion_pathlist': y}
+                                    for x, y in values.items()])
+
+    # in batches smaller than the rows to convert
+    assert convert_criterion_lists(engine, batch_size=2) == 2
+    rows = dict(tuple(x) for x in engine.execute(
+        sqa.select([table.c.criterion_id, table.c.criterion_pathlist])))
+    values.update({1: '["A","B"]', 6: '["D"]'})
+    assert rows == values
+    # nothing left to convert
+    assert convert_criterion_lists(engine) == 0
+
@@ -0,0 +1,99 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import threading
+
+import pytest
+
+from fakes import synthetic
+from fakes.client import FakeAdWordsClient
+from objects import deadlines
+from objects import paging
+from objects.paging import PageFetcher
+
+
+class RecordingService(object):
+    """
+    serves the ids 0 to total - 1, recording the start indexes asked for
+    and the threads asking.
+    """
+    def __init__(self, total):
+        self.total = total
+        self.starts = []
+        self.threads = set()
+
+    def get(self, selector):
+        self.threads.add(threading.current_thread().name)
+        start = int(selector['paging']['startIndex'])
+        count = int(selector['paging']['numberResults'])
+        self.starts.append((selector.get('name'), start))
+        entries = [synthetic.FakeSudsObject(id=x)
+                   for x in range(start, min(start + count, self.total))]
+        return synthetic._page(entries, self.total)
+
+
+@pytest.fixture
+def no_deadlines(monkeypatch):
+    """
+    the calls are made by the fetching threads, not by helper threads
+    waiting for their deadline.
+    """
+    monkeypatch.setattr(deadlines, 'CALL_TIMEOUT', 0)
+
+
+def test_fetch_in_order(no_deadlines):
+    service = RecordingService(10)
+    client = FakeAdWordsClient(services={'CampaignService': service})
+    fetcher = PageFetcher(client, 'CampaignService', page_size=3, in_flight=2)
+    assert [x.id for x in fetcher.fetch({'fields': ['Id']})] == list(range(10))
+    assert sorted(x for _, x in service.starts) == [0, 3, 6, 9]
+    # the first page alone, the remaining ones concurrently
+    assert len(service.threads) > 1
+
+
+def test_fetch_pages_of_selectors(no_deadlines):
+    service = RecordingService(4)
+    client = FakeAdWordsClient(services={'CampaignService': service})
+    fetcher = PageFetcher(client, 'CampaignService', page_size=3, in_flight=1)
+    pages = fetcher.fetch_pages([{'name': 'a'}, {'name': 'b'}])
+    assert [[x.id for x in page.entries] for page in pages] == [[0, 1, 2], [3]] * 2
+    # the first pages of all selectors come first
+    assert service.starts == [('a', 0), ('b', 0), ('a', 3), ('b', 3)]
+    assert service.threads == {threading.current_thread().name}
+
+
+def test_fetch_synthetic_campaigns(client, scale):
+    client.client_customer_id = scale.account_ids()[0]
+    fetcher = PageFetcher(client, 'CampaignService', page_size=1)
+    campaigns = fetcher.fetch({'ordering': [{'field': 'Id', 'sortOrder': 'ASCENDING'}]})
+    assert [x.id for x in campaigns] == scale.campaign_ids(scale.account_ids()[0])
+
+
+def test_configure(monkeypatch):
+    monkeypatch.setattr(paging, 'PAGE_SIZES', dict(paging.PAGE_SIZES))
+    monkeypatch.setattr(paging, 'IDS_PER_REQUEST', paging.IDS_PER_REQUEST)
+    monkeypatch.setattr(paging, 'MAX_IN_FLIGHT', paging.MAX_IN_FLIGHT)
+    paging.configure({'CampaignService': 5}, ids_per_request=7, in_flight=3)
+    fetcher = PageFetcher(FakeAdWordsClient(), 'CampaignService')
+    assert (fetcher.page_size, fetcher.in_flight) == (5, 3)
+    assert paging.IDS_PER_REQUEST == 7
@@ -0,0 +1,89 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+
+import pytest
+
+from reports import parsing
+from reports.parsing import RowConverter, split_slices, parse_report
+
+SPECS = ((0, 'Date', 'date', None),
+         (1, 'CpcBid', 'bigint', 'CpcBidAutoPrefix'),
+         (2, 'Ctr', 'float', None),
+         (3, 'Name', 'str', None),
+         (4, 'IsNegative', 'bool', None),
+         (5, 'Clicks', 'int', None),
+         (6, 'SearchImpressionShare', 'float', None))
+
+REPORT = '\n'.join([
+    '2026-01-01\t1000000\t1.5%\tfoo\ttrue\t3\t< 10%',
+    '2026-01-02\tauto: 2000000\t --\t"quoted"\tfalse\t--\t55.2%',
+    '2026-01-03\t--\t0.00%\twide \U0001F600 char\tTrue\t0\t> 90%',
+    '',
+])
+
+
+def test_row_converter():
+    rows = RowConverter(SPECS).convert(REPORT.split('\n'))
+    assert rows == [
+        (datetime.date(2026, 1, 1), 1000000, 1.5, 'foo', True, 3, 10.0, None),
+        (datetime.date(2026, 1, 2), 2000000, None, 'quoted', False, None, 55.2, True),
+        (datetime.date(2026, 1, 3), None, 0.0, 'wide  char', True, 0, 90.0, None),
+    ]
+
+
+def test_split_slices():
+    data = b'a\nbb\nccc\ndddd\n'
+    slices = split_slices(data, 3)
+    assert len(slices) > 1
+    assert b'\n'.join(slices) + b'\n' == data
+
+
+def test_parse_report_in_processes(monkeypatch):
+    monkeypatch.setattr(parsing, 'MIN_PARALLEL_LINES', 10)
+    report = '\n'.join([x for x in REPORT.split('\n') if x] * 20)
+    converter = RowConverter(SPECS)
+    serial = [x for rows in parse_report(converter, report) for x in rows]
+    parallel = [x for rows in parse_report(converter, report, workers=2) for x in rows]
+    assert len(serial) == 60
+    # in the order of the report
+    assert parallel == serial
+
+
+@pytest.fixture
+def columnar():
+    pytest.importorskip('numpy')
+    pytest.importorskip('pandas')
+    from reports import columnar
+
+    return columnar
+
+
+def test_columnar_converter_matches_rows(columnar):
+    assert columnar.ColumnarConverter(SPECS).convert_text(REPORT) == \
+        RowConverter(SPECS).convert_text(REPORT)
+
+
+def test_columnar_converter_empty_report(columnar):
+    assert columnar.ColumnarConverter(SPECS).convert_text('') == []
@@ -0,0 +1,203 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import time
+
+import pytest
+
+pytest.importorskip('googleads')
+
+from googleads.errors import AdWordsReportBadRequestError, AdWordsReportError
+
+from fakes.client import FakeAdWordsClient
+from objects import deadlines
+from objects import model
+from reports.performance_reports import CriterionPerformanceReport, KeywordPerformanceReport
+
+ACCOUNT_ID = 1
+START = datetime.date(2026, 1, 1)
+BAD_DAY = datetime.date(2026, 1, 6)
+
+
+def day(n):
+    return START + datetime.timedelta(days=n - 1)
+
+
+def bad_request(type_):
+    return AdWordsReportBadRequestError(type_, '', '', 400, None, type_)
+
+
+@pytest.fixture
+def report(session, monkeypatch):
+    """
+    a keyword report whose downloads fail over more than 4 days, like a
+    report too large for the API, and always on its bad days. Each download
+    is written as one row.
+    """
+    client = FakeAdWordsClient()
+    client.client_customer_id = ACCOUNT_ID
+    report = KeywordPerformanceReport(client, session)
+    report.downloads = []
+    report.written = []
+    report.bad_days = {BAD_DAY}
+
+    def download_report(start_date, end_date):
+        report.downloads.append((start_date, end_date))
+        if any(start_date <= x <= end_date for x in report.bad_days):
+            raise OSError('connection reset')
+        if (end_date - start_date).days >= 4:
+            raise OSError('timed out')
+        return (start_date, end_date)
+
+    def insert_rows(rows):
+        report.written.extend(rows)
+        return len(rows)
+    monkeypatch.setattr(report, 'download_report', download_report)
+    monkeypatch.setattr(report, 'convert_report', lambda report_str: [report_str])
+    monkeypatch.setattr(report, 'insert_rows', insert_rows)
+    monkeypatch.setattr(report, 'get_days_for_chunk_size', lambda: 10)
+    return report
+
+
+def test_download_chunks_bisects(report):
+    chunks = list(report.download_chunks(day(1), day(10)))
+    assert [(x, y) for x, y, report_str, error in chunks] == [
+        (day(1), day(3)), (day(4), day(5)), (day(6), day(6)), (day(7), day(7)),
+        (day(8), day(8)), (day(9), day(10))]
+    # only the bad day is given up on
+    for start, end, report_str, error in chunks:
+        assert (report_str is None) == (start == BAD_DAY)
+    assert isinstance(chunks[2][3], OSError)
+
+
+@pytest.mark.parametrize('error', [
+    bad_request('QueryError.INVALID_FIELD_NAME'),
+    AdWordsReportError(401, None, 'AuthenticationError.NOT_ADS_USER'),
+])
+def test_download_chunks_raises_other_errors(report, monkeypatch, error):
+    # failing on any day, splitting wouldn't help
+    def download_report(start_date, end_date):
+        report.downloads.append((start_date, end_date))
+        raise error
+    monkeypatch.setattr(report, 'download_report', download_report)
+    with pytest.raises(AdWordsReportError):
+        list(report.download_chunks(day(1), day(10)))
+    assert report.downloads == [(day(1), day(10))]
+
+
+def test_download_chunks_splits_size_errors(report, monkeypatch):
+    def download_report(start_date, end_date):
+        if start_date != end_date:
+            raise bad_request('ReportDefinitionError.REPORT_TOO_LARGE')
+        return ''
+    monkeypatch.setattr(report, 'download_report', download_report)
+    assert len(list(report.download_chunks(day(1), day(4)))) == 4
+
+
+def gaps(session):
+    return [(x.startDate, x.endDate) for x in session.query(model.ReportGap)]
+
+
+def test_dump_records_and_retries_gaps(report, session):
+    assert report.dump(day(1), day(8)) == 3
+    assert gaps(session) == [(BAD_DAY, BAD_DAY)]
+    assert [x for x in report.written if x[0] <= BAD_DAY <= x[1]] == []
+
+    # the next run loads the gap first
+    report.bad_days = set()
+    report.written = []
+    assert report.retry_gaps() == 1
+    assert report.written == [(BAD_DAY, BAD_DAY)]
+    assert gaps(session) == []
+
+
+def test_refresh_lists_gaps(report, session):
+    assert report.refresh(day(5), day(7)) == 2
+    assert [(x, y) for x, y, error in report.gaps] == [(BAD_DAY, BAD_DAY)]
+    assert gaps(session) == [(BAD_DAY, BAD_DAY)]
+
+
+@pytest.fixture
+def criterion_report(session, monkeypatch):
+    """
+    a criterion report whose narrow downloads give 10 impressions and 2
+    clicks on each of the last days, and which records its refreshes.
+    """
+    client = FakeAdWordsClient()
+    client.client_customer_id = ACCOUNT_ID
+    report = CriterionPerformanceReport(client, session)
+    report.refreshed = []
+
+    def download_report(start_date, end_date, fields=None):
+        assert fields == ['Date', 'Impressions', 'Clicks', 'Cost']
+        days = [start_date + datetime.timedelta(days=i)
+                for i in range((end_date - start_date).days + 1)]
+        return ''.join('%s\t10\t2\t1000\n' % x.strftime('%Y-%m-%d') for x in days)
+    monkeypatch.setattr(report, 'download_report', download_report)
+    monkeypatch.setattr(report, 'refresh',
+                        lambda start_date, end_date: report.refreshed.append(start_date))
+    return report
+
+
+def insert(session, day, impressions, clicks, criterionId=1):
+    session.execute(model.CriterionPerformance.__table__.insert(), [{
+        'AdNetworkType1': 'Search Network', 'AdNetworkType2': 'Google search',
+        'Date': day, 'Device': 'Computers', 'ExternalCustomerId': ACCOUNT_ID,
+        'CampaignId': 11, 'AdGroupId': 111, 'Id': criterionId,
+        'Impressions': impressions, 'Clicks': clicks, 'Cost': 500}])
+
+
+def test_completeness_check(criterion_report, session):
+    # complete, split over two rows
+    insert(session, day(1), 6, 1)
+    insert(session, day(1), 4, 1, criterionId=2)
+    # clicks missing
+    insert(session, day(2), 10, 1)
+    # complete, the last day
+    insert(session, day(4), 10, 2)
+    insert(session, day(4), 0, 0, criterionId=2)
+    session.commit()
+    # day(1) is out of the checked days, day(3) is missing
+    assert criterion_report.get_incomplete_days(day(4)) == [day(2), day(3)]
+
+    assert criterion_report.get_first_date_of_no_data() == day(5)
+    assert criterion_report.refreshed == [day(2), day(3)]
+
+
+def test_download_over_its_deadline_renews_the_downloader(session, monkeypatch):
+    class StalledDownloader(object):
+        def DownloadReportAsStringWithAwql(self, *args, **kwargs):
+            time.sleep(1)
+
+    client = FakeAdWordsClient(report_downloader=StalledDownloader())
+    client.client_customer_id = ACCOUNT_ID
+    report = KeywordPerformanceReport(client, session)
+    stalled = report.report_downloader
+    monkeypatch.setattr(deadlines, 'CHUNK_TIMEOUT', 0.05)
+    client.report_downloader = object()
+    with pytest.raises(deadlines.CallTimeout):
+        report.download_report(day(1), day(1))
+    # the next downloads aren't made on the one still running
+    assert report.report_downloader is client.report_downloader
+    assert report.report_downloader is not stalled
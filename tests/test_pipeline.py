@@ -0,0 +1,87 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import pytest
+
+from fakes.client import FakeAdWordsClient
+from objects import model
+from runner import pipeline
+
+ACCOUNT_ID = 1
+
+
+class FakeAccount(object):
+    name = 'account'
+
+
+class FakeReport(object):
+    """
+    stands in for the performance reports, keeping the days asked for.
+    """
+    calls = []
+
+    def __init__(self, client, session, **kwargs):
+        pass
+
+    def dump(self, start_date=None, end_date=None):
+        self.calls.append(('dump', start_date, end_date))
+        return 2
+
+    def refresh(self, start_date, end_date):
+        self.calls.append(('refresh', start_date, end_date))
+        return 3
+
+
+@pytest.fixture
+def reports(monkeypatch, session):
+    for name in pipeline.REPORT_TYPES:
+        monkeypatch.setitem(pipeline.REPORT_TYPES, name, (__name__, 'FakeReport'))
+    monkeypatch.setattr(FakeReport, 'calls', [])
+    session.execute(model.Campaign.__table__.insert(),
+                    [{'id': 11, 'accountId': ACCOUNT_ID}])
+    session.commit()
+    return FakeReport.calls
+
+
+def test_process_selected_reports(reports, session):
+    client = FakeAdWordsClient()
+    rows = pipeline.process_account(client, session, ACCOUNT_ID, FakeAccount(),
+                                    entities=[], reports=['account', 'keyword'])
+    assert rows == 4
+    assert len(reports) == 2
+    assert client.client_customer_id == ACCOUNT_ID
+
+
+def test_refresh_selected_reports(reports, session):
+    rows = pipeline.refresh_account(FakeAdWordsClient(), session, ACCOUNT_ID,
+                                    FakeAccount(), days=3, entities=[],
+                                    reports=['campaign'])
+    assert rows == 3
+    (name, start_date, end_date), = reports
+    assert (end_date - start_date).days == 2
+
+
+def test_account_without_campaigns(reports, session):
+    assert pipeline.process_account(FakeAdWordsClient(), session, 2, FakeAccount(),
+                                    entities=[]) == 0
+    assert reports == []
@@ -0,0 +1,79 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import pytest
+import sqlalchemy as sqa
+
+from objects import model
+from runner.profiler import SQLProfiler, patterns, statement_shape, N_PLUS_ONE
+
+
+def test_statement_shape():
+    assert statement_shape("SELECT a FROM t WHERE b = 'x' AND c IN (?, ?, ?)\n  AND d = 12") == \
+        'SELECT a FROM t WHERE b = ? AND c IN (?, ...) AND d = ?'
+    # whatever the number of rows and the parameter style
+    assert statement_shape('INSERT INTO t (a, b) VALUES (:a_1, :b_1), (:a_2, :b_2)') == \
+        statement_shape('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)') == \
+        'INSERT INTO t (a, b) VALUES (?, ...), ...'
+
+
+def test_patterns():
+    select = 'SELECT a FROM t WHERE id = ?'
+    assert patterns(select, N_PLUS_ONE, N_PLUS_ONE) == ['per-row SELECT']
+    assert patterns(select, N_PLUS_ONE - 1, 0) == []
+    assert patterns(select, N_PLUS_ONE, 10 * N_PLUS_ONE) == []
+    # the rows of the runs aren't known
+    assert patterns(select, N_PLUS_ONE, 0, unknown=N_PLUS_ONE) == []
+    for quoted in ['"_lastUpdated"', '[_lastUpdated]']:
+        assert patterns('UPDATE t SET a=? WHERE t.id = ? AND t.%s = ?' % quoted,
+                        N_PLUS_ONE, N_PLUS_ONE) == ['per-row versioned UPDATE']
+    assert patterns('SELECT a FROM t LEFT OUTER JOIN u AS u_1 ON ?', 1, 1) == \
+        ['joined eager load']
+
+
+@pytest.fixture
+def profiler(engine):
+    profiler = SQLProfiler()
+    profiler.attach(engine)
+    yield profiler
+    profiler.detach()
+
+
+def test_profile(profiler, session):
+    table = model.Campaign.__table__
+    session.execute(table.insert(), [{'id': x, 'accountId': 1} for x in range(N_PLUS_ONE)])
+    session.commit()
+    with profiler.stage('orm'):
+        for x in range(N_PLUS_ONE):
+            session.query(model.Campaign).get(x)
+            session.expunge_all()
+    with profiler.stage('core'):
+        for x in range(N_PLUS_ONE):
+            session.execute(sqa.select([table.c.id])).fetchall()
+
+    flags = dict(((stage, shape.split(' ', 1)[0]), patterns(shape, x.count, x.rows, x.unknown))
+                 for (stage, shape), x in profiler.stats.items())
+    assert 'per-row SELECT' in flags[('orm', 'SELECT')]
+    # many rows each, which the driver doesn't count
+    assert flags[('core', 'SELECT')] == []
+    assert profiler.report()[0].startswith('SQL profile: ')
@@ -0,0 +1,76 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+
+import pytest
+
+from objects import model
+from reports.reader import PerformanceReader
+
+DAY = datetime.date(2026, 1, 1)
+
+
+@pytest.fixture
+def rows(session):
+    session.execute(model.Campaign.__table__.insert(),
+                    [{'id': 11, 'accountId': 1, 'name': 'campaign'}])
+    session.execute(model.CriterionPerformance.__table__.insert(), [{
+        'AdNetworkType1': 'Search Network', 'AdNetworkType2': 'Google search',
+        'Date': DAY + datetime.timedelta(days=i % 3), 'Device': 'Computers',
+        'ExternalCustomerId': 1 + i % 2, 'CampaignId': 11 + i % 2,
+        'AdGroupId': 111, 'Id': i, 'Clicks': i} for i in range(10)])
+    session.commit()
+
+
+def test_batches(session, rows):
+    reader = PerformanceReader(session, 'criterion', ['Id', 'Clicks'], batch_size=3)
+    batches = list(reader.batches())
+    assert [len(x) for x in batches] == [3, 3, 3, 1]
+    assert sorted(x for rows in batches for x in rows) == [(i, i) for i in range(10)]
+
+
+def test_filters_and_names(session, rows):
+    reader = PerformanceReader(session, 'criterion', ['Id', 'Date'], names=True)
+    assert reader.column_names() == ['Id', 'Date', 'CampaignName', 'AdGroupName']
+    end_date = DAY + datetime.timedelta(days=1)
+    rows = [x for rows in reader.batches(accounts=[1], end_date=end_date) for x in rows]
+    # campaign 11 has a name, adgroup 111 isn't known
+    assert sorted(rows) == [(0, DAY, 'campaign', None),
+                            (4, end_date, 'campaign', None),
+                            (6, DAY, 'campaign', None)]
+    assert [x for rows in reader.batches(campaigns=[12]) for x in rows] == \
+        [x for rows in reader.batches(accounts=[2]) for x in rows]
+
+
+def test_filter_on_missing_column(session):
+    with pytest.raises(ValueError):
+        PerformanceReader(session, 'account').query(adgroups=[1])
+
+
+def test_frames(session, rows):
+    pytest.importorskip('pandas')
+    reader = PerformanceReader(session, 'criterion', ['Id', 'Clicks'], batch_size=4)
+    frames = list(reader.frames(accounts=[2]))
+    assert sum(len(x) for x in frames) == 5
+    assert list(frames[0].columns) == ['Id', 'Clicks']
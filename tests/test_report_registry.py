@@ -0,0 +1,68 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from objects import model
+from objects import report_registry
+from objects.report_registry import REPORTS
+
+COMMON_KEYS = ['AdNetworkType1', 'AdNetworkType2', 'Date', 'Device',
+               'ExternalCustomerId']
+
+
+def test_primary_keys():
+    # the keys of the tables created before the registry, which existing
+    # databases are clustered on
+    keys = {
+        model.AccountPerformance: COMMON_KEYS,
+        model.CampaignPerformance: COMMON_KEYS + ['CampaignId', 'AdvertisingChannelSubType',
+                                                  'AdvertisingChannelType'],
+        model.AdGroupPerformance: COMMON_KEYS + ['AdGroupId'],
+        model.CriterionPerformance: COMMON_KEYS + ['CampaignId', 'AdGroupId', 'Id'],
+        model.KeywordPerformance: COMMON_KEYS + ['CampaignId', 'AdGroupId', 'Id'],
+    }
+    for ormType, columns in keys.items():
+        assert [x.name for x in ormType.__table__.primary_key.columns] == columns
+
+
+def test_active_fields():
+    definition = REPORTS['keyword']
+    active = [x.name for x in definition.active_fields(['ActiveView*', 'Date', 'Cost'])]
+    assert 'Cost' not in active
+    assert not [x for x in active if x.startswith('ActiveView')]
+    # key fields are kept
+    assert 'Date' in active
+    assert len(active) == len(definition.fields) - 1 - \
+        len([x for x in definition.fields if x.name.startswith('ActiveView')])
+
+
+def test_load_excluded_fields(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    assert report_registry.load_excluded_fields() == {x: [] for x in REPORTS}
+
+    tmp_path.joinpath(report_registry.CONFIG_FILENAME).write_text(
+        '[all]\nexclude = Gmail*, ActiveView*\n\n'
+        '[keyword]\nexclude = EstimatedAdd*\n\n'
+        '[nonexistent]\nexclude = Cost\n')
+    excluded = report_registry.load_excluded_fields()
+    assert excluded['keyword'] == ['Gmail*', 'ActiveView*', 'EstimatedAdd*']
+    assert excluded['account'] == ['Gmail*', 'ActiveView*']
@@ -0,0 +1,92 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+
+from objects import model
+from reports.rollups import RollupUpdater
+
+CUSTOMER_ID = 1
+# Friday to Monday, across the end of a week and of a month
+DAYS = [datetime.date(2026, 1, 30) + datetime.timedelta(days=i) for i in range(4)]
+
+
+def insert(session, day, adGroupId, impressions, clicks=1):
+    session.execute(model.CriterionPerformance.__table__.insert(), [{
+        'AdNetworkType1': 'Search Network', 'AdNetworkType2': 'Google search',
+        'Date': day, 'Device': 'Computers', 'ExternalCustomerId': CUSTOMER_ID,
+        'CampaignId': 11, 'AdGroupId': adGroupId, 'Id': 1,
+        'Impressions': impressions, 'Clicks': clicks}])
+
+
+def rollup(session, level, grain):
+    table = model.ROLLUP_MODELS[('criterion', level)].__table__
+    rows = session.execute(table.select().where(table.c.Grain == grain).\
+                           order_by(table.c.PeriodStart))
+    return [(x.PeriodStart, x.Impressions, x.Clicks) for x in rows]
+
+
+def test_update(session):
+    for i, day in enumerate(DAYS):
+        insert(session, day, 111, 10 ** i)
+        insert(session, day, 112, 2 * 10 ** i)
+    session.commit()
+
+    RollupUpdater(session, 'criterion').update(CUSTOMER_ID, DAYS[0], DAYS[-1])
+    assert rollup(session, 'campaign', 'day') == \
+        [(x, 3 * 10 ** i, 2) for i, x in enumerate(DAYS)]
+    assert rollup(session, 'campaign', 'week') == \
+        [(datetime.date(2026, 1, 26), 333, 6), (datetime.date(2026, 2, 2), 3000, 2)]
+    assert rollup(session, 'campaign', 'month') == \
+        [(datetime.date(2026, 1, 1), 33, 4), (datetime.date(2026, 2, 1), 3300, 4)]
+    assert len(rollup(session, 'adgroup', 'day')) == 2 * len(DAYS)
+
+    # a reloaded day changes its week and month, which keep the other days
+    table = model.CriterionPerformance.__table__
+    session.execute(table.delete().where(table.c.Date == DAYS[2]))
+    insert(session, DAYS[2], 111, 5000)
+    session.commit()
+    RollupUpdater(session, 'criterion').update(CUSTOMER_ID, DAYS[2], DAYS[2])
+    assert rollup(session, 'campaign', 'week')[0] == (datetime.date(2026, 1, 26), 5033, 5)
+    assert rollup(session, 'campaign', 'month')[1] == (datetime.date(2026, 2, 1), 8000, 3)
+    assert len(rollup(session, 'campaign', 'day')) == len(DAYS)
+
+
+def test_update_without_commit(session):
+    insert(session, DAYS[0], 111, 1)
+    session.commit()
+    RollupUpdater(session, 'criterion').update(CUSTOMER_ID, DAYS[0], DAYS[0],
+                                               commit=False)
+    # left for the caller to commit with the report rows
+    session.rollback()
+    assert rollup(session, 'campaign', 'day') == []
+
+
+def test_rebuild(session):
+    insert(session, DAYS[0], 111, 1)
+    insert(session, DAYS[3], 111, 2)
+    session.commit()
+    RollupUpdater(session, 'criterion').rebuild()
+    assert rollup(session, 'adgroup', 'day') == [(DAYS[0], 1, 1), (DAYS[3], 2, 1)]
+    assert rollup(session, 'campaign', 'month') == \
+        [(datetime.date(2026, 1, 1), 1, 1), (datetime.date(2026, 2, 1), 2, 1)]
@@ -0,0 +1,105 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import time
+
+import sqlalchemy as sqa
+import sqlalchemy.orm
+
+from objects import deadlines
+from objects import model
+from runner.scheduler import AccountScheduler, UNKNOWN_ACCOUNT_COST
+
+
+def test_plan_is_lpt(session):
+    costs = {1: 7.0, 2: 5.0, 3: 4.0, 4: 3.0, 5: 3.0, 6: 2.0}
+    plan = AccountScheduler(session, workers=2).plan(costs)
+    assert len(plan) == 2
+    assert sorted(x for load, accounts in plan for x in accounts) == sorted(costs)
+    for load, accounts in plan:
+        assert load == sum(costs[x] for x in accounts)
+        # each worker takes its accounts largest first
+        assert [costs[x] for x in accounts] == sorted([costs[x] for x in accounts],
+                                                      reverse=True)
+    # 7+3+2 and 5+4+3: LPT's makespan, the optimum here
+    assert sorted(x[0] for x in plan) == [12.0, 12.0]
+
+
+def test_plan_more_workers_than_accounts(session):
+    plan = AccountScheduler(session, workers=4).plan({1: 2.0, 2: 1.0})
+    assert [x for x in plan if x[1]] == [(2.0, [1]), (1.0, [2])]
+    assert [x for x in plan if not x[1]] == [(0.0, []), (0.0, [])]
+
+
+def test_estimate_costs(session):
+    session.execute(model.Campaign.__table__.insert(),
+                    [{'id': 11, 'accountId': 1}, {'id': 21, 'accountId': 2}])
+    session.execute(model.AdGroup.__table__.insert(),
+                    [{'id': 111, 'campaignId': 11}, {'id': 112, 'campaignId': 11},
+                     {'id': 113, 'campaignId': 11}, {'id': 211, 'campaignId': 21}])
+    stat = model.AccountRunStat()
+    stat.accountId = 1
+    stat.lastStarted = datetime.datetime.now()
+    stat.lastDuration = 8.0
+    session.add(stat)
+    session.commit()
+
+    costs = AccountScheduler(session).estimate_costs([1, 2, 3])
+    # the last run of 1, then 2 seconds per entity as observed on 1
+    assert costs == {1: 8.0, 2: 4.0, 3: UNKNOWN_ACCOUNT_COST}
+
+
+def test_run_returns_failed_accounts(engine, session):
+    Session = sqa.orm.sessionmaker(bind=engine)
+    processed = []
+
+    def process(client, session, accountId, account):
+        if accountId == 2:
+            raise ValueError('broken account')
+        processed.append(accountId)
+        return 10
+
+    accounts = {1: None, 2: None, 3: None}
+    failed = AccountScheduler(session, workers=2).run(accounts, process,
+                                                      lambda: None, Session)
+    assert failed == [2]
+    assert sorted(processed) == [1, 3]
+    # the durations of the accounts processed are kept for the next plan
+    assert sorted(x.accountId for x in session.query(model.AccountRunStat)) == [1, 3]
+
+
+def test_run_gives_up_accounts_over_their_deadline(engine, session, monkeypatch):
+    Session = sqa.orm.sessionmaker(bind=engine)
+    monkeypatch.setattr(deadlines, 'ACCOUNT_TIMEOUT', 0.05)
+
+    def process(client, session, accountId, account):
+        if accountId == 2:
+            deadlines.call_with_deadline(time.sleep, 1, seconds=10)
+        return 10
+
+    failed = AccountScheduler(session).run({1: None, 2: None}, process,
+                                           lambda: None, Session)
+    assert failed == [2]
+    # its time so far is kept, to start it first the next time
+    assert sorted(x.accountId for x in session.query(model.AccountRunStat)) == [1, 2]
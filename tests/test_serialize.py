@@ -0,0 +1,117 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import json
+
+from objects.serialize import dumps, legacy_to_json
+
+# values of the list columns of criteria as they were stored before the
+# JSON form, str() of lists of suds objects and Text
+PATH = '''[(ProductBiddingCategory){
+   ProductDimension.Type = "ProductBiddingCategory"
+   type = "BIDDING_CATEGORY_L1"
+   value = 2271
+ }, (ProductBrand){
+   ProductDimension.Type = "ProductBrand"
+   value = "Acme "Tools", Inc"
+ }, (ProductCanonicalCondition){
+   ProductDimension.Type = "ProductCanonicalCondition"
+   condition = None
+ }]'''
+
+BIDS = '''[(CpcBid){
+   Bids.Type = "CpcBid"
+   bid = 
+      (Money){
+         ComparableValue.Type = "Money"
+         microAmount = 1500000
+      }
+   cpcBidSource = "ADGROUP"
+ }, (CpmBid){
+   Bids.Type = "CpmBid"
+   bid = 
+      (Money){
+         ComparableValue.Type = "Money"
+         microAmount = 0
+      }
+ }]'''
+
+COLLECTIONS = '''[(ProductCustomAttribute){
+   ProductDimension.Type = "ProductCustomAttribute"
+   tags[] = 
+      "summer",
+      "big sale",
+   values[] = 
+      (String_StringMapEntry){
+         key = "size"
+         value = "XL"
+      },
+   empty[] = <empty>
+ }]'''
+
+
+def test_suds_objects():
+    assert json.loads(legacy_to_json(PATH)) == [
+        {'ProductDimension.Type': 'ProductBiddingCategory',
+         'type': 'BIDDING_CATEGORY_L1', 'value': 2271},
+        {'ProductDimension.Type': 'ProductBrand', 'value': 'Acme "Tools", Inc'},
+        {'ProductDimension.Type': 'ProductCanonicalCondition'}]
+
+
+def test_nested_objects():
+    assert json.loads(legacy_to_json(BIDS)) == [
+        {'Bids.Type': 'CpcBid', 'cpcBidSource': 'ADGROUP',
+         'bid': {'ComparableValue.Type': 'Money', 'microAmount': 1500000}},
+        {'Bids.Type': 'CpmBid',
+         'bid': {'ComparableValue.Type': 'Money', 'microAmount': 0}}]
+
+
+def test_collections():
+    assert json.loads(legacy_to_json(COLLECTIONS)) == [
+        {'ProductDimension.Type': 'ProductCustomAttribute',
+         'tags': ['summer', 'big sale'],
+         'values': [{'key': 'size', 'value': 'XL'}],
+         'empty': []}]
+
+
+def test_texts_and_strings():
+    # suds' Text prints unquoted in a list, python strings quoted
+    assert legacy_to_json('[example.com, example.org/some path]') == \
+        dumps(['example.com', 'example.org/some path'])
+    assert legacy_to_json("['DOMAIN_MISMATCH', 'ADULT_CONTENT']") == \
+        dumps(['DOMAIN_MISMATCH', 'ADULT_CONTENT'])
+    assert legacy_to_json('[]') == '[]'
+
+
+def test_canonical_form():
+    # the same JSON as the values stored since, whatever the field order
+    assert legacy_to_json(PATH) == dumps(json.loads(legacy_to_json(PATH)))
+
+
+def test_unparsable():
+    assert legacy_to_json('(ProductBrand){\n   value = "x"\n }') is None
+    assert legacy_to_json('[(ProductBrand){\n   value = "x"\n ') is None
+    assert legacy_to_json('None') is None
+    # cut short, e.g. by the size of an old column
+    assert legacy_to_json("['A', 'B") is None
+    assert legacy_to_json("['A', ") is None
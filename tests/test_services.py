@@ -0,0 +1,81 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import gc
+
+from fakes.client import FakeAdWordsClient
+from objects.services import ServicePool
+
+
+class CountingClient(FakeAdWordsClient):
+    """
+    creates a new service on every GetService, like AdWordsClient.
+    """
+    def __init__(self):
+        super().__init__()
+        self.created = []
+
+    def GetService(self, service_name, version=None, server=None):
+        self.created.append((service_name, version))
+        return object()
+
+    def GetReportDownloader(self, version=None, server=None):
+        self.created.append(('downloader', version))
+        return object()
+
+
+def test_services_are_reused():
+    pool = ServicePool()
+    client = CountingClient()
+    with pool.borrow(client, 'CampaignService') as first:
+        pass
+    with pool.borrow(client, 'CampaignService') as second:
+        # borrowed at the same time, another one is created
+        with pool.borrow(client, 'CampaignService') as third:
+            pass
+    assert second is first and third is not first
+    with pool.borrow(client, 'CampaignService', version='v201609') as other:
+        assert other is not first and other is not third
+    assert client.created == [('CampaignService', 'v201607')] * 2 + \
+        [('CampaignService', 'v201609')]
+    assert pool.created == 3
+
+
+def test_services_of_each_client():
+    pool = ServicePool()
+    clients = [CountingClient(), CountingClient()]
+    for client in clients:
+        with pool.borrow(client, 'AdGroupService'):
+            pass
+    assert [len(x.created) for x in clients] == [1, 1]
+    # dropped with their client
+    del clients, client
+    gc.collect()
+    assert len(pool.free) == 0
+
+
+def test_report_downloader_built_once():
+    pool = ServicePool()
+    client = CountingClient()
+    assert pool.report_downloader(client) is pool.report_downloader(client)
+    assert client.created == [('downloader', 'v201607')]
@@ -0,0 +1,99 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+
+import pytest
+
+from fakes import synthetic
+from objects import model
+from reports.parsing import converter_for
+from runner.pipeline import sync_entities
+
+DAY = datetime.date(2026, 1, 1)
+
+
+def test_scale_parse():
+    scale = synthetic.Scale.parse('accounts=10, criteria=3,')
+    assert (scale.accounts, scale.criteria, scale.campaigns) == (10, 3, 5)
+    assert repr(synthetic.Scale.parse(repr(scale))) == repr(scale)
+    with pytest.raises(ValueError):
+        synthetic.Scale.parse('acounts=10')
+
+
+def test_select():
+    entries = [synthetic.FakeSudsObject(id=x) for x in [3, 1, 2, 5, 4]]
+    getters = {'Id': lambda x: x.id}
+    page = synthetic.select(entries, {
+        'predicates': {'field': 'Id', 'operator': 'GREATER_THAN', 'values': ['1']},
+        'ordering': [{'field': 'Id', 'sortOrder': 'DESCENDING'}],
+        'paging': {'startIndex': 1, 'numberResults': 2}}, getters)
+    assert page.totalNumEntries == 4
+    assert [x.id for x in page.entries] == [4, 3]
+    with pytest.raises(ValueError):
+        synthetic.select(entries, {'paging': {'startIndex': 100001}}, getters)
+
+
+def test_sync(client, session, scale):
+    accountId = scale.account_ids()[0]
+    client.client_customer_id = accountId
+    assert sync_entities(client, session, accountId)
+    assert session.query(model.Campaign).count() == scale.campaigns
+    assert session.query(model.AdGroup).count() == scale.campaigns * scale.adgroups
+    assert session.query(model.AdGroupCriterion).count() == \
+        scale.campaigns * scale.adgroups * scale.criteria
+
+
+def download(client, name, fields, start_date=DAY, end_date=DAY):
+    definition = model.REPORT_MODELS[name].report_definition
+    return client.GetReportDownloader().DownloadReportAsStringWithAwql(
+        'SELECT %s FROM %s During %s,%s' % (', '.join(fields), definition.report_service,
+                                           start_date.strftime('%Y%m%d'),
+                                           end_date.strftime('%Y%m%d')), 'TSV')
+
+
+def test_narrow_report_totals(client, scale):
+    client.client_customer_id = scale.account_ids()[0]
+    ormType = model.REPORT_MODELS['criterion']
+    fields = tuple(ormType.report_fields)
+    rows = converter_for(ormType, fields).convert_text(download(client, 'criterion', fields))
+    assert len(rows) == scale.active_criteria * scale.segments
+
+    narrow = ('Date', 'Clicks', 'Cost')
+    totals = converter_for(ormType, narrow).\
+        convert_text(download(client, 'criterion', narrow))
+    for i, field in enumerate(narrow[1:], 1):
+        assert sum(x[i] for x in totals) == \
+            sum(x[fields.index(field)] for x in rows)
+
+
+def test_engines_match_on_synthetic_reports(client, scale):
+    pytest.importorskip('numpy')
+    pytest.importorskip('pandas')
+    client.client_customer_id = scale.account_ids()[0]
+    for name, ormType in model.REPORT_MODELS.items():
+        fields = tuple(ormType.report_fields)
+        report_str = download(client, name, fields, DAY, DAY + datetime.timedelta(days=2))
+        rows = converter_for(ormType, fields, 'rows').convert_text(report_str)
+        assert rows
+        assert converter_for(ormType, fields, 'columnar').convert_text(report_str) == rows
@@ -0,0 +1,124 @@
+"""
+    This file is a part of google-adwords-dumper.
+
+    google-adwords-dumper is a program to fetch basic data of an adwords
+    account and some relevant performance reports of the account. It also
+    fetches the data of child accounts if the given account is a master
+    account.
+    Copyright (C) 2016 Adrin Jalali
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import datetime
+import multiprocessing
+import time
+
+from runner.token_cache import FileTokenCache, CachedOAuth2Client
+
+
+def refresher(log, token='token', lifetime=3600):
+    """
+    a refresh function logging its calls to the file log, which slows down
+    to let concurrent callers pile up.
+    """
+    def refresh():
+        with open(log, 'a') as f:
+            f.write('refresh\n')
+        time.sleep(0.2)
+        return token, time.time() + lifetime
+    return refresh
+
+
+def refreshes(log):
+    try:
+        with open(log) as f:
+            return len(f.readlines())
+    except FileNotFoundError:
+        return 0
+
+
+def test_cached_token(tmp_path):
+    log = str(tmp_path.joinpath('log'))
+    cache = FileTokenCache(str(tmp_path.joinpath('token.json')))
+    token, expiry = cache.get_or_refresh('key', refresher(log))
+    assert token == 'token' and expiry > time.time()
+    # from the file, for another cache of the same path too
+    other = FileTokenCache(cache.path)
+    assert other.get_or_refresh('key', refresher(log, 'other')) == (token, expiry)
+    assert other.get_or_refresh('another key', refresher(log, 'other'))[0] == 'other'
+    assert refreshes(log) == 2
+
+    # a token within the margin of its expiry is refreshed
+    cache.get_or_refresh('short', refresher(log, 'short', lifetime=60))
+    assert cache.get('short') is None
+    assert cache.get_or_refresh('short', refresher(log, 'new'))[0] == 'new'
+    assert refreshes(log) == 4
+
+
+def test_forced_refresh(tmp_path):
+    log = str(tmp_path.joinpath('log'))
+    cache = FileTokenCache(str(tmp_path.joinpath('token.json')))
+    cache.get_or_refresh('key', refresher(log))
+    # just refreshed by another process: kept
+    assert cache.get_or_refresh('key', refresher(log, 'new'), force=True)[0] == 'token'
+    assert refreshes(log) == 1
+    cache.margin = -1
+    assert cache.get_or_refresh('key', refresher(log, 'new'), force=True)[0] == 'new'
+
+
+def get_token(path, log):
+    FileTokenCache(path).get_or_refresh('key', refresher(log))
+
+
+def test_one_refresh_across_processes(tmp_path):
+    path = str(tmp_path.joinpath('token.json'))
+    log = str(tmp_path.joinpath('log'))
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=get_token, args=(path, log)) for i in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [x.exitcode for x in processes] == [0] * 4
+    assert refreshes(log) == 1
+
+
+class FakeCredentials(object):
+    client_id = 'client'
+    refresh_token = 'refresh'
+    access_token = None
+    token_expiry = None
+
+
+class FakeOAuth2Client(object):
+    def __init__(self):
+        self.oauth2credentials = FakeCredentials()
+        self.refreshes = 0
+
+    def Refresh(self):
+        self.refreshes += 1
+        self.oauth2credentials.access_token = 'token %d' % self.refreshes
+        self.oauth2credentials.token_expiry = datetime.datetime.utcnow() + \
+            datetime.timedelta(hours=1)
+
+
+def test_clients_share_the_token(tmp_path):
+    cache = FileTokenCache(str(tmp_path.joinpath('token.json')))
+    first, second = FakeOAuth2Client(), FakeOAuth2Client()
+    assert CachedOAuth2Client(first, cache).CreateHttpHeader() == \
+        {'Authorization': 'Bearer token 1'}
+    assert CachedOAuth2Client(second, cache).CreateHttpHeader() == \
+        {'Authorization': 'Bearer token 1'}
+    assert (first.refreshes, second.refreshes) == (1, 0)